@@ -0,0 +1,89 @@
+# @version 0.3.7
+
+# @notice Frok.AI Vickrey Auction house factory
+# @dev Deploys auction houses as minimal proxies of a single `VickreyAuction` implementation.
+# @author johnnyonline
+# @license MIT
+
+interface VickreyAuction:
+    def initialize(
+        _nft: address,
+        _token: address,
+        _price_provider: address,
+        _time_buffer: uint256,
+        _reserve_price: uint256,
+        _min_bid_increment_percentage: uint256,
+        _duration: uint256,
+        _proceeds_receiver_split_percentage: uint256,
+        _proceeds_receiver: address,
+        _owner: address,
+    ): nonpayable
+
+event AuctionHouseCreated:
+    auction_house: indexed(address)
+    nft: indexed(address)
+    token: indexed(address)
+    price_provider: address
+    owner: address
+
+
+implementation: public(immutable(address))
+
+auction_houses: public(HashMap[uint256, address])
+auction_house_count: public(uint256)
+
+
+### INIT ###
+
+
+@external
+def __init__(_implementation: address):
+    assert _implementation.is_contract, "_implementation must be a contract"
+
+    implementation = _implementation
+
+
+### FACTORY ###
+
+
+@external
+def create_auction_house(
+    _nft: address,
+    _token: address,
+    _price_provider: address,
+    _time_buffer: uint256,
+    _reserve_price: uint256,
+    _min_bid_increment_percentage: uint256,
+    _duration: uint256,
+    _proceeds_receiver_split_percentage: uint256,
+    _proceeds_receiver: address,
+    _owner: address,
+) -> address:
+    """
+    @dev Deploy and initialize a new auction house owned by `_owner`.
+      The proxy is initialized in the same transaction, so `initialize` cannot be front-run.
+      `_owner` still has to make the auction house the minter of `_nft` before creating auctions.
+    """
+
+    _auction_house: address = create_minimal_proxy_to(implementation)
+
+    VickreyAuction(_auction_house).initialize(
+        _nft,
+        _token,
+        _price_provider,
+        _time_buffer,
+        _reserve_price,
+        _min_bid_increment_percentage,
+        _duration,
+        _proceeds_receiver_split_percentage,
+        _proceeds_receiver,
+        _owner,
+    )
+
+    _count: uint256 = self.auction_house_count
+    self.auction_houses[_count] = _auction_house
+    self.auction_house_count = _count + 1
+
+    log AuctionHouseCreated(_auction_house, _nft, _token, _price_provider, _owner)
+
+    return _auction_house
@@ -20,6 +20,11 @@ interface ERC721Receiver:
     ) -> bytes4: nonpayable
 
 
+# Interface for contract owners signing permits (ERC-1271)
+interface ERC1271:
+    def isValidSignature(_hash: bytes32, _signature: Bytes[65]) -> bytes4: view
+
+
 # @dev Emits when ownership of any NFT changes by any mechanism.
 #      This event emits when NFTs are created (`from` == 0) and destroyed (`to` == 0).
 #      Exception: during contract creation, any number of NFTs may be created and assigned without emitting.
@@ -65,6 +70,24 @@ IDENTITY_PRECOMPILE: constant(
 
 MAX_LENGTH: constant(uint256) = 1000000000
 
+# EIP-712 / ERC-4494
+EIP712_DOMAIN_TYPEHASH: constant(bytes32) = keccak256(
+    "EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"
+)
+PERMIT_TYPEHASH: constant(bytes32) = keccak256(
+    "Permit(address spender,uint256 tokenId,uint256 nonce,uint256 deadline)"
+)
+EIP712_NAME_HASH: constant(bytes32) = keccak256("Frok")
+EIP712_VERSION_HASH: constant(bytes32) = keccak256("1")
+ERC1271_MAGIC_VALUE: constant(bytes4) = 0x1626BA7E
+SECP256K1_HALF_N: constant(uint256) = 57896044618658097711785492504343953926418782139537452191302581570759080747168
+
+# `id_to_index` packs the token's index in `ids_by_owner` (low bits) with its permit nonce
+# (high bits), so bumping the nonce on transfer rewrites a slot the transfer writes anyway
+NONCE_OFFSET: constant(int128) = 128
+INDEX_MASK: constant(uint256) = 2**128 - 1
+NONCE_MASK: constant(uint256) = max_value(uint256) - INDEX_MASK
+
 # Metadata
 symbol: public(String[32])
 name: public(String[32])
@@ -90,12 +113,13 @@ operator_approvals: HashMap[
 ]  # @dev Owner address to mapping of operator addresses
 
 # @dev Static list of supported ERC165 interface ids
-SUPPORTED_INTERFACES: constant(bytes4[5]) = [
+SUPPORTED_INTERFACES: constant(bytes4[6]) = [
     0x01FFC9A7,  # ERC165
     0x80AC58CD,  # ERC721
     0x150B7A02,  # ERC721TokenReceiver
     0x780E9D63,  # ERC721Enumerable
     0x5B5E139F,  # ERC721Metadata
+    0x5604E225,  # ERC4494
 ]
 
 # Custom NFT
@@ -223,9 +247,9 @@ def _is_approved_or_owner(spender: address, token_id: uint256) -> bool:
 
 
 @internal
-def _add_token_to(_to: address, _token_id: uint256):
+def _add_token_to(_to: address, _token_id: uint256, _nonce: uint256):
     """
-    @dev Add a NFT to a given address
+    @dev Add a NFT to a given address, storing `_nonce` as its permit nonce
          Throws if `_token_id` is owned by someone.
     """
 
@@ -237,15 +261,16 @@ def _add_token_to(_to: address, _token_id: uint256):
 
     # Change count tracking
     num_ids: uint256 = len(self.ids_by_owner[_to])
-    self.id_to_index[_token_id] = num_ids
+    self.id_to_index[_token_id] = shift(_nonce, NONCE_OFFSET) | num_ids
     self.ids_by_owner[_to].append(_token_id)
 
 
 @internal
-def _remove_token_from(_from: address, _token_id: uint256):
+def _remove_token_from(_from: address, _token_id: uint256) -> uint256:
     """
     @dev Remove an NFT from a given address
          Throws if `_from` is not the current owner.
+    @return uint256 The permit nonce the token carries to its new owner
     """
 
     # Throws if `_from` is not the current owner
@@ -256,11 +281,11 @@ def _remove_token_from(_from: address, _token_id: uint256):
 
     # Update ids list for user
     end_index: uint256 = len(self.ids_by_owner[_from]) - 1
-    id_index: uint256 = self.id_to_index[_token_id]
+    packed: uint256 = self.id_to_index[_token_id]
+    id_index: uint256 = packed & INDEX_MASK
     if end_index == id_index:
         # Remove is simple since token is at end of ids list
         self.ids_by_owner[_from].pop()
-        self.id_to_index[_token_id] = 0
     else:
         # Token is not at end;
         # replace it with the end token and then..
@@ -268,8 +293,10 @@ def _remove_token_from(_from: address, _token_id: uint256):
         self.ids_by_owner[_from][id_index] = end_id
         # ... pop!
         self.ids_by_owner[_from].pop()
-        self.id_to_index[_token_id] = 0
-        self.id_to_index[end_id] = id_index
+        self.id_to_index[end_id] = (self.id_to_index[end_id] & NONCE_MASK) | id_index
+
+    # Every transfer invalidates outstanding permits; `_add_token_to` stores the new nonce
+    return shift(packed, -NONCE_OFFSET) + 1
 
 
 @internal
@@ -311,10 +338,10 @@ def _transfer_from(
     self._clear_approval(_from, _token_id)
 
     # Remove NFT. Throws if `_token_id` is not a valid NFT
-    self._remove_token_from(_from, _token_id)
+    nonce: uint256 = self._remove_token_from(_from, _token_id)
 
     # Add NFT
-    self._add_token_to(_to, _token_id)
+    self._add_token_to(_to, _token_id, nonce)
 
     # Log the transfer
     log Transfer(_from, _to, _token_id)
@@ -427,6 +454,92 @@ def setApprovalForAll(operator: address, approved: bool):
     log ApprovalForAll(msg.sender, operator, approved)
 
 
+### ERC-4494 PERMIT FUNCTIONS ###
+
+
+@internal
+@view
+def _domain_separator() -> bytes32:
+    return keccak256(
+        _abi_encode(EIP712_DOMAIN_TYPEHASH, EIP712_NAME_HASH, EIP712_VERSION_HASH, chain.id, self)
+    )
+
+
+@view
+@external
+def DOMAIN_SEPARATOR() -> bytes32:
+    """
+    @notice EIP-712 domain separator permits are signed under.
+    """
+
+    return self._domain_separator()
+
+
+@view
+@external
+def nonces(tokenId: uint256) -> uint256:
+    """
+    @notice Nonce of the next permit for an NFT.
+    @dev Incremented on every transfer and every permit used, which invalidates outstanding
+         signatures. Throws if `tokenId` is not a valid NFT.
+    @param tokenId ID of the token.
+    @return uint256 The nonce to sign.
+    """
+
+    assert self.owned_tokens[tokenId] != empty(address)
+    return shift(self.id_to_index[tokenId], -NONCE_OFFSET)
+
+
+@external
+def permit(spender: address, tokenId: uint256, deadline: uint256, sig: Bytes[65]):
+    """
+    @notice Approve `spender` for an NFT with a signature of its owner instead of an `approve` transaction.
+    @dev Sets the same approval as `approve`, so it is cleared by the next transfer.
+         The owner signs the EIP-712 message `Permit(spender, tokenId, nonce, deadline)` as a 65 byte
+         `r || s || v` signature; contract owners are asked through ERC-1271 `isValidSignature`.
+         Throws if `deadline` has passed, if `spender` is the current owner or if the signature is invalid.
+    @param spender Address to be approved for the given NFT ID.
+    @param tokenId ID of the token to be approved.
+    @param deadline Last timestamp the permit can be used at.
+    @param sig Signature of the owner.
+    """
+
+    assert deadline >= block.timestamp, "Permit expired"
+
+    owner: address = self.owned_tokens[tokenId]
+    # Throws if `tokenId` is not a valid NFT
+    assert owner != empty(address)
+    assert spender != owner  # dev: "ERC721: approval to current owner"
+
+    packed: uint256 = self.id_to_index[tokenId]
+    digest: bytes32 = keccak256(
+        concat(
+            b"\x19\x01",
+            self._domain_separator(),
+            keccak256(
+                _abi_encode(PERMIT_TYPEHASH, spender, tokenId, shift(packed, -NONCE_OFFSET), deadline)
+            ),
+        )
+    )
+
+    if owner.is_contract:
+        assert ERC1271(owner).isValidSignature(digest, sig) == ERC1271_MAGIC_VALUE, "Invalid signature"
+    else:
+        assert len(sig) == 65, "Invalid signature"
+        r: uint256 = convert(slice(sig, 0, 32), uint256)
+        s: uint256 = convert(slice(sig, 32, 32), uint256)
+        v: uint256 = convert(slice(sig, 64, 1), uint256)
+        # Only the lower `s` of each signature pair is accepted
+        assert s <= SECP256K1_HALF_N, "Invalid signature"
+        assert ecrecover(digest, v, r, s) == owner, "Invalid signature"
+
+    # A permit can be used once, also after the owner revoked the approval it set
+    self.id_to_index[tokenId] = packed + shift(1, NONCE_OFFSET)
+    self.token_approvals[tokenId] = spender
+
+    log Approval(owner, spender, tokenId)
+
+
 ### MINT FUNCTIONS ###
 
 
@@ -440,7 +553,7 @@ def mint() -> uint256:
     assert msg.sender == self.minter, "Caller is not the minter"
 
     token_id: uint256 = self.token_count
-    self._add_token_to(msg.sender, token_id)
+    self._add_token_to(msg.sender, token_id, 0)
     self.token_count += 1
 
     log Transfer(empty(address), msg.sender, token_id)
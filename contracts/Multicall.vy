@@ -0,0 +1,53 @@
+# @version 0.3.7
+
+# @notice Read-only call aggregator, ABI compatible with Multicall3's `aggregate3`.
+# @dev Deployed on local chains by scripts/reconcile.py. Live networks can use the canonical Multicall3 instead.
+# @author johnnyonline
+# @license MIT
+
+MAX_CALLS: constant(uint256) = 1024
+MAX_CALLDATA: constant(uint256) = 68
+MAX_RETURNDATA: constant(uint256) = 224
+
+struct Call3:
+    target: address
+    allow_failure: bool
+    call_data: Bytes[MAX_CALLDATA]
+
+struct Result:
+    success: bool
+    return_data: Bytes[MAX_RETURNDATA]
+
+
+### VIEW FUNCTIONS ###
+
+
+@external
+@view
+def aggregate3(_calls: DynArray[Call3, MAX_CALLS]) -> DynArray[Result, MAX_CALLS]:
+    """
+    @notice Static call every target and return the raw results.
+    @dev Throws if a call fails and `allow_failure` is not set.
+    """
+
+    _results: DynArray[Result, MAX_CALLS] = []
+    for _call in _calls:
+        _success: bool = False
+        _return_data: Bytes[MAX_RETURNDATA] = b""
+        _success, _return_data = raw_call(
+            _call.target,
+            _call.call_data,
+            max_outsize=MAX_RETURNDATA,
+            is_static_call=True,
+            revert_on_failure=False,
+        )
+        assert _success or _call.allow_failure, "Multicall: call failed"
+        _results.append(Result({success: _success, return_data: _return_data}))
+
+    return _results
+
+
+@external
+@view
+def getBlockNumber() -> uint256:
+    return block.number
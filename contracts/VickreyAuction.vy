@@ -11,6 +11,7 @@ from vyper.interfaces import ERC20
 interface ERC721:
     def mint() -> uint256: nonpayable
     def safeTransferFrom(from_addr: address, to_addr: address, token_id: uint256): nonpayable
+    def transferFrom(from_addr: address, to_addr: address, token_id: uint256): nonpayable
 
 interface PriceProvider:
     def get_price(highest_bid: uint256, second_highest_bid: uint256) -> uint256: nonpayable
@@ -24,6 +25,15 @@ struct Auction:
         bidder: address
         settled: bool
 
+struct SignedBid:
+        bidder: address
+        nft_id: uint256
+        amount: uint256
+        deadline: uint256
+        v: uint256
+        r: uint256
+        s: uint256
+
 event AuctionBid:
     nft_id: indexed(uint256)
     sender: address
@@ -31,6 +41,12 @@ event AuctionBid:
     price: uint256
     extended: bool
 
+# `max_bid` of the leading bidder changed, 0 when a plain bid took the lead from a proxy bid
+event AuctionMaxBid:
+    nft_id: indexed(uint256)
+    bidder: address
+    max_bid: uint256
+
 event AuctionExtended:
     nft_id: indexed(uint256)
     end_time: uint256
@@ -50,6 +66,12 @@ event AuctionDurationUpdated:
 event PriceProviderUpdated:
     price_provider: address
 
+event ProceedsReceiverSplitPercentageUpdated:
+    proceeds_receiver_split_percentage: uint256
+
+event PushRefundsUpdated:
+    push_refunds: bool
+
 event OwnerUpdated:
     owner: address
 
@@ -61,18 +83,36 @@ event AuctionCreated:
     start_time: uint256
     end_time: uint256
 
+event AuctionBidRefunded:
+    nft_id: indexed(uint256)
+    bidder: indexed(address)
+    amount: uint256
+
 event AuctionSettled:
     nft_id: indexed(uint256)
     winner: address
     bid: uint256
     price: uint256
 
+event NFTClaimable:
+    nft_id: indexed(uint256)
+    owner: indexed(address)
+
+event NFTClaimed:
+    nft_id: indexed(uint256)
+    owner: indexed(address)
+    receiver: address
+
 event Withdraw:
     called_by: indexed(address)
     user: indexed(address)
     reciver: indexed(address)
     amount: uint256
 
+event SignedBidsCancelled:
+    bidder: indexed(address)
+    nonce: uint256
+
 
 # Technically vyper doesn't need this as it is automatic
 # in all recent vyper versions, but Etherscan verification
@@ -85,32 +125,67 @@ DURATION_UPPER_BOUND: constant(uint256) = 259200
 INCREMENT_PERCENTAGE_LOWER_BOUND: constant(uint256) = 2
 INCREMENT_PERCENTAGE_UPPER_BOUND: constant(uint256) = 15
 MAX_WITHDRAWALS: constant(uint256) = 100
+PACKED_BID_LENGTH: constant(uint256) = 16
+PACKED_ADDRESS_LENGTH: constant(uint256) = 20
+MAX_SIGNED_BIDS: constant(uint256) = 16
+PUSH_REFUND_GAS: constant(uint256) = 100000
+NFT_DELIVERY_GAS: constant(uint256) = 250000
 PRICISION: constant(uint256) = 100
 
+# EIP-712
+EIP712_DOMAIN_TYPEHASH: constant(bytes32) = keccak256(
+    "EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"
+)
+BID_TYPEHASH: constant(bytes32) = keccak256(
+    "Bid(address bidder,uint256 nft_id,uint256 amount,uint256 nonce,uint256 deadline)"
+)
+EIP712_NAME_HASH: constant(bytes32) = keccak256("VickreyAuction")
+EIP712_VERSION_HASH: constant(bytes32) = keccak256("1")
+SECP256K1_HALF_N: constant(uint256) = 57896044618658097711785492504343953926418782139537452191302581570759080747168
+
+# Bit offsets and masks of the fields packed into `config`
+RESERVE_PRICE_OFFSET: constant(int128) = 0
+TIME_BUFFER_OFFSET: constant(int128) = 96
+DURATION_OFFSET: constant(int128) = 128
+MIN_BID_INCREMENT_PERCENTAGE_OFFSET: constant(int128) = 160
+PROCEEDS_RECEIVER_SPLIT_PERCENTAGE_OFFSET: constant(int128) = 168
+PAUSED_OFFSET: constant(int128) = 176
+EMERGENCY_PAUSED_OFFSET: constant(int128) = 177
+PUSH_REFUNDS_OFFSET: constant(int128) = 178
+MASK_96: constant(uint256) = 2**96 - 1
+MASK_32: constant(uint256) = 2**32 - 1
+MASK_8: constant(uint256) = 2**8 - 1
+MASK_1: constant(uint256) = 1
+
 # Auction
-time_buffer: public(uint256)
-reserve_price: public(uint256)
-min_bid_increment_percentage: public(uint256)
-duration: public(uint256)
+# reserve_price (96 bits) | time_buffer (32) | duration (32) | min_bid_increment_percentage (8) |
+# proceeds_receiver_split_percentage (8) | paused | emergency_paused | push_refunds,
+# so bidding and settlement read their config from a single slot
+config: public(uint256)
 
 price_provider: public(PriceProvider)
 auction: public(Auction)
 
-nft: public(immutable(ERC721))
-token: public(immutable(ERC20))
+# Token escrowed by the leading bidder of a proxy bid (`set_max_bid`), 0 when it placed a plain bid
+max_bid: public(uint256)
+
+# In storage rather than immutable, so minimal proxies of this contract can set them in `initialize`
+nft: public(ERC721)
+token: public(ERC20)
 
 pending_returns: public(HashMap[address, uint256])
 
+# NFTs whose delivery failed at settlement, nft_id -> address that can claim it
+claimable_nfts: public(HashMap[uint256, address])
+
 # Permissions
 owner: public(address)
 
-# Pause
-paused: public(bool)
-emergency_paused: public(bool)
-
 # Proceeds
 proceeds_receiver: public(address)
-proceeds_receiver_split_percentage: public(uint256)
+
+# Nonce signed into every EIP-712 bid, used up by `submit_bids` and `cancel_signed_bids`
+bid_nonces: public(HashMap[address, uint256])
 
 
 ### INIT ###
@@ -128,31 +203,60 @@ def __init__(
     _proceeds_receiver_split_percentage: uint256,
     _proceeds_receiver: address,
 ):
-    assert _time_buffer > 0, "_time_buffer must be greater than 0"
-    assert _reserve_price > 0, "_reserve_price must be greater than 0"
-    assert (
-        _min_bid_increment_percentage >= INCREMENT_PERCENTAGE_LOWER_BOUND and
-        _min_bid_increment_percentage <= INCREMENT_PERCENTAGE_UPPER_BOUND
-    ), "_min_bid_increment_percentage out of range"
-    assert _duration >= DURATION_LOWER_BOUND and _duration <= DURATION_UPPER_BOUND, "_duration out of range"
-    assert (
-        _proceeds_receiver_split_percentage > 0 and _proceeds_receiver_split_percentage < PRICISION
-    ), "_proceeds_receiver_split_percentage out of range"
-    assert _proceeds_receiver != empty(address), "_proceeds_receiver cannot be empty"
-
-    nft = _nft
-    token = _token
+    self._initialize(
+        _nft,
+        _token,
+        _price_provider,
+        # Packed here: Vyper 0.3.7 cannot compile internal calls nested inside a constructor's internal call
+        self._pack_config(
+            0,
+            _time_buffer,
+            _reserve_price,
+            _min_bid_increment_percentage,
+            _duration,
+            _proceeds_receiver_split_percentage,
+        ),
+        _proceeds_receiver,
+        msg.sender,
+    )
 
-    self.price_provider = _price_provider
 
-    self.time_buffer = _time_buffer
-    self.reserve_price = _reserve_price
-    self.min_bid_increment_percentage = _min_bid_increment_percentage
-    self.duration = _duration
-    self.proceeds_receiver_split_percentage = _proceeds_receiver_split_percentage
-    self.proceeds_receiver = _proceeds_receiver
+@external
+def initialize(
+    _nft: ERC721,
+    _token: ERC20,
+    _price_provider: PriceProvider,
+    _time_buffer: uint256,
+    _reserve_price: uint256,
+    _min_bid_increment_percentage: uint256,
+    _duration: uint256,
+    _proceeds_receiver_split_percentage: uint256,
+    _proceeds_receiver: address,
+    _owner: address,
+):
+    """
+    @dev Initialize an auction house deployed as a minimal proxy, see `AuctionHouseFactory`.
+      Same validation as `__init__`. Throws if already initialized, which includes the
+      implementation contract itself.
+    """
 
-    self.owner = msg.sender
+    assert self.owner == empty(address), "Already initialized"
+    assert _owner != empty(address), "Cannot set owner to zero address"
+    self._initialize(
+        _nft,
+        _token,
+        _price_provider,
+        self._pack_config(
+            0,
+            _time_buffer,
+            _reserve_price,
+            _min_bid_increment_percentage,
+            _duration,
+            _proceeds_receiver_split_percentage,
+        ),
+        _proceeds_receiver,
+        _owner,
+    )
 
 
 ### AUCTION CREATION/SETTLEMENT ###
@@ -168,7 +272,7 @@ def create_auction():
     """
 
     assert msg.sender == self.owner, "Caller is not the owner"
-    assert not self.paused, "Auction is paused"
+    assert not self._flag(self.config, PAUSED_OFFSET), "Auction is paused"
 
     self._create_auction()
 
@@ -181,9 +285,42 @@ def settle_auction():
       Throws if the auction is not paused.
     """
 
-    assert self.paused, "Auction is not paused"
+    assert self._flag(self.config, PAUSED_OFFSET), "Auction is not paused"
+
+    self._settle_auction()
+
+
+@external
+@nonreentrant("lock")
+def settle_current_and_create_new_auction():
+    """
+    @dev Settle the current auction and start a new one.
+      NFT delivery cannot make this revert, see `claim_nft`.
+      Only Admin can call this function.
+    """
+
+    assert msg.sender == self.owner, "Caller is not the owner"
+    assert self._flag(self.config, PAUSED_OFFSET), "Auction is not paused"
 
     self._settle_auction()
+    self._create_auction()
+
+
+@external
+@nonreentrant("lock")
+def claim_nft(_id: uint256, _to: address = msg.sender):
+    """
+    @dev Claim an NFT that could not be delivered at settlement.
+      Uses `transferFrom`, so `_to` does not need to implement `onERC721Received`.
+    """
+
+    assert self.claimable_nfts[_id] == msg.sender, "Caller cannot claim this NFT"
+
+    self.claimable_nfts[_id] = empty(address)
+
+    log NFTClaimed(_id, msg.sender, _to)
+
+    self.nft.transferFrom(self, _to, _id)
 
 
 ### BIDDING ###
@@ -196,7 +333,71 @@ def create_bid(_id: uint256, _bid: uint256):
     @dev Create a bid.
     """
 
-    self._create_bid(_id, _bid)
+    self._create_bid(msg.sender, _id, _bid, False, 0)
+
+
+@external
+@nonreentrant("lock")
+def set_max_bid(_id: uint256, _max_bid: uint256):
+    """
+    @dev Proxy bid: escrow `_max_bid` once and lead with the lowest bid that beats the current one.
+      While leading, every challenge up to the max bid raises the standing bid to the challenge plus
+      min_bid_increment_percentage, capped at the max bid, so the bidder needs no further transactions.
+      The leading bidder can raise its max bid, only the difference is escrowed. Prices still come
+      from `price_provider`.
+    """
+
+    assert _max_bid > 0, "Max bid cannot be zero"
+
+    self._create_bid(msg.sender, _id, _max_bid, True, 0)
+
+
+@external
+@nonreentrant("lock")
+def submit_bids(_bids: DynArray[SignedBid, MAX_SIGNED_BIDS]):
+    """
+    @dev Place EIP-712 signed bids on behalf of their signers, in the given order.
+      Each bid follows the same rules as `create_bid` and pulls Token from its signer.
+      A relayer only needs to submit the second highest and the highest bid, see `scripts/relayer.py`.
+    """
+
+    for _signed_bid in _bids:
+        self._use_signed_bid(_signed_bid)
+        self._create_bid(_signed_bid.bidder, _signed_bid.nft_id, _signed_bid.amount, False, 0)
+
+
+@external
+@nonreentrant("lock")
+def submit_top_bid(_bid: SignedBid, _runner_up: SignedBid):
+    """
+    @dev Place the signed `_bid` priced against the signed `_runner_up` without placing the runner-up,
+      for a top bid that ties or beats the runner-up by less than min_bid_increment_percentage,
+      which `submit_bids` would reject. The runner-up's signature is used up and it must meet the
+      reserve price and hold and have approved its amount, so its bid could have been placed.
+    """
+
+    self._use_signed_bid(_runner_up)
+    assert _runner_up.nft_id == _bid.nft_id, "NFT not up for auction"
+    assert _runner_up.amount >= self._field(self.config, RESERVE_PRICE_OFFSET, MASK_96), "Must send at least reservePrice"
+    assert _runner_up.bidder != _bid.bidder, "Runner-up must be another bidder"
+    assert _runner_up.amount <= _bid.amount, "Runner-up cannot be above the bid"
+    assert self.token.balanceOf(_runner_up.bidder) >= _runner_up.amount, "Runner-up cannot pay its bid"
+    assert self.token.allowance(_runner_up.bidder, self) >= _runner_up.amount, "Runner-up cannot pay its bid"
+
+    self._use_signed_bid(_bid)
+    self._create_bid(_bid.bidder, _bid.nft_id, _bid.amount, False, _runner_up.amount)
+
+
+@external
+def cancel_signed_bids():
+    """
+    @dev Invalidate every EIP-712 bid the caller signed that has not been submitted yet.
+    """
+
+    _nonce: uint256 = self.bid_nonces[msg.sender] + 1
+    self.bid_nonces[msg.sender] = _nonce
+
+    log SignedBidsCancelled(msg.sender, _nonce)
 
 
 ### WITHDRAW ###
@@ -223,9 +424,131 @@ def withdraw_multiple(_fors: DynArray[address, MAX_WITHDRAWALS]):
         self._withdraw(_for)
 
 
+### PACKED CALLDATA ###
+
+
+@external
+@nonreentrant("lock")
+def __default__():
+    """
+    @dev Packed calldata entry point for rollups, where calldata dominates fees.
+      16 bytes: `create_bid` with a 4-byte nft id followed by a 12-byte bid.
+      20 * n bytes: `withdraw_multiple` with the addresses packed back to back.
+      Calldata whose first 4 bytes match a function selector is dispatched to that function
+      instead, see `scripts/calldata.py`.
+    """
+
+    if len(msg.data) == PACKED_BID_LENGTH:
+        self._create_bid(
+            msg.sender, convert(slice(msg.data, 0, 4), uint256), convert(slice(msg.data, 4, 12), uint256), False, 0
+        )
+        return
+
+    assert (
+        len(msg.data) > 0 and
+        len(msg.data) <= PACKED_ADDRESS_LENGTH * MAX_WITHDRAWALS and
+        len(msg.data) % PACKED_ADDRESS_LENGTH == 0
+    ), "Invalid packed calldata"
+
+    for i in range(MAX_WITHDRAWALS):
+        if i * PACKED_ADDRESS_LENGTH == len(msg.data):
+            break
+        self._withdraw(convert(convert(slice(msg.data, i * PACKED_ADDRESS_LENGTH, 20), bytes20), address))
+
+
+### VIEW FUNCTIONS ###
+
+
+@external
+@view
+def time_buffer() -> uint256:
+    return self._field(self.config, TIME_BUFFER_OFFSET, MASK_32)
+
+
+@external
+@view
+def reserve_price() -> uint256:
+    return self._field(self.config, RESERVE_PRICE_OFFSET, MASK_96)
+
+
+@external
+@view
+def min_bid_increment_percentage() -> uint256:
+    return self._field(self.config, MIN_BID_INCREMENT_PERCENTAGE_OFFSET, MASK_8)
+
+
+@external
+@view
+def duration() -> uint256:
+    return self._field(self.config, DURATION_OFFSET, MASK_32)
+
+
+@external
+@view
+def proceeds_receiver_split_percentage() -> uint256:
+    return self._field(self.config, PROCEEDS_RECEIVER_SPLIT_PERCENTAGE_OFFSET, MASK_8)
+
+
+@external
+@view
+def paused() -> bool:
+    return self._flag(self.config, PAUSED_OFFSET)
+
+
+@external
+@view
+def emergency_paused() -> bool:
+    return self._flag(self.config, EMERGENCY_PAUSED_OFFSET)
+
+
+@external
+@view
+def push_refunds() -> bool:
+    return self._flag(self.config, PUSH_REFUNDS_OFFSET)
+
+
+@external
+@view
+def DOMAIN_SEPARATOR() -> bytes32:
+    return self._domain_separator()
+
+
 ### ADMIN FUNCTIONS ###
 
 
+@external
+def set_config(
+    _time_buffer: uint256,
+    _reserve_price: uint256,
+    _min_bid_increment_percentage: uint256,
+    _duration: uint256,
+    _proceeds_receiver_split_percentage: uint256,
+    _push_refunds: bool,
+):
+    """
+    @notice Admin function to set all auction parameters in a single storage write.
+    """
+
+    assert msg.sender == self.owner, "Caller is not the owner"
+
+    _config: uint256 = self._pack_config(
+        self.config,
+        _time_buffer,
+        _reserve_price,
+        _min_bid_increment_percentage,
+        _duration,
+        _proceeds_receiver_split_percentage,
+    )
+    self.config = self._set_field(_config, PUSH_REFUNDS_OFFSET, MASK_1, convert(_push_refunds, uint256))
+
+    log AuctionTimeBufferUpdated(_time_buffer)
+    log AuctionReservePriceUpdated(_reserve_price)
+    log AuctionMinBidIncrementPercentageUpdated(_min_bid_increment_percentage)
+    log AuctionDurationUpdated(_duration)
+    log ProceedsReceiverSplitPercentageUpdated(_proceeds_receiver_split_percentage)
+    log PushRefundsUpdated(_push_refunds)
+
+
 @external
 def set_time_buffer(_time_buffer: uint256):
     """
@@ -233,8 +556,10 @@ def set_time_buffer(_time_buffer: uint256):
     """
 
     assert msg.sender == self.owner, "Caller is not the owner"
+    assert _time_buffer > 0, "_time_buffer must be greater than 0"
+    assert _time_buffer <= DURATION_UPPER_BOUND, "_time_buffer out of range"
 
-    self.time_buffer = _time_buffer
+    self.config = self._set_field(self.config, TIME_BUFFER_OFFSET, MASK_32, _time_buffer)
 
     log AuctionTimeBufferUpdated(_time_buffer)
 
@@ -246,8 +571,10 @@ def set_reserve_price(_reserve_price: uint256):
     """
 
     assert msg.sender == self.owner, "Caller is not the owner"
+    assert _reserve_price > 0, "_reserve_price must be greater than 0"
+    assert _reserve_price <= MASK_96, "_reserve_price out of range"
 
-    self.reserve_price = _reserve_price
+    self.config = self._set_field(self.config, RESERVE_PRICE_OFFSET, MASK_96, _reserve_price)
 
     log AuctionReservePriceUpdated(_reserve_price)
 
@@ -264,7 +591,9 @@ def set_min_bid_increment_percentage(_min_bid_increment_percentage: uint256):
         _min_bid_increment_percentage <= INCREMENT_PERCENTAGE_UPPER_BOUND
     ), "_min_bid_increment_percentage out of range"
 
-    self.min_bid_increment_percentage = _min_bid_increment_percentage
+    self.config = self._set_field(
+        self.config, MIN_BID_INCREMENT_PERCENTAGE_OFFSET, MASK_8, _min_bid_increment_percentage
+    )
 
     log AuctionMinBidIncrementPercentageUpdated(_min_bid_increment_percentage)
 
@@ -278,7 +607,7 @@ def set_duration(_duration: uint256):
     assert msg.sender == self.owner, "Caller is not the owner"
     assert _duration >= DURATION_LOWER_BOUND and _duration <= DURATION_UPPER_BOUND, "_duration out of range"
 
-    self.duration = _duration
+    self.config = self._set_field(self.config, DURATION_OFFSET, MASK_32, _duration)
 
     log AuctionDurationUpdated(_duration)
 
@@ -297,6 +626,19 @@ def set_price_provider(_price_provider: address):
     log PriceProviderUpdated(_price_provider)
 
 
+@external
+def set_push_refunds(_push_refunds: bool):
+    """
+    @notice Admin function to refund outbid bidders directly instead of crediting `pending_returns`.
+    """
+
+    assert msg.sender == self.owner, "Caller is not the owner"
+
+    self.config = self._set_field(self.config, PUSH_REFUNDS_OFFSET, MASK_1, convert(_push_refunds, uint256))
+
+    log PushRefundsUpdated(_push_refunds)
+
+
 @external
 def set_owner(_owner: address):
     """
@@ -319,10 +661,10 @@ def emergency_pause():
 
     assert msg.sender == self.owner, "Caller is not the owner"
 
-    self.emergency_paused = True
+    self.config = self._set_field(self.config, EMERGENCY_PAUSED_OFFSET, MASK_1, 1)
 
     if not self.auction.settled and self.auction.bid > 0:
-        self.pending_returns[self.auction.bidder] = self.auction.bid
+        self.pending_returns[self.auction.bidder] = max(self.max_bid, self.auction.bid)
 
     log EmergencyPaused(msg.sender)
 
@@ -330,15 +672,38 @@ def emergency_pause():
 ### INTERNAL FUNCTIONS ###
 
 
+@internal
+def _initialize(
+    _nft: ERC721,
+    _token: ERC20,
+    _price_provider: PriceProvider,
+    _config: uint256,
+    _proceeds_receiver: address,
+    _owner: address,
+):
+    assert _proceeds_receiver != empty(address), "_proceeds_receiver cannot be empty"
+
+    self.nft = _nft
+    self.token = _token
+
+    self.price_provider = _price_provider
+
+    self.config = _config
+    self.proceeds_receiver = _proceeds_receiver
+
+    self.owner = _owner
+
+
 @internal
 def _create_auction():
-    assert not self.emergency_paused, "Contract has been emergency paused"
+    _config: uint256 = self.config
+    assert not self._flag(_config, EMERGENCY_PAUSED_OFFSET), "Contract has been emergency paused"
 
-    self.paused = True
+    self.config = self._set_field(_config, PAUSED_OFFSET, MASK_1, 1)
 
-    _id: uint256 = nft.mint()
+    _id: uint256 = self.nft.mint()
     _start_time: uint256 = block.timestamp
-    _end_time: uint256 = _start_time + self.duration
+    _end_time: uint256 = _start_time + self._field(_config, DURATION_OFFSET, MASK_32)
 
     self.auction = Auction(
         {
@@ -357,7 +722,8 @@ def _create_auction():
 
 @internal
 def _settle_auction():
-    assert not self.emergency_paused, "Contract has been emergency paused"
+    _config: uint256 = self.config
+    assert not self._flag(_config, EMERGENCY_PAUSED_OFFSET), "Contract has been emergency paused"
     assert self.auction.start_time != 0, "Auction hasn't begun"
     assert not self.auction.settled, "Auction has already been settled"
     assert block.timestamp > self.auction.end_time, "Auction hasn't completed"
@@ -365,60 +731,227 @@ def _settle_auction():
     if block.timestamp < self.auction.end_time + AUCTION_SETTLEMENT_ONLY_OWNER_BUFFER:
         assert msg.sender == self.owner, "Only owner can settle the auction within 2 hours after it ends"
 
-    self.paused = False
+    self.config = self._set_field(_config, PAUSED_OFFSET, MASK_1, 0)
     self.auction.settled = True
 
     log AuctionSettled(self.auction.nft_id, self.auction.bidder, self.auction.bid, self.auction.price)
 
     if self.auction.bidder == empty(address):
-        nft.safeTransferFrom(self, self.owner, self.auction.nft_id)
+        self._deliver_nft(self.owner, self.auction.nft_id)
     else:
-        nft.safeTransferFrom(self, self.auction.bidder, self.auction.nft_id)
-        _refund_amount: uint256 = self.auction.bid - self.auction.price
+        self._deliver_nft(self.auction.bidder, self.auction.nft_id)
+        _max_bid: uint256 = self.max_bid
+        if _max_bid != 0:
+            self.max_bid = 0
+        _refund_amount: uint256 = max(_max_bid, self.auction.bid) - self.auction.price
         if _refund_amount > 0:
             self.pending_returns[self.auction.bidder] += _refund_amount
 
     if self.auction.price > 0:
-        _fee: uint256 = (self.auction.price * self.proceeds_receiver_split_percentage) / PRICISION
+        _fee: uint256 = (
+            self.auction.price * self._field(_config, PROCEEDS_RECEIVER_SPLIT_PERCENTAGE_OFFSET, MASK_8)
+        ) / PRICISION
         _owner_amount: uint256 = self.auction.price - _fee
-        token.transfer(self.owner, _owner_amount, default_return_value=True)
-        token.transfer(self.proceeds_receiver, _fee, default_return_value=True)
+        _token: ERC20 = self.token
+        _token.transfer(self.owner, _owner_amount, default_return_value=True)
+        _token.transfer(self.proceeds_receiver, _fee, default_return_value=True)
 
 
 @internal
-def _create_bid(_id: uint256, _bid: uint256):
-    assert not self.emergency_paused, "Contract has been emergency paused"
+def _deliver_nft(_to: address, _id: uint256):
+    """
+    @dev Try `safeTransferFrom` with a bounded amount of gas, so a receiver that reverts or burns gas
+      cannot block settlement. On failure the NFT stays here and `_to` can claim it.
+    """
+
+    # Without enough gas left the call below could fail for an honest receiver
+    assert msg.gas > NFT_DELIVERY_GAS * 64 / 63, "Not enough gas to deliver NFT"
+
+    # With `revert_on_failure=False` a failed call returns `False` instead of reverting, the return data is
+    # read into `_response` like in `_try_transfer` and ignored since `safeTransferFrom` returns nothing
+    _success: bool = False
+    _response: Bytes[32] = b""
+    _success, _response = raw_call(
+        self.nft.address,
+        _abi_encode(self, _to, _id, method_id=method_id("safeTransferFrom(address,address,uint256)")),
+        max_outsize=32,
+        gas=NFT_DELIVERY_GAS,
+        revert_on_failure=False,
+    )
+    if not _success:
+        self.claimable_nfts[_id] = _to
+        log NFTClaimable(_id, _to)
+
+
+@internal
+def _create_bid(_bidder: address, _id: uint256, _bid: uint256, _proxy: bool, _runner_up: uint256):
+    """
+    @dev Place `_bid`, or for a proxy bid the lowest bid that leads with up to `_bid` escrowed.
+      A challenge the leading max bid covers raises the leading bid instead of replacing it.
+      `_runner_up` is a verified bid up to `_bid` that was not placed, the price is at least based on it.
+    """
+
+    _config: uint256 = self.config
+    assert not self._flag(_config, EMERGENCY_PAUSED_OFFSET), "Contract has been emergency paused"
     assert self.auction.nft_id == _id, "NFT not up for auction"
     assert block.timestamp < self.auction.end_time, "Auction expired"
-    assert _bid >= self.reserve_price, "Must send at least reservePrice"
+
+    _last_bidder: address = self.auction.bidder
+    _last_bid: uint256 = self.auction.bid
+    _last_max_bid: uint256 = self.max_bid
+    _last_escrow: uint256 = max(_last_max_bid, _last_bid)
+
+    if _proxy and _bidder == _last_bidder:
+        # The leading bidder raises its max bid, its bid stays
+        assert _bid > _last_escrow, "Max bid must be above the current one"
+        self.max_bid = _bid
+        log AuctionMaxBid(_id, _bidder, _bid)
+        self.token.transferFrom(_bidder, self, _bid - _last_escrow, default_return_value=True)
+        return
+
+    _reserve_price: uint256 = self._field(_config, RESERVE_PRICE_OFFSET, MASK_96)
+    assert _bid >= _reserve_price, "Must send at least reservePrice"
 
     _price: uint256 = _bid
-    if self.auction.bid > 0:
-        assert _bid >= self.auction.bid + (
-            (self.auction.bid * self.min_bid_increment_percentage) / PRICISION
+    _standing_bid: uint256 = _bid
+    if _last_bid > 0:
+        _percentage: uint256 = self._field(_config, MIN_BID_INCREMENT_PERCENTAGE_OFFSET, MASK_8)
+        assert _bid >= _last_bid + (
+            (_last_bid * _percentage) / PRICISION
         ), "Must send more than last bid by min_bid_increment_percentage amount"
 
-        _price = self.price_provider.get_price(_bid, self.auction.bid)
-        assert _bid >= _price, "Bid must be greater than or equal to price"
-
-    _last_bidder: address = self.auction.bidder
+        if _last_max_bid >= _bid and _bidder != _last_bidder:
+            # Covered by the leading max bid, which wins ties: the challenge is placed and outbid at
+            # once, so the challenger escrows its bid and is refunded like any outbid bidder
+            _raised_bid: uint256 = min(_bid + (_bid * _percentage) / PRICISION, _last_max_bid)
+            _price = self.price_provider.get_price(_raised_bid, _bid)
+            log AuctionBid(_id, _bidder, _bid, _price, False)
+            self._record_bid(_last_bidder, _raised_bid, _price, _config)
+            self.token.transferFrom(_bidder, self, _bid, default_return_value=True)
+            self._refund(_bidder, _bid, _config)
+            return
+
+        if _proxy:
+            _standing_bid = min(_bid, _last_escrow + (_last_escrow * _percentage) / PRICISION)
+        # The outbid bidder was willing to pay up to its escrow
+        _price = self.price_provider.get_price(_standing_bid, max(min(_last_escrow, _standing_bid), _runner_up))
+        assert _standing_bid >= _price, "Bid must be greater than or equal to price"
+    elif _proxy:
+        _standing_bid = _reserve_price
+        _price = _standing_bid
+    elif _runner_up != 0:
+        _price = self.price_provider.get_price(_bid, _runner_up)
+
+    if _proxy:
+        self.max_bid = _bid
+        log AuctionMaxBid(_id, _bidder, _bid)
+    elif _last_max_bid != 0:
+        self.max_bid = 0
+        log AuctionMaxBid(_id, _bidder, 0)
+
+    self._record_bid(_bidder, _standing_bid, _price, _config)
 
     if _last_bidder != empty(address):
-        self.pending_returns[_last_bidder] += self.auction.bid
+        self._refund(_last_bidder, _last_escrow, _config)
+
+    self.token.transferFrom(_bidder, self, _bid, default_return_value=True)
+
+
+@internal
+def _record_bid(_bidder: address, _bid: uint256, _price: uint256, _config: uint256):
+    """
+    @dev Make `_bid` the leading bid and extend the auction if it came within `time_buffer` of the end.
+    """
 
     self.auction.bid = _bid
     self.auction.price = _price
-    self.auction.bidder = msg.sender
+    self.auction.bidder = _bidder
 
-    _extended: bool = self.auction.end_time - block.timestamp < self.time_buffer
+    _time_buffer: uint256 = self._field(_config, TIME_BUFFER_OFFSET, MASK_32)
+    _extended: bool = self.auction.end_time - block.timestamp < _time_buffer
 
     if _extended:
-        self.auction.end_time = block.timestamp + self.time_buffer
+        self.auction.end_time = block.timestamp + _time_buffer
         log AuctionExtended(self.auction.nft_id, self.auction.end_time)
 
-    log AuctionBid(self.auction.nft_id, msg.sender, _bid, _price, _extended)
+    log AuctionBid(self.auction.nft_id, _bidder, _bid, _price, _extended)
+
+
+@internal
+@view
+def _domain_separator() -> bytes32:
+    # Computed on every call since minimal proxies share the implementation's code
+    return keccak256(
+        _abi_encode(EIP712_DOMAIN_TYPEHASH, EIP712_NAME_HASH, EIP712_VERSION_HASH, chain.id, self)
+    )
+
+
+@internal
+def _use_signed_bid(_signed_bid: SignedBid):
+    """
+    @dev Check the EIP-712 signature of `_signed_bid` against its signer's current nonce and use the nonce up.
+    """
+
+    assert _signed_bid.deadline >= block.timestamp, "Signed bid expired"
+    assert _signed_bid.bidder != empty(address), "Invalid signature"
+    # Only the low-s form of a signature is accepted, the other one would be a second valid signature
+    assert _signed_bid.s <= SECP256K1_HALF_N, "Invalid signature"
+
+    _nonce: uint256 = self.bid_nonces[_signed_bid.bidder]
+    _digest: bytes32 = keccak256(
+        concat(
+            b"\x19\x01",
+            self._domain_separator(),
+            keccak256(
+                _abi_encode(
+                    BID_TYPEHASH,
+                    _signed_bid.bidder,
+                    _signed_bid.nft_id,
+                    _signed_bid.amount,
+                    _nonce,
+                    _signed_bid.deadline,
+                )
+            ),
+        )
+    )
+    assert (
+        ecrecover(_digest, _signed_bid.v, _signed_bid.r, _signed_bid.s) == _signed_bid.bidder
+    ), "Invalid signature"
+
+    self.bid_nonces[_signed_bid.bidder] = _nonce + 1
+
+
+@internal
+def _refund(_to: address, _amount: uint256, _config: uint256):
+    """
+    @dev Return an outbid bidder's escrow, pushed if `push_refunds` is set and the transfer goes through.
+    """
+
+    if not self._flag(_config, PUSH_REFUNDS_OFFSET) or not self._try_transfer(_to, _amount):
+        self.pending_returns[_to] += _amount
+    else:
+        log AuctionBidRefunded(self.auction.nft_id, _to, _amount)
+
+
+@internal
+def _try_transfer(_to: address, _amount: uint256) -> bool:
+    """
+    @dev Transfer Token without reverting, so a receiver the token refuses cannot block bidding.
+    """
+
+    _success: bool = False
+    _response: Bytes[32] = b""
+    _success, _response = raw_call(
+        self.token.address,
+        _abi_encode(_to, _amount, method_id=method_id("transfer(address,uint256)")),
+        max_outsize=32,
+        gas=PUSH_REFUND_GAS,
+        revert_on_failure=False,
+    )
+    if _success and len(_response) > 0:
+        _success = convert(_response, bool)
 
-    token.transferFrom(msg.sender, self, _bid, default_return_value=True)
+    return _success
 
 
 @internal
@@ -428,8 +961,64 @@ def _withdraw(_for: address):
         self.pending_returns[_for] = 0
 
         _receiver: address = _for
-        if self.emergency_paused: _receiver = self.owner
+        if self._flag(self.config, EMERGENCY_PAUSED_OFFSET): _receiver = self.owner
 
         log Withdraw(msg.sender, _for, _receiver, _pending_amount)
 
-        token.transfer(_receiver, _pending_amount, default_return_value=True)
\ No newline at end of file
+        self.token.transfer(_receiver, _pending_amount, default_return_value=True)
+
+
+@internal
+@pure
+def _pack_config(
+    _config: uint256,
+    _time_buffer: uint256,
+    _reserve_price: uint256,
+    _min_bid_increment_percentage: uint256,
+    _duration: uint256,
+    _proceeds_receiver_split_percentage: uint256,
+) -> uint256:
+    """
+    @dev Validate the auction parameters and write them into `_config`, keeping its flags.
+    """
+
+    assert _time_buffer > 0, "_time_buffer must be greater than 0"
+    assert _time_buffer <= DURATION_UPPER_BOUND, "_time_buffer out of range"
+    assert _reserve_price > 0, "_reserve_price must be greater than 0"
+    assert _reserve_price <= MASK_96, "_reserve_price out of range"
+    assert (
+        _min_bid_increment_percentage >= INCREMENT_PERCENTAGE_LOWER_BOUND and
+        _min_bid_increment_percentage <= INCREMENT_PERCENTAGE_UPPER_BOUND
+    ), "_min_bid_increment_percentage out of range"
+    assert _duration >= DURATION_LOWER_BOUND and _duration <= DURATION_UPPER_BOUND, "_duration out of range"
+    assert (
+        _proceeds_receiver_split_percentage > 0 and _proceeds_receiver_split_percentage < PRICISION
+    ), "_proceeds_receiver_split_percentage out of range"
+
+    # Clear every field below the flags, then write the new values
+    return (
+        shift(shift(_config, -PAUSED_OFFSET), PAUSED_OFFSET)
+        | shift(_reserve_price, RESERVE_PRICE_OFFSET)
+        | shift(_time_buffer, TIME_BUFFER_OFFSET)
+        | shift(_duration, DURATION_OFFSET)
+        | shift(_min_bid_increment_percentage, MIN_BID_INCREMENT_PERCENTAGE_OFFSET)
+        | shift(_proceeds_receiver_split_percentage, PROCEEDS_RECEIVER_SPLIT_PERCENTAGE_OFFSET)
+    )
+
+
+@internal
+@pure
+def _field(_config: uint256, _offset: int128, _mask: uint256) -> uint256:
+    return shift(_config, -_offset) & _mask
+
+
+@internal
+@pure
+def _flag(_config: uint256, _offset: int128) -> bool:
+    return shift(_config, -_offset) & MASK_1 == 1
+
+
+@internal
+@pure
+def _set_field(_config: uint256, _offset: int128, _mask: uint256, _value: uint256) -> uint256:
+    return (_config & ~shift(_mask, _offset)) | shift(_value, _offset)
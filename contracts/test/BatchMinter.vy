@@ -0,0 +1,20 @@
+# @version 0.3.7
+
+# @notice Mints `Frok` tokens in batches and hands them to a holder, to grow large balances on a local chain.
+# @dev Must be the minter of `_nft`.
+
+interface Frok:
+    def mint() -> uint256: nonpayable
+    def transferFrom(from_addr: address, to_addr: address, token_id: uint256): nonpayable
+
+MAX_BATCH: constant(uint256) = 500
+
+
+@external
+def mint_to(_nft: Frok, _to: address, _count: uint256):
+    assert _count <= MAX_BATCH, "Batch too large"
+
+    for i in range(MAX_BATCH):
+        if i == _count:
+            break
+        _nft.transferFrom(self, _to, _nft.mint())
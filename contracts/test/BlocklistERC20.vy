@@ -0,0 +1,70 @@
+# @version 0.3.7
+
+# @notice ERC20 that refuses transfers to blocked receivers, like tokens with a blacklist.
+
+from vyper.interfaces import ERC20
+
+implements: ERC20
+
+event Transfer:
+    sender: indexed(address)
+    receiver: indexed(address)
+    value: uint256
+
+event Approval:
+    owner: indexed(address)
+    spender: indexed(address)
+    value: uint256
+
+balanceOf: public(HashMap[address, uint256])
+allowance: public(HashMap[address, HashMap[address, uint256]])
+totalSupply: public(uint256)
+blocked: public(HashMap[address, bool])
+owner: public(address)
+
+
+@external
+def __init__():
+    self.owner = msg.sender
+
+
+@external
+def mint(_to: address, _amount: uint256):
+    assert msg.sender == self.owner, "only owner can mint"
+    self.balanceOf[_to] += _amount
+    self.totalSupply += _amount
+    log Transfer(empty(address), _to, _amount)
+
+
+@external
+def set_blocked(_account: address, _blocked: bool):
+    assert msg.sender == self.owner, "only owner can block"
+    self.blocked[_account] = _blocked
+
+
+@external
+def transfer(_to: address, _amount: uint256) -> bool:
+    self._transfer(msg.sender, _to, _amount)
+    return True
+
+
+@external
+def transferFrom(_from: address, _to: address, _amount: uint256) -> bool:
+    self.allowance[_from][msg.sender] -= _amount
+    self._transfer(_from, _to, _amount)
+    return True
+
+
+@external
+def approve(_spender: address, _amount: uint256) -> bool:
+    self.allowance[msg.sender][_spender] = _amount
+    log Approval(msg.sender, _spender, _amount)
+    return True
+
+
+@internal
+def _transfer(_from: address, _to: address, _amount: uint256):
+    assert not self.blocked[_to], "receiver is blocked"
+    self.balanceOf[_from] -= _amount
+    self.balanceOf[_to] += _amount
+    log Transfer(_from, _to, _amount)
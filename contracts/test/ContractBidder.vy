@@ -0,0 +1,42 @@
+# @version 0.3.7
+
+# @notice Contract bidder whose `onERC721Received` accepts, reverts or burns all the gas it is given.
+
+from vyper.interfaces import ERC20
+
+interface VickreyAuction:
+    def create_bid(_id: uint256, _bid: uint256): nonpayable
+    def claim_nft(_id: uint256, _to: address): nonpayable
+
+ACCEPT: constant(uint256) = 0
+REJECT: constant(uint256) = 1
+BURN_GAS: constant(uint256) = 2
+
+mode: public(uint256)
+received: public(uint256)
+
+
+@external
+def set_mode(_mode: uint256):
+    self.mode = _mode
+
+
+@external
+def bid(_auction: address, _token: ERC20, _id: uint256, _amount: uint256):
+    _token.approve(_auction, _amount)
+    VickreyAuction(_auction).create_bid(_id, _amount)
+
+
+@external
+def claim_nft(_auction: address, _id: uint256, _to: address):
+    VickreyAuction(_auction).claim_nft(_id, _to)
+
+
+@external
+def onERC721Received(_operator: address, _from: address, _token_id: uint256, _data: Bytes[1024]) -> bytes4:
+    assert self.mode != REJECT, "Rejected"
+    if self.mode == BURN_GAS:
+        for i in range(1000000):
+            self.received += 1
+    self.received += 1
+    return 0x150b7a02
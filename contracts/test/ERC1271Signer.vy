@@ -0,0 +1,21 @@
+# @version 0.3.7
+
+# @notice Contract wallet whose ERC-1271 `isValidSignature` accepts digests signed by `signer`.
+
+signer: public(address)
+
+
+@external
+def __init__(_signer: address):
+    self.signer = _signer
+
+
+@external
+@view
+def isValidSignature(_hash: bytes32, _signature: Bytes[65]) -> bytes4:
+    r: uint256 = convert(slice(_signature, 0, 32), uint256)
+    s: uint256 = convert(slice(_signature, 32, 32), uint256)
+    v: uint256 = convert(slice(_signature, 64, 1), uint256)
+    if ecrecover(_hash, v, r, s) == self.signer:
+        return 0x1626BA7E
+    return 0xFFFFFFFF
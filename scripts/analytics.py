@@ -0,0 +1,508 @@
+"""
+Vectorized auction analytics for the weekly finance report.
+
+Decoded `AuctionBid`, `AuctionSettled`, `AuctionExtended` and `Withdraw` events are loaded into
+one pandas frame per event, with addresses as categoricals and amounts as int64 columns (object
+columns of Python ints for wei-sized amounts, like `scripts/model.py`). `summarize` computes over
+whole columns at once:
+
+- realised revenue and its owner/`proceeds_receiver` split, and the winners' refunds of their
+  escrow above the price (a proxy bid's `max_bid` from `AuctionMaxBid`), through
+  `model.settle_auctions`, so the rounding is the floor division of `_settle_auction`
+- the discount of `price` against `bid` of sold auctions, the effect of `k`
+- extensions per auction and the share of auctions that were extended
+- bidder concentration: Herfindahl index and top-10 share of spend and of bids
+- withdrawals
+
+`weekly` runs it per week. Totals are exact integers, ratios are floats.
+
+Usage:
+    ape run analytics report --auction <address> --from-block <n> [--weekly] [--csv report.csv]
+    ape run analytics benchmark [--auctions 200000] [--bids 20]
+"""
+
+import time
+from dataclasses import dataclass
+
+import click
+import numpy as np
+import pandas as pd
+
+from scripts import model
+from scripts.client import unpack_config
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+WEEK = 7 * 24 * 3600
+TOP_BIDDERS = 10
+EVENTS = ("AuctionBid", "AuctionMaxBid", "AuctionSettled", "AuctionExtended", "Withdraw", "ProceedsReceiverSplitPercentageUpdated")
+
+
+def amounts(values) -> np.ndarray:
+    """
+    @dev int64 when every value leaves room for `* PRICISION`, else Python ints in an object array.
+    """
+
+    try:
+        array = np.asarray(values, dtype=np.int64)
+        if not array.size or array.max() <= model.MAX_INT64_BID:
+            return array
+    except OverflowError:
+        pass
+    return np.asarray(values, dtype=object)
+
+
+def exact_sum(values) -> int:
+    values = np.asarray(values)
+    if values.dtype == object:
+        return int(values.sum()) if values.size else 0
+    # High and low 32 bits summed apart cannot overflow int64 for fewer than 2**31 values
+    return (int(np.sum(values >> 32)) << 32) + int(np.sum(values & 0xFFFFFFFF))
+
+
+def herfindahl(weights: np.ndarray) -> float:
+    total = weights.sum()
+    return float(((weights / total) ** 2).sum()) if total else 0.0
+
+
+def top_share(weights: np.ndarray, n: int = TOP_BIDDERS) -> float:
+    total = weights.sum()
+    return float(np.sort(weights)[::-1][:n].sum() / total) if total else 0.0
+
+
+@dataclass
+class AuctionEvents:
+    bids: pd.DataFrame  # timestamp, nft_id, bidder, bid, price, extended
+    settlements: pd.DataFrame  # timestamp, nft_id, winner, bid, price, split, max_bid
+    extensions: pd.DataFrame  # timestamp, nft_id, end_time
+    withdrawals: pd.DataFrame  # timestamp, user, receiver, amount
+
+    @classmethod
+    def from_columns(cls, bids: dict, settlements: dict, extensions: dict, withdrawals: dict) -> "AuctionEvents":
+        """
+        @dev Build the frames from `{column: values}`, converting addresses and amounts.
+        """
+
+        def frame(columns: dict, addresses: tuple, money: tuple) -> pd.DataFrame:
+            data = {}
+            for name, values in columns.items():
+                if name in addresses:
+                    data[name] = values if isinstance(values, pd.Categorical) else pd.Categorical(values)
+                elif name in money:
+                    data[name] = amounts(values)
+                else:
+                    data[name] = np.asarray(values)
+            return pd.DataFrame(data)
+
+        return cls(
+            bids=frame(bids, ("bidder",), ("bid", "price")),
+            settlements=frame(settlements, ("winner",), ("bid", "price", "max_bid")),
+            extensions=frame(extensions, (), ()),
+            withdrawals=frame(withdrawals, ("user", "receiver"), ("amount",)),
+        )
+
+    def between(self, start: int, stop: int) -> "AuctionEvents":
+        """
+        @dev Events with `start <= timestamp < stop`.
+        """
+
+        def window(frame):
+            timestamps = frame["timestamp"].to_numpy()
+            return frame[(timestamps >= start) & (timestamps < stop)]
+
+        return AuctionEvents(window(self.bids), window(self.settlements), window(self.extensions), window(self.withdrawals))
+
+
+def group_sums(values, groups, n_groups: int) -> list:
+    """
+    @dev Exact sum of `values` per group, as Python ints.
+    """
+
+    values = np.asarray(values)
+    if values.dtype == object:
+        totals = [0] * n_groups
+        for group, total in pd.Series(values, dtype=object).groupby(groups).sum().items():
+            totals[group] = int(total)
+        return totals
+    # Same split as `exact_sum`, per group
+    high, low = np.zeros(n_groups, dtype=np.int64), np.zeros(n_groups, dtype=np.int64)
+    np.add.at(high, groups, values >> 32)
+    np.add.at(low, groups, values & 0xFFFFFFFF)
+    return [(int(h) << 32) + int(l) for h, l in zip(high, low)]
+
+
+def concentration(groups, keys, weights, n_groups: int) -> tuple:
+    """
+    @dev Per group: number of distinct keys, Herfindahl index and top-10 share of `weights`.
+    """
+
+    per_key = (
+        pd.DataFrame({"group": groups, "key": keys, "weight": weights})
+        .groupby(["group", "key"], sort=False)["weight"]
+        .sum()
+        .reset_index()
+    )
+    group, weight = per_key["group"].to_numpy(), per_key["weight"].to_numpy()
+    totals = np.bincount(group, weights=weight, minlength=n_groups)
+    shares = np.divide(weight, totals[group], out=np.zeros(len(weight)), where=totals[group] > 0)
+    top = pd.DataFrame({"group": group, "share": shares}).sort_values(["group", "share"], ascending=[True, False])
+    top = top.groupby("group").head(TOP_BIDDERS)
+    return (
+        np.bincount(group, minlength=n_groups),
+        np.bincount(group, weights=shares**2, minlength=n_groups),
+        np.bincount(top["group"].to_numpy(), weights=top["share"].to_numpy(), minlength=n_groups),
+    )
+
+
+def ratio(numerator, denominator) -> np.ndarray:
+    numerator, denominator = np.asarray(numerator, dtype=np.float64), np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(len(denominator)), where=denominator > 0)
+
+
+def summaries(events: AuctionEvents, group_of, n_groups: int) -> dict:
+    """
+    @dev Every metric for `n_groups` groups at once, `{metric: one value per group}`.
+      `group_of(timestamps)` puts events in groups. Extensions count towards the group in which
+      their auction was settled.
+    """
+
+    settlements, bids, withdrawals = events.settlements, events.bids, events.withdrawals
+    settle_groups = group_of(settlements["timestamp"].to_numpy())
+    winner = settlements["winner"]
+    sold = (winner != ZERO_ADDRESS).to_numpy()
+    price, bid = settlements["price"].to_numpy(), settlements["bid"].to_numpy()
+    payouts = model.settle_auctions(
+        bid, price, np.where(sold, 0, model.NO_BIDDER), settlements["split"].to_numpy(), settlements["max_bid"].to_numpy()
+    )
+
+    sold_groups = settle_groups[sold]
+    sold_bid, sold_price = bid[sold].astype(np.float64), price[sold].astype(np.float64)
+    n_sold = np.bincount(sold_groups, minlength=n_groups)
+    n_settled = np.bincount(settle_groups, minlength=n_groups)
+
+    # Extensions of settled auctions, in the group of their settlement
+    settled_ids = settlements["nft_id"].to_numpy()
+    order = np.argsort(settled_ids, kind="stable")
+    extended_ids = events.extensions["nft_id"].to_numpy()
+    position = np.minimum(np.searchsorted(settled_ids[order], extended_ids), max(0, len(order) - 1))
+    settled = (settled_ids[order][position] == extended_ids) if len(order) else np.zeros(len(extended_ids), dtype=bool)
+    extension_groups = settle_groups[order][position[settled]]
+    extended_auctions = np.unique(position[settled])
+
+    winners, spend_hhi, spend_top = concentration(
+        sold_groups, winner.cat.codes.to_numpy()[sold], sold_price, n_groups
+    )
+    bid_groups = group_of(bids["timestamp"].to_numpy())
+    bidders, bid_count_hhi, _ = concentration(
+        bid_groups, bids["bidder"].cat.codes.to_numpy(), np.ones(len(bids)), n_groups
+    )
+    withdrawal_groups = group_of(withdrawals["timestamp"].to_numpy())
+
+    return {
+        "auctions_settled": n_settled,
+        "auctions_sold": n_sold,
+        "revenue": group_sums(price[sold], sold_groups, n_groups),
+        "owner_amount": group_sums(payouts.owner_amount, settle_groups, n_groups),
+        "proceeds_receiver_amount": group_sums(payouts.proceeds_receiver_amount, settle_groups, n_groups),
+        "winner_refunds": group_sums(payouts.refund, settle_groups, n_groups),
+        # Share of the highest bid the winner did not pay, over all sold auctions and per auction
+        "discount": np.where(
+            n_sold > 0,
+            1 - ratio(
+                np.bincount(sold_groups, weights=sold_price, minlength=n_groups),
+                np.bincount(sold_groups, weights=sold_bid, minlength=n_groups),
+            ),
+            0.0,
+        ),
+        "mean_discount": ratio(np.bincount(sold_groups, weights=1 - sold_price / sold_bid, minlength=n_groups), n_sold),
+        "bids": np.bincount(bid_groups, minlength=n_groups),
+        "extensions_per_auction": ratio(np.bincount(extension_groups, minlength=n_groups), n_settled),
+        "extended_auction_share": ratio(
+            np.bincount(settle_groups[order][extended_auctions], minlength=n_groups), n_settled
+        ),
+        "bidders": bidders,
+        "winners": winners,
+        "spend_hhi": spend_hhi,
+        "spend_top10_share": spend_top,
+        "bid_count_hhi": bid_count_hhi,
+        "withdrawn": group_sums(withdrawals["amount"].to_numpy(), withdrawal_groups, n_groups),
+        "withdrawals": np.bincount(withdrawal_groups, minlength=n_groups),
+    }
+
+
+def summarize(events: AuctionEvents) -> dict:
+    values = summaries(events, lambda timestamps: np.zeros(len(timestamps), dtype=np.int64), 1)
+    return {name: column[0].item() if isinstance(column, np.ndarray) else column[0] for name, column in values.items()}
+
+
+def weekly(events: AuctionEvents, start: int | None = None) -> pd.DataFrame:
+    """
+    @dev One row of metrics per week from `start` (default: the first event). Events before
+      `start` are left out.
+    """
+
+    if start is not None:
+        events = events.between(start, np.iinfo(np.int64).max)
+    frames = (events.bids, events.settlements, events.extensions, events.withdrawals)
+    timestamps = np.concatenate([frame["timestamp"].to_numpy() for frame in frames])
+    if not timestamps.size:
+        return pd.DataFrame()
+    start = int(timestamps.min()) if start is None else start
+    n_weeks = (int(timestamps.max()) - start) // WEEK + 1
+    frame = pd.DataFrame(summaries(events, lambda timestamps: (timestamps - start) // WEEK, n_weeks))
+    frame.index = pd.Index(start + np.arange(n_weeks) * WEEK, name="week_start")
+    return frame
+
+
+def summarize_rows(events: AuctionEvents) -> dict:
+    """
+    @dev Row by row version of part of `summarize`, as the report used to be computed. Kept as
+      the reference for tests and the benchmark.
+    """
+
+    revenue = owner_amount = proceeds_receiver_amount = 0
+    discounts = []
+    for row in events.settlements.itertuples():
+        if row.winner == ZERO_ADDRESS:
+            continue
+        price = int(row.price)
+        fee = price * int(row.split) // model.PRICISION
+        revenue += price
+        owner_amount += price - fee
+        proceeds_receiver_amount += fee
+        discounts.append(1 - price / int(row.bid))
+
+    bid_counts = {}
+    for row in events.bids.itertuples():
+        bid_counts[row.bidder] = bid_counts.get(row.bidder, 0) + 1
+
+    return {
+        "revenue": revenue,
+        "owner_amount": owner_amount,
+        "proceeds_receiver_amount": proceeds_receiver_amount,
+        "mean_discount": sum(discounts) / len(discounts) if discounts else 0.0,
+        "bid_count_hhi": sum((count / len(events.bids)) ** 2 for count in bid_counts.values()) if len(events.bids) else 0.0,
+    }
+
+
+# Loading
+
+
+def load(auction, start_block: int, stop_block: int | None = None) -> AuctionEvents:
+    """
+    @dev Decode the events of `auction` between two blocks, inclusive. The split of each settlement
+      is the `proceeds_receiver_split_percentage` in force when it happened, its `max_bid` the
+      winner's proxy bid escrow from the last `AuctionMaxBid` of the auction, 0 for a plain bid.
+    """
+
+    from ape import chain
+    from ape.types import LogFilter
+    from eth_utils import encode_hex, keccak
+
+    stop_block = chain.blocks.height if stop_block is None else stop_block
+    abis = [getattr(auction, name).abi for name in EVENTS]
+    log_filter = LogFilter(
+        addresses=[auction.address],
+        events=abis,
+        topic_filter=[[encode_hex(keccak(text=abi.selector)) for abi in abis]],
+        start_block=start_block,
+        stop_block=stop_block,
+    )
+
+    columns = {name: {} for name in EVENTS}
+    timestamps = {}
+    for log in chain.provider.get_contract_logs(log_filter):
+        if log.block_number not in timestamps:
+            timestamps[log.block_number] = chain.blocks[log.block_number].timestamp
+        values = {
+            "position": (log.block_number << 32) + log.log_index,
+            "timestamp": timestamps[log.block_number],
+            **{key: value if isinstance(value, int) else str(value) for key, value in log.event_arguments.items()},
+        }
+        for key, value in values.items():
+            columns[log.event_name].setdefault(key, []).append(value)
+
+    settled = columns["AuctionSettled"]
+    updates = columns["ProceedsReceiverSplitPercentageUpdated"]
+    initial_split = unpack_config(auction.config(block_id=start_block))["proceeds_receiver_split_percentage"]
+    split_history = np.array([initial_split] + updates.get("proceeds_receiver_split_percentage", []), dtype=np.int64)
+    split_positions = np.array(updates.get("position", []), dtype=np.int64)
+    settled["split"] = split_history[np.searchsorted(split_positions, np.array(settled.get("position", []), dtype=np.int64))]
+    # Logs are in chain order, so the last `AuctionMaxBid` of an auction is in force at its settlement
+    max_bids = columns["AuctionMaxBid"]
+    last_max_bid = {
+        nft_id: (bidder, max_bid)
+        for nft_id, bidder, max_bid in zip(max_bids.get("nft_id", []), max_bids.get("bidder", []), max_bids.get("max_bid", []))
+    }
+    settled["max_bid"] = []
+    for nft_id, winner in zip(settled.get("nft_id", []), settled.get("winner", [])):
+        bidder, max_bid = last_max_bid.get(nft_id, (ZERO_ADDRESS, 0))
+        settled["max_bid"].append(max_bid if bidder == winner else 0)
+
+    def pick(name, renames):
+        data = columns[name]
+        return {new: data.get(old, []) for old, new in renames.items()}
+
+    return AuctionEvents.from_columns(
+        pick("AuctionBid", {"timestamp": "timestamp", "nft_id": "nft_id", "sender": "bidder", "bid": "bid", "price": "price", "extended": "extended"}),
+        pick("AuctionSettled", {"timestamp": "timestamp", "nft_id": "nft_id", "winner": "winner", "bid": "bid", "price": "price", "split": "split", "max_bid": "max_bid"}),
+        pick("AuctionExtended", {"timestamp": "timestamp", "nft_id": "nft_id", "end_time": "end_time"}),
+        pick("Withdraw", {"timestamp": "timestamp", "user": "user", "reciver": "receiver", "amount": "amount"}),
+    )
+
+
+def synthetic(
+    rng,
+    n_auctions: int,
+    n_bids: int,
+    n_bidders: int = 1000,
+    duration: int = 3600,
+    reserve_price: int = 10**6,
+    k: int = 50,
+    split: int = 95,
+) -> AuctionEvents:
+    """
+    @dev Events of `n_auctions` consecutive auctions with up to `n_bids` bids each, played by
+      `model.simulate_bids`. Every outbid bidder withdraws right away.
+    """
+
+    bids, offsets, bidders = model.random_bid_sequences(rng, n_auctions, n_bids, duration, reserve_price, n_bidders)
+    time_buffer = 100
+    result = model.simulate_bids(
+        bids,
+        offsets,
+        end_time=duration,
+        reserve_price=reserve_price,
+        min_bid_increment_percentage=5,
+        time_buffer=time_buffer,
+        k=k,
+        bidders=bidders,
+    )
+    starts = np.arange(n_auctions, dtype=np.int64) * 2 * duration
+    timestamps = starts[:, None] + offsets
+    addresses = [ZERO_ADDRESS] + [f"0x{i:040x}" for i in range(1, n_bidders + 1)]
+
+    def address(codes):
+        # Bidder i is address i + 1, `NO_BIDDER` the zero address
+        return pd.Categorical.from_codes(np.asarray(codes) + 1, categories=addresses)
+
+    accepted = result.outcome == model.ACCEPTED
+    rows, cols = np.nonzero(accepted)
+    accepted_bids = bids[rows, cols]
+    # Every accepted bid after the first of its auction is priced against the one it replaced
+    first = np.r_[True, rows[1:] != rows[:-1]]
+    previous = np.r_[0, accepted_bids[:-1]]
+    prices = np.where(first, accepted_bids, model.get_price(accepted_bids, previous, k))
+
+    extended = result.extended[rows, cols]
+    refunds = np.nonzero(result.refund_to != model.NO_BIDDER)
+    winners = np.nonzero(result.bidder != model.NO_BIDDER)[0]
+    winner_refunds = result.bid[winners] - result.price[winners]
+    paid = winner_refunds > 0
+    settle_times = starts + result.end_time + 1
+
+    return AuctionEvents.from_columns(
+        {
+            "timestamp": timestamps[rows, cols],
+            "nft_id": rows,
+            "bidder": address(bidders[rows, cols]),
+            "bid": accepted_bids,
+            "price": prices,
+            "extended": extended,
+        },
+        {
+            "timestamp": settle_times,
+            "nft_id": np.arange(n_auctions),
+            "winner": address(result.bidder),
+            "bid": result.bid,
+            "price": result.price,
+            "split": np.full(n_auctions, split),
+            "max_bid": np.zeros(n_auctions, dtype=result.bid.dtype),
+        },
+        {
+            "timestamp": timestamps[rows, cols][extended],
+            "nft_id": rows[extended],
+            "end_time": timestamps[rows, cols][extended] + time_buffer,
+        },
+        {
+            "timestamp": np.concatenate([timestamps[refunds] + 1, settle_times[winners][paid] + 1]),
+            "user": address(np.concatenate([result.refund_to[refunds], result.bidder[winners][paid]])),
+            "receiver": address(np.concatenate([result.refund_to[refunds], result.bidder[winners][paid]])),
+            "amount": np.concatenate([result.refund[refunds], winner_refunds[paid]]),
+        },
+    )
+
+
+def format_summary(summary: dict) -> str:
+    return "\n".join(
+        f"{name:>26} {value:,.4f}" if isinstance(value, float) else f"{name:>26} {value:,}"
+        for name, value in summary.items()
+    )
+
+
+@click.group()
+def cli():
+    pass
+
+
+def _commands():
+    from ape import project
+    from ape.cli import ConnectedProviderCommand
+
+    @cli.command(cls=ConnectedProviderCommand)
+    @click.option("--auction", "auction_address", required=True, help="VickreyAuction address")
+    @click.option("--from-block", required=True, type=int, help="First block, e.g. the deployment block")
+    @click.option("--to-block", default=None, type=int, help="Last block (default: head)")
+    @click.option("--weekly", "per_week", is_flag=True, help="One row per week")
+    @click.option("--csv", "csv_path", type=click.Path(dir_okay=False), default=None)
+    def report(auction_address, from_block, to_block, per_week, csv_path):
+        """
+        Summarize the auction's events, in total or per week.
+        """
+
+        events = load(project.VickreyAuction.at(auction_address), from_block, to_block)
+        if per_week:
+            frame = weekly(events)
+            click.echo(frame.to_string())
+        else:
+            frame = pd.DataFrame([summarize(events)])
+            click.echo(format_summary(frame.iloc[0].to_dict()))
+        if csv_path:
+            frame.to_csv(csv_path)
+
+
+try:
+    _commands()
+except ImportError:  # the analytics themselves do not need ape
+    pass
+
+
+@cli.command()
+@click.option("--auctions", "n_auctions", default=200_000, show_default=True)
+@click.option("--bids", "n_bids", default=20, show_default=True, help="Bids tried per auction")
+@click.option("--row-sample", default=200_000, show_default=True, help="Bids timed through the row-by-row reference")
+def benchmark(n_auctions, n_bids, row_sample):
+    """
+    Time the analytics on synthetic events played by `scripts.model`.
+    """
+
+    start = time.perf_counter()
+    events = synthetic(np.random.default_rng(0), n_auctions, n_bids)
+    generated = time.perf_counter() - start
+    n_events = sum(len(frame) for frame in (events.bids, events.settlements, events.extensions, events.withdrawals))
+    click.echo(f"{n_events:,} synthetic events ({len(events.bids):,} bids) generated in {generated:.1f}s")
+
+    start = time.perf_counter()
+    summary = summarize(events)
+    vectorized = time.perf_counter() - start
+    start = time.perf_counter()
+    weeks = weekly(events)
+    per_week = time.perf_counter() - start
+    click.echo(format_summary(summary))
+
+    # The row-by-row reference on a slice of the auctions, scaled up to the whole set
+    sample = events.between(0, int(np.quantile(events.bids["timestamp"], min(1.0, row_sample / len(events.bids)))))
+    start = time.perf_counter()
+    summarize_rows(sample)
+    rows = (time.perf_counter() - start) * len(events.bids) / max(1, len(sample.bids))
+    click.echo(f"summarize: {vectorized:.2f}s, weekly ({len(weeks)} weeks): {per_week:.2f}s")
+    click.echo(f"row by row (extrapolated from {len(sample.bids):,} bids): {rows:.1f}s, {rows / vectorized:.0f}x slower")
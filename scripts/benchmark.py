@@ -0,0 +1,168 @@
+"""
+Whole-auction gas benchmarks on a local chain.
+
+Reports the number of transactions and the total gas of the scenarios in `scripts/scenarios.py`,
+and compares `scripts.client` with ape on cold start and RPC requests.
+
+Usage: ape run benchmark <scenario> [options]
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import click
+from ape import accounts, chain
+from ape.cli import ConnectedProviderCommand
+
+from scripts.client import AuctionClient, LocalRPCServer
+from scripts.deploy import deploy_auction_house, funded_bidders
+from scripts.scenarios import bid_costs, bidding_modes, deployment_costs, permit_costs, refund_modes
+
+CONFIG_VIEWS = (
+    "reserve_price",
+    "time_buffer",
+    "duration",
+    "min_bid_increment_percentage",
+    "proceeds_receiver_split_percentage",
+    "paused",
+    "emergency_paused",
+    "push_refunds",
+)
+# Cold start of a fresh process up to its first read of `auction()` and `config()` over HTTP
+CLIENT_COLD_START = "from scripts.client import AuctionClient; AuctionClient(*__import__('sys').argv[1:3]).state()"
+APE_COLD_START = """
+import sys
+from ape import networks, project
+with networks.parse_network_choice(sys.argv[1]):
+    auction = project.VickreyAuction.at(sys.argv[2])
+    auction.auction()
+    auction.config()
+"""
+
+
+def cold_start(code: str, *args) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code, *args], check=True, capture_output=True, cwd=Path(__file__).parent.parent)
+    return time.perf_counter() - start
+
+
+def client_reads(auction, url: str, readers: list, polls: int) -> dict:
+    """
+    @dev Requests needed to read `auction()`, the config and the `pending_returns` of `readers`
+      `polls` times while nothing changes: once through `AuctionClient`, once as ape view calls.
+    """
+
+    client = AuctionClient(url, auction.address, poll_interval=0)
+    for _ in range(polls):
+        client.state()
+        client.pending_returns_many(readers)
+    return {
+        "client requests": client.rpc.requests,
+        "client round trips": client.rpc.round_trips,
+        "ape eth_calls": polls * (1 + len(CONFIG_VIEWS) + len(readers)),
+    }
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command(cls=ConnectedProviderCommand)
+def bids():
+    """
+    Gas per bidding and settlement transaction.
+    """
+
+    deployer, split_recipient = accounts.test_accounts[0], accounts.test_accounts[1]
+    auction, token = deploy_auction_house(deployer, split_recipient)
+    bidders = funded_bidders(token, deployer, 2, 10**24)
+    for label, gas in bid_costs(auction, token, deployer, bidders).items():
+        click.echo(f"{label:>16}: {gas:>9,} gas")
+
+
+@cli.command(cls=ConnectedProviderCommand)
+def deploy():
+    """
+    Direct deployment vs minimal proxies from `AuctionHouseFactory`.
+    """
+
+    deployer, split_recipient = accounts.test_accounts[0], accounts.test_accounts[1]
+    for label, gas in deployment_costs(deployer, split_recipient).items():
+        click.echo(f"{label:>34}: {gas:>9,} gas")
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@click.option("--bidders", "n_bidders", default=10, show_default=True)
+@click.option("--rounds", default=30, show_default=True, help="Number of bids in the auction")
+def refunds(n_bidders, rounds):
+    """
+    Pull (`withdraw`) vs push refunds to outbid bidders.
+    """
+
+    deployer, split_recipient = accounts.test_accounts[0], accounts.test_accounts[1]
+    for mode, tally in refund_modes(deployer, split_recipient, n_bidders, rounds).items():
+        click.echo(f"{mode:>5}: {tally}")
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@click.option("--readers", "n_readers", default=5, show_default=True, help="Addresses to read `pending_returns` of")
+@click.option("--polls", default=10, show_default=True)
+@click.option("--runs", default=3, show_default=True, help="Cold starts to take the best of")
+def client(n_readers, polls, runs):
+    """
+    Read-only `AuctionClient` vs ape contract calls: cold start and RPC requests.
+    """
+
+    deployer, split_recipient = accounts.test_accounts[0], accounts.test_accounts[1]
+    auction, _ = deploy_auction_house(deployer, split_recipient)
+    readers = [account.address for account in accounts.test_accounts[2 : 2 + n_readers]]
+
+    # Node providers have an endpoint, the local test chain is served over HTTP for the benchmark
+    url = chain.provider.http_uri
+    server = None if url else LocalRPCServer(chain.provider.web3)
+    url = url or server.url
+    try:
+        client_seconds = min(cold_start(CLIENT_COLD_START, url, auction.address) for _ in range(runs))
+        ape_seconds = min(cold_start(APE_COLD_START, url, auction.address) for _ in range(runs))
+        counts = client_reads(auction, url, readers, polls)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    click.echo(f"{'client cold start':>20}: {client_seconds:>8.2f} s (import, ABIs and first read)")
+    click.echo(f"{'ape cold start':>20}: {ape_seconds:>8.2f} s (import, project, connect and first read)")
+    for label, count in counts.items():
+        click.echo(f"{label:>20}: {count:>8,}")
+
+
+@cli.command(cls=ConnectedProviderCommand)
+def permit():
+    """
+    `Frok` approval with an `approve` transaction vs an ERC-4494 permit, each plus `transferFrom`.
+    """
+
+    deployer, spender = accounts.test_accounts[0], accounts.test_accounts[1]
+    for label, gas in permit_costs(deployer, spender, accounts.test_accounts[2:4]).items():
+        click.echo(f"{label:>26}: {gas:>9,} gas")
+    click.echo("The owner sends no transaction and needs no ETH on the permit path; the spender pays for both.")
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@click.option("--bidders", "n_bidders", default=5, show_default=True)
+@click.option("--auctions", "n_auctions", default=5, show_default=True)
+@click.option("--seed", default=0, show_default=True)
+def proxy(n_bidders, n_auctions, seed):
+    """
+    Bid wars with `create_bid` vs proxy bids with `set_max_bid`, per auction.
+    """
+
+    deployer, split_recipient = accounts.test_accounts[0], accounts.test_accounts[1]
+    for mode, (tally, outcomes) in bidding_modes(deployer, split_recipient, n_bidders, n_auctions, seed).items():
+        prices = sum(price for _, price in outcomes)
+        click.echo(
+            f"{mode:>12}: {tally.transactions / n_auctions:>7.1f} txs {tally.gas // n_auctions:>12,} gas "
+            f"{prices // n_auctions:>8,} mean price per auction"
+        )
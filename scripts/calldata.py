@@ -0,0 +1,63 @@
+"""
+Encoder for the packed calldata accepted by `VickreyAuction.__default__`.
+
+On rollups calldata dominates fees. The ABI encoding of `create_bid(uint256,uint256)` is 68
+bytes, mostly zero padding, while the packed form is 16 bytes: a 4-byte nft id followed by a
+12-byte bid. `withdraw_multiple` packs 20-byte addresses back to back instead of 32-byte words.
+
+Usage:
+    from scripts.calldata import create_bid, send
+    send(auction, create_bid(nft_id, amount), sender=account)
+"""
+
+from eth_utils import function_signature_to_4byte_selector, to_bytes, to_canonical_address
+
+BID_LENGTH = 16
+ADDRESS_LENGTH = 20
+MAX_NFT_ID = 2**32 - 1
+MAX_BID = 2**96 - 1
+MAX_WITHDRAWALS = 100
+
+
+def create_bid(nft_id: int, amount: int) -> bytes:
+    if not 0 <= nft_id <= MAX_NFT_ID:
+        raise ValueError(f"nft id {nft_id} does not fit in 4 bytes, use `create_bid`")
+    if not 0 <= amount <= MAX_BID:
+        raise ValueError(f"bid {amount} does not fit in 12 bytes, use `create_bid`")
+    return nft_id.to_bytes(4, "big") + amount.to_bytes(12, "big")
+
+
+def withdraw_multiple(addresses) -> bytes:
+    addresses = [to_canonical_address(str(address)) for address in addresses]
+    if not 0 < len(addresses) <= MAX_WITHDRAWALS:
+        raise ValueError(f"between 1 and {MAX_WITHDRAWALS} addresses can be withdrawn at once")
+    return b"".join(addresses)
+
+
+def selectors(contract_type) -> set:
+    return {
+        function_signature_to_4byte_selector(abi.selector)
+        for abi in (*contract_type.mutable_methods, *contract_type.view_methods)
+    }
+
+
+def check(data: bytes, contract_type) -> bytes:
+    """
+    @dev Packed data whose first 4 bytes equal a function selector would be dispatched to that
+      function instead of `__default__`. Raise for those, e.g. reorder the withdrawal addresses.
+    """
+
+    if data[:4] in selectors(contract_type):
+        raise ValueError(f"packed calldata starts with the selector 0x{data[:4].hex()}")
+    return data
+
+
+def send(auction, data: bytes, sender, **kwargs):
+    check(data, auction.contract_type)
+    return sender.transfer(auction, 0, data=data, **kwargs)
+
+
+def calldata_gas(data: bytes) -> int:
+    # EIP-2028: 4 gas per zero byte, 16 per non-zero byte
+    data = to_bytes(data)
+    return sum(4 if byte == 0 else 16 for byte in data)
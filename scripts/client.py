@@ -0,0 +1,452 @@
+"""
+Lightweight read-only client for VickreyAuction and Frok.
+
+Dashboards and bots that only read state do not need the ape stack. This client ships the
+contract ABIs in `scripts/abi/`, speaks raw JSON-RPC over a single kept-alive HTTP connection,
+batches requests, and caches `auction()`, the packed config and `pending_returns`. Cached values
+are only re-read after a log that can change them.
+
+Usage:
+    from scripts.client import AuctionClient
+    client = AuctionClient("http://127.0.0.1:8545", auction_address)
+    client.auction(), client.config(), client.pending_returns(address)
+
+    ape run client export-abis  # after changing a contract's interface
+
+See `ape run benchmark client` for cold start and RPC counts against the ape path.
+"""
+
+import http.client
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+import click
+from eth_abi import decode, encode
+from eth_utils import keccak, to_checksum_address
+
+ABI_DIR = Path(__file__).parent / "abi"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Fields of VickreyAuction's packed `config`: name, bit offset, bit width
+CONFIG_FIELDS = (
+    ("reserve_price", 0, 96),
+    ("time_buffer", 96, 32),
+    ("duration", 128, 32),
+    ("min_bid_increment_percentage", 160, 8),
+    ("proceeds_receiver_split_percentage", 168, 8),
+    ("paused", 176, 1),
+    ("emergency_paused", 177, 1),
+    ("push_refunds", 178, 1),
+)
+CONFIG_EVENTS = {
+    "AuctionTimeBufferUpdated",
+    "AuctionReservePriceUpdated",
+    "AuctionMinBidIncrementPercentageUpdated",
+    "AuctionDurationUpdated",
+    "ProceedsReceiverSplitPercentageUpdated",
+    "PushRefundsUpdated",
+}
+WATCHED_EVENTS = {"AuctionBid", "AuctionCreated", "AuctionSettled", "Withdraw", "EmergencyPaused", *CONFIG_EVENTS}
+UNKNOWN = object()
+
+
+class RPCError(Exception):
+    pass
+
+
+class RPC:
+    """
+    @dev JSON-RPC over one reused HTTP connection. `round_trips` counts HTTP requests and
+      `requests` counts JSON-RPC calls, so batching shows up as `requests > round_trips`.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        parsed = urlparse(url)
+        self._connection_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self._netloc = parsed.netloc
+        self._path = parsed.path or "/"
+        self._timeout = timeout
+        self._connection = None
+        self.round_trips = 0
+        self.requests = 0
+
+    def request(self, method: str, params: list):
+        return self.batch([(method, params)])[0]
+
+    def batch(self, calls: list) -> list:
+        if not calls:
+            return []
+        payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, (method, params) in enumerate(calls)]
+        responses = self._post(payload if len(payload) > 1 else payload[0])
+        if isinstance(responses, dict):
+            responses = [responses]
+        by_id = {response.get("id"): response for response in responses}
+
+        results = []
+        for i, (method, _) in enumerate(calls):
+            response = by_id.get(i)
+            if response is None:
+                raise RPCError(f"no response to {method}")
+            if "error" in response:
+                raise RPCError(f"{method}: {response['error'].get('message', response['error'])}")
+            results.append(response["result"])
+        return results
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _post(self, payload):
+        body = json.dumps(payload).encode()
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = self._connection_class(self._netloc, timeout=self._timeout)
+            try:
+                self._connection.request("POST", self._path, body, {"Content-Type": "application/json"})
+                response = self._connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                # The server may have closed the kept-alive connection, reconnect once
+                self.close()
+                if attempt:
+                    raise
+                continue
+            self.round_trips += 1
+            self.requests += len(payload) if isinstance(payload, list) else 1
+            if response.status != 200:
+                raise RPCError(f"HTTP {response.status}: {data[:200]!r}")
+            return json.loads(data)
+
+
+def _canonical_type(item: dict) -> str:
+    if not item["type"].startswith("tuple"):
+        return item["type"]
+    return f"({','.join(_canonical_type(component) for component in item['components'])}){item['type'][5:]}"
+
+
+def _named(item: dict, value):
+    if item["type"] == "tuple":
+        return {component["name"]: _named(component, v) for component, v in zip(item["components"], value)}
+    if item["type"] == "address":
+        return to_checksum_address(value)
+    return value
+
+
+class ABI:
+    def __init__(self, entries: list):
+        self.functions = {}  # name -> (selector, input types, outputs)
+        self.events = {}  # topic0 -> (name, inputs)
+        self.topics = {}  # event name -> topic0
+        for entry in entries:
+            if entry["type"] == "function":
+                types = [_canonical_type(item) for item in entry["inputs"]]
+                selector = keccak(text=f"{entry['name']}({','.join(types)})")[:4]
+                self.functions.setdefault(entry["name"], (selector, types, entry["outputs"]))
+            elif entry["type"] == "event":
+                types = [_canonical_type(item) for item in entry["inputs"]]
+                topic = "0x" + keccak(text=f"{entry['name']}({','.join(types)})").hex()
+                self.events[topic] = (entry["name"], entry["inputs"])
+                self.topics[entry["name"]] = topic
+
+    @classmethod
+    def load(cls, name: str) -> "ABI":
+        return cls(json.loads((ABI_DIR / f"{name}.json").read_text()))
+
+    def encode_call(self, name: str, *args) -> str:
+        selector, types, _ = self.functions[name]
+        return "0x" + (selector + encode(types, list(args))).hex()
+
+    def decode_output(self, name: str, data: str):
+        outputs = self.functions[name][2]
+        values = decode([_canonical_type(item) for item in outputs], bytes.fromhex(data.removeprefix("0x")))
+        named = [_named(item, value) for item, value in zip(outputs, values)]
+        return named[0] if len(named) == 1 else tuple(named)
+
+    def decode_log(self, log: dict) -> tuple:
+        name, inputs = self.events[log["topics"][0]]
+        topics = iter(log["topics"][1:])
+        data_inputs = [item for item in inputs if not item["indexed"]]
+        data = decode([_canonical_type(item) for item in data_inputs], bytes.fromhex(log["data"].removeprefix("0x")))
+        values = dict(zip((item["name"] for item in data_inputs), data))
+        arguments = {}
+        for item in inputs:
+            if item["indexed"]:
+                arguments[item["name"]] = decode([item["type"]], bytes.fromhex(next(topics).removeprefix("0x")))[0]
+            else:
+                arguments[item["name"]] = values[item["name"]]
+            arguments[item["name"]] = _named(item, arguments[item["name"]])
+        return name, arguments
+
+
+def unpack_config(config: int) -> dict:
+    fields = {name: (config >> offset) & ((1 << width) - 1) for name, offset, width in CONFIG_FIELDS}
+    for name, _, width in CONFIG_FIELDS:
+        if width == 1:
+            fields[name] = bool(fields[name])
+    return fields
+
+
+class AuctionClient:
+    def __init__(self, rpc, auction: str, nft: str | None = None, poll_interval: float = 1.0):
+        self.rpc = RPC(rpc) if isinstance(rpc, str) else rpc
+        self.address = to_checksum_address(auction)
+        self.auction_abi = ABI.load("VickreyAuction")
+        self.nft_abi = ABI.load("Frok")
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+
+        self.block = None  # block the cache is valid at
+        self._nft = to_checksum_address(nft) if nft else None
+        self._synced_at = 0.0
+        self._auction = None
+        self._config = None
+        self._pending = {}
+        self._leader = UNKNOWN  # current highest bidder, to know whose `pending_returns` a bid changes
+        self._topics = [self.auction_abi.topics[name] for name in sorted(WATCHED_EVENTS) if name in self.auction_abi.topics]
+
+    def sync(self, force: bool = False):
+        """
+        @dev Move the cache to the head block, dropping the values that new logs may have changed.
+          Polls at most once per `poll_interval` unless forced.
+        """
+
+        now = time.monotonic()
+        if not force and self.block is not None and now - self._synced_at < self.poll_interval:
+            return
+        self._synced_at = now
+
+        head = int(self.rpc.request("eth_blockNumber", []), 16)
+        if self.block is not None and head > self.block:
+            logs = self.rpc.request(
+                "eth_getLogs",
+                [{"address": self.address, "fromBlock": hex(self.block + 1), "toBlock": hex(head), "topics": [self._topics]}],
+            )
+            for log in sorted(logs, key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16))):
+                self._invalidate(*self.auction_abi.decode_log(log))
+        self.block = max(head, self.block or 0)
+
+    def auction(self) -> dict:
+        self.state()
+        return self._auction
+
+    def config(self) -> dict:
+        self.state()
+        return self._config
+
+    def state(self) -> tuple:
+        """
+        @dev `auction()` and the unpacked config, read together in one round trip when stale.
+        """
+
+        self.sync()
+        missing = [name for name, value in (("auction", self._auction), ("config", self._config)) if value is None]
+        if not missing:
+            self.hits += 1
+            return self._auction, self._config
+
+        self.misses += 1
+        results = self.rpc.batch([self._call(self.address, self.auction_abi, name) for name in missing])
+        for name, result in zip(missing, results):
+            value = self.auction_abi.decode_output(name, result)
+            if name == "auction":
+                self._auction = value
+                self._leader = value["bidder"]
+            else:
+                self._config = unpack_config(value)
+        return self._auction, self._config
+
+    def pending_returns(self, address: str) -> int:
+        return self.pending_returns_many([address])[to_checksum_address(str(address))]
+
+    def pending_returns_many(self, addresses) -> dict:
+        self.sync()
+        addresses = [to_checksum_address(str(address)) for address in addresses]
+        missing = [address for address in dict.fromkeys(addresses) if address not in self._pending]
+        self.hits += len(addresses) - len(missing)
+        if missing:
+            self.misses += len(missing)
+            calls = [self._call(self.address, self.auction_abi, "pending_returns", address) for address in missing]
+            for address, result in zip(missing, self.rpc.batch(calls)):
+                self._pending[address] = self.auction_abi.decode_output("pending_returns", result)
+        return {address: self._pending[address] for address in addresses}
+
+    def nft_address(self) -> str:
+        if self._nft is None:
+            self._nft = self.call("nft")
+        return self._nft
+
+    def call(self, name: str, *args):
+        """
+        @dev Uncached VickreyAuction view call at the latest synced block.
+        """
+
+        self.sync()
+        return self.auction_abi.decode_output(name, self.rpc.request(*self._call(self.address, self.auction_abi, name, *args)))
+
+    def nft_calls(self, calls: list) -> list:
+        """
+        @dev Uncached Frok view calls, e.g. `[("ownerOf", 1), ("balanceOf", owner)]`, in one round trip.
+        """
+
+        self.sync()
+        nft = self.nft_address()
+        results = self.rpc.batch([self._call(nft, self.nft_abi, name, *args) for name, *args in calls])
+        return [self.nft_abi.decode_output(name, result) for (name, *_), result in zip(calls, results)]
+
+    def _call(self, to: str, abi: ABI, name: str, *args) -> tuple:
+        return "eth_call", [{"to": to, "data": abi.encode_call(name, *args)}, hex(self.block)]
+
+    def _invalidate(self, name: str, arguments: dict):
+        if name == "AuctionBid":
+            self._forget_leader()
+            self._leader = arguments["sender"]
+            self._auction = None
+        elif name == "AuctionCreated":
+            self._auction = self._config = None
+            self._leader = ZERO_ADDRESS
+        elif name == "AuctionSettled":
+            self._auction = self._config = None
+            self._pending.pop(arguments["winner"], None)
+            self._leader = ZERO_ADDRESS
+        elif name == "Withdraw":
+            self._pending.pop(arguments["user"], None)
+        elif name == "EmergencyPaused":
+            self._config = None
+            self._forget_leader()
+        elif name in CONFIG_EVENTS:
+            self._config = None
+
+    def _forget_leader(self):
+        # The current leader is credited their bid when outbid or on `emergency_pause`
+        if self._leader is UNKNOWN:
+            self._pending.clear()
+        else:
+            self._pending.pop(self._leader, None)
+
+
+### LOCAL CHAIN ###
+
+
+def _quantity(value) -> str:
+    return hex(value)
+
+
+def _data(value) -> str:
+    return "0x" + bytes(value).hex()
+
+
+def _block_id(value):
+    return int(value, 16) if isinstance(value, str) and value.startswith("0x") else value
+
+
+class LocalRPCServer:
+    """
+    @dev Minimal JSON-RPC endpoint over a web3 instance, for local test chains that have no HTTP
+      endpoint of their own. Counts the JSON-RPC requests it serves.
+    """
+
+    def __init__(self, web3, host: str = "127.0.0.1", port: int = 0):
+        self.web3 = web3
+        self.requests = 0
+        self.methods = {
+            "eth_blockNumber": lambda: _quantity(web3.eth.block_number),
+            "eth_chainId": lambda: _quantity(web3.eth.chain_id),
+            "eth_call": lambda tx, block="latest": _data(web3.eth.call(tx, _block_id(block))),
+            "eth_getLogs": self._get_logs,
+            # What ape needs to connect and call a contract, for the cold start benchmark
+            "web3_clientVersion": lambda: "LocalRPCServer",
+            "eth_getCode": lambda address, block="latest": _data(web3.eth.get_code(address, _block_id(block))),
+        }
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, payload):
+        if isinstance(payload, list):
+            return [self.handle(request) for request in payload]
+        self.requests += 1
+        response = {"jsonrpc": "2.0", "id": payload.get("id")}
+        try:
+            with self._lock:
+                response["result"] = self.methods[payload["method"]](*payload.get("params", []))
+        except KeyError:
+            response["error"] = {"code": -32601, "message": f"method {payload.get('method')} not supported"}
+        except Exception as err:
+            response["error"] = {"code": -32000, "message": str(err)}
+        return response
+
+    def _get_logs(self, params: dict) -> list:
+        params = {
+            **params,
+            "fromBlock": _block_id(params.get("fromBlock", "latest")),
+            "toBlock": _block_id(params.get("toBlock", "latest")),
+        }
+        return [
+            {
+                "address": log["address"],
+                "topics": [_data(topic) for topic in log["topics"]],
+                "data": _data(log["data"]),
+                "blockNumber": _quantity(log["blockNumber"]),
+                "blockHash": _data(log["blockHash"]),
+                "transactionHash": _data(log["transactionHash"]),
+                "transactionIndex": _quantity(log["transactionIndex"]),
+                "logIndex": _quantity(log["logIndex"]),
+                "removed": False,
+            }
+            for log in self.web3.eth.get_logs(params)
+        ]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                body = json.dumps(server.handle(payload)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+def export_abis():
+    """
+    Refresh the ABIs shipped in scripts/abi/ from the compiled project.
+    """
+
+    from ape import project
+
+    ABI_DIR.mkdir(exist_ok=True)
+    for name in ("VickreyAuction", "Frok"):
+        abi = [entry.model_dump(mode="json", by_alias=True, exclude_none=True) for entry in getattr(project, name).contract_type.abi]
+        (ABI_DIR / f"{name}.json").write_text(json.dumps(abi, indent=2) + "\n")
+        click.echo(f"wrote {ABI_DIR / name}.json")
@@ -0,0 +1,50 @@
+"""
+Local chain setup shared by the benchmarks, the gas model, the reconciler and the tests.
+
+Usage:
+    from scripts.deploy import deploy_auction_house, funded_bidders
+    auction, token = deploy_auction_house(deployer, split_recipient)
+    bidders = funded_bidders(token, deployer, 4, 10**24)
+"""
+
+from ape import accounts, project
+
+
+def deploy_auction_house(deployer, split_recipient, token=None):
+    nft = deployer.deploy(project.Frok)
+    if token is None:
+        token = deployer.deploy(project.BasicERC20)
+    price_provider = deployer.deploy(project.PriceProvider, 50)
+    auction = deployer.deploy(
+        project.VickreyAuction, nft, token, price_provider, 100, 100, 5, 3600, 95, split_recipient
+    )
+    nft.set_minter(auction, sender=deployer)
+    auction.create_auction(sender=deployer)
+    return auction, token
+
+
+def deploy_through_factory(deployer, split_recipient, factory, nft=None, token=None):
+    """
+    @dev Same auction house as `deploy_auction_house`, stamped out as a minimal proxy by `factory`.
+    """
+
+    nft = nft or deployer.deploy(project.Frok)
+    token = token or deployer.deploy(project.BasicERC20)
+    price_provider = deployer.deploy(project.PriceProvider, 50)
+    receipt = factory.create_auction_house(
+        nft, token, price_provider, 100, 100, 5, 3600, 95, split_recipient, deployer, sender=deployer
+    )
+    auction = project.VickreyAuction.at(factory.AuctionHouseCreated.from_receipt(receipt)[0].auction_house)
+    nft.set_minter(auction, sender=deployer)
+    auction.create_auction(sender=deployer)
+    return auction, token, receipt
+
+
+def funded_bidders(token, deployer, count: int, amount: int) -> list:
+    bidders = []
+    for _ in range(count):
+        bidder = accounts.test_accounts.generate_test_account()
+        deployer.transfer(bidder, 10**18)
+        token.mint(bidder, amount, sender=deployer)
+        bidders.append(bidder)
+    return bidders
@@ -0,0 +1,149 @@
+"""
+Frok scaling benchmark: gas against the holder's balance.
+
+`Frok` keeps `ids_by_owner` as a swap-and-pop `DynArray`, so transfers should cost the same
+whatever the holder's balance. This grows one holder to each size on a local chain (in batches
+through `contracts/test/BatchMinter.vy`) and records at every size the gas of `mint`,
+`transferFrom` of the first, middle and last index, `safeTransferFrom` to
+`ERC721TokenReceiverImplementation`, and the `eth_estimateGas` of `tokenOfOwnerByIndex` and
+`tokensForOwner`. Every measurement runs from a snapshot, so the holder stays at the size.
+
+The report is JSON, `--compare` prints the difference with an earlier report.
+
+Usage: ape run frok_scaling [--sizes 1000,10000,50000] [--output frok_scaling.json] [--compare old.json]
+"""
+
+import json
+import time
+from pathlib import Path
+
+import click
+from ape import accounts, chain, project
+from ape.cli import ConnectedProviderCommand
+
+SIZES = (1000, 10000, 50000)
+BATCH_SIZE = 200
+OPERATIONS = (
+    "mint",
+    "transferFrom first",
+    "transferFrom middle",
+    "transferFrom last",
+    "safeTransferFrom",
+    "tokenOfOwnerByIndex",
+    "tokensForOwner",
+)
+
+
+def deploy(deployer):
+    nft = deployer.deploy(project.Frok)
+    batch_minter = deployer.deploy(project.BatchMinter)
+    receiver = deployer.deploy(project.ERC721TokenReceiverImplementation)
+    return nft, batch_minter, receiver
+
+
+def grow(nft, batch_minter, owner, holder, size: int, batch_size: int = BATCH_SIZE):
+    """
+    @dev Mint tokens to `holder` until it holds `size`.
+    """
+
+    nft.set_minter(batch_minter, sender=owner)
+    while (balance := nft.balanceOf(holder)) < size:
+        batch_minter.mint_to(nft, holder, min(batch_size, size - balance), sender=owner)
+
+
+def isolated(fn):
+    """
+    @dev Run `fn` and revert the chain to before it.
+    """
+
+    snapshot = chain.snapshot()
+    try:
+        return fn()
+    finally:
+        chain.restore(snapshot)
+
+
+def view_gas(method, *args):
+    try:
+        return method.estimate_gas_cost(*args)
+    except Exception as err:
+        # Views over the gas cap fail as an `ApeException` on nodes and as the EVM's own error locally
+        return f"failed: {type(err).__name__}: {str(err).splitlines()[0][:80]}"
+
+
+def measure(nft, receiver, owner, holder, recipient) -> dict:
+    """
+    @dev Gas of every operation at `holder`'s current balance. `holder` must be the minter.
+    """
+
+    size = nft.balanceOf(holder)
+    results = {"mint": isolated(lambda: nft.mint(sender=holder).gas_used)}
+    for label, index in (("first", 0), ("middle", size // 2), ("last", size - 1)):
+        token_id = nft.tokenOfOwnerByIndex(holder, index)
+        results[f"transferFrom {label}"] = isolated(
+            lambda: nft.transferFrom(holder, recipient, token_id, sender=holder).gas_used
+        )
+    token_id = nft.tokenOfOwnerByIndex(holder, size - 1)
+    results["safeTransferFrom"] = isolated(
+        lambda: nft.safeTransferFrom(holder, receiver, token_id, sender=holder).gas_used
+    )
+    results["tokenOfOwnerByIndex"] = view_gas(nft.tokenOfOwnerByIndex, holder, size - 1)
+    results["tokensForOwner"] = view_gas(nft.tokensForOwner, holder)
+    return results
+
+
+def scaling(deployer, recipient, sizes=SIZES, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    @dev `{"sizes": [...], "gas": {operation: [gas or error per size]}, "seconds": [...]}`.
+    """
+
+    nft, batch_minter, receiver = deploy(deployer)
+    # The recipient already holds a token, so transfers do not pay for its first `ids_by_owner` slot
+    grow(nft, batch_minter, deployer, recipient, 1, batch_size)
+
+    report = {"sizes": sorted(sizes), "gas": {operation: [] for operation in OPERATIONS}, "seconds": []}
+    for size in report["sizes"]:
+        start = time.perf_counter()
+        grow(nft, batch_minter, deployer, deployer, size, batch_size)
+        nft.set_minter(deployer, sender=deployer)
+        for operation, gas in measure(nft, receiver, deployer, deployer, recipient).items():
+            report["gas"][operation].append(gas)
+        report["seconds"].append(round(time.perf_counter() - start, 1))
+    return report
+
+
+def format_report(report: dict, baseline: dict | None = None) -> str:
+    sizes = report["sizes"]
+    lines = [f"{'operation':>20} " + " ".join(f"{size:>22,}" for size in sizes)]
+    for operation, values in report["gas"].items():
+        cells = []
+        for i, value in enumerate(values):
+            cell = f"{value:,}" if isinstance(value, int) else "failed"
+            if baseline and sizes[i] in baseline["sizes"]:
+                previous = baseline["gas"].get(operation, [None] * len(baseline["sizes"]))[baseline["sizes"].index(sizes[i])]
+                if isinstance(value, int) and isinstance(previous, int):
+                    cell += f" ({value - previous:+,})"
+            cells.append(f"{cell:>22}")
+        lines.append(f"{operation:>20} " + " ".join(cells))
+    errors = {
+        f"{operation} @ {size:,}": value
+        for operation, values in report["gas"].items()
+        for size, value in zip(sizes, values)
+        if not isinstance(value, int)
+    }
+    lines.extend(f"{label}: {error}" for label, error in errors.items())
+    return "\n".join(lines)
+
+
+@click.command(cls=ConnectedProviderCommand)
+@click.option("--sizes", default=",".join(map(str, SIZES)), show_default=True, help="Comma separated holder balances")
+@click.option("--batch-size", default=BATCH_SIZE, show_default=True, help="Tokens minted per transaction")
+@click.option("--output", type=click.Path(path_type=Path), default=Path("frok_scaling.json"), show_default=True)
+@click.option("--compare", type=click.Path(exists=True, path_type=Path), default=None, help="Earlier report")
+def cli(sizes, batch_size, output, compare):
+    sizes = [int(size) for size in sizes.split(",")]
+    report = scaling(accounts.test_accounts[0], accounts.test_accounts[1], sizes, batch_size)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    baseline = json.loads(compare.read_text()) if compare else None
+    click.echo(format_report(report, baseline))
+    click.echo(f"report written to {output}")
@@ -0,0 +1,514 @@
+"""
+Gas model for VickreyAuction transactions, calibrated on a local chain.
+
+Bots that need a gas limit at the last moment before `end_time` can predict it from state they
+already follow (e.g. through `scripts.client`) instead of calling `eth_estimateGas`. Gas is
+`21000 + calldata gas + execution gas`, where the execution gas of each entry point is a base
+cost plus one term per feature of the state it runs in: first bid or outbid, extending or not,
+where the outbid bid goes (cold or warm `pending_returns`, push refund), a challenge covered by
+the leading max bid, a max bid set, replaced, raised or cleared, contract or EOA winner,
+settlement with or without a bid, and the zero/non-zero token balances the transfers touch.
+
+The terms are fitted by least squares on receipts of scripted local-chain scenarios and stored
+in `scripts/gas_model.json`. The token balance terms are those of the calibration token (each
+bid approved exactly), recalibrate with the production token for exact numbers.
+
+Usage:
+    from scripts.gas_model import GasModel, create_bid_features
+    model = GasModel.load()
+    gas = model.create_bid(nft_id, amount, **create_bid_features(...))
+    gas = model.set_max_bid(nft_id, amount, **create_bid_features(..., proxy=True))
+
+    ape run gas_model calibrate  # after contract changes
+    ape run gas_model check
+"""
+
+import json
+from pathlib import Path
+
+import click
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
+
+from scripts.calldata import calldata_gas
+
+MODEL_PATH = Path(__file__).parent / "gas_model.json"
+TX_BASE_GAS = 21000
+GAS_MARGIN_PERCENTAGE = 10
+# Predictions are checked against fresh receipts to this tolerance
+MAX_ERROR = 500
+
+FEATURES = {
+    "create_bid": (
+        "first",  # no standing bid to refund
+        "extending",  # lands within `time_buffer` of `end_time`
+        "house_empty",  # auction house holds no bid token yet
+        "drains_balance",  # bidder bids their whole token balance
+        # Without any of the refund features below, the outbid bid is credited to a non-zero `pending_returns`
+        "pending_cold",  # ... to a zero `pending_returns`
+        "push",  # outbid bid transferred back (`push_refunds`)
+        "push_to_empty",  # ... to an address without a token balance
+        "covered",  # the leading max bid covers it: the leader is raised and the bid refunded at once
+        "covered_push",  # ... and pushed back, leaving the token balances as they were
+        "clears_max_bid",  # takes the lead from a proxy bid, `max_bid` is reset
+        # `set_max_bid` runs the same code, so it shares these terms
+        "sets_max_bid",  # `max_bid` written from zero
+        "replaces_max_bid",  # ... over the `max_bid` of the leading bidder
+        "raises",  # the leader raises its max bid, only the difference is escrowed
+    ),
+    "withdraw": (
+        "receiver_empty",  # receiver holds no bid token
+        "drains_house",  # withdrawal empties the auction house's token balance
+    ),
+    "settle_auction": (
+        # Storage access differs with and without a bid, so the lot's receiver and the owner-only
+        # buffer have a term for each
+        "has_bid",
+        "winner_is_contract",  # NFT delivered to a contract, through `onERC721Received`
+        "winner_first_token",  # winner holds no Frok yet
+        "refund_cold",  # winner's escrow, `max(max_bid, bid)`, less the price credited to a zero `pending_returns`
+        "refund_warm",  # ... to a non-zero `pending_returns`
+        "clears_max_bid",  # won by a proxy bid, `max_bid` is reset
+        "by_winner",  # settled by the winner, whose account is already warm
+        "proceeds_first",  # owner and proceeds receiver hold no bid token yet
+        "in_owner_window",  # settled by the owner within the owner-only buffer
+        "owner_first_token",  # no bid, the owner receives the lot and holds no Frok yet
+        "unsold_in_owner_window",  # no bid, settled within the owner-only buffer
+    ),
+    "create_auction": (
+        "after_lot_zero",  # `auction.nft_id` and the house's `ids_by_owner` slot are written for the first time
+        "previous_unsold",  # no bid fields to clear, so no storage refunds
+    ),
+}
+SIGNATURES = {
+    "create_bid": "create_bid(uint256,uint256)",
+    "set_max_bid": "set_max_bid(uint256,uint256)",
+    "withdraw": "withdraw()",
+    "settle_auction": "settle_auction()",
+    "create_auction": "create_auction()",
+}
+
+
+def create_bid_features(
+    auction: dict,
+    config: dict,
+    timestamp: int,
+    amount: int,
+    bidder_balance: int,
+    house_balance: int,
+    leader_pending: int = 0,
+    leader_balance: int = 1,
+    max_bid: int = 0,
+    is_leader: bool = False,
+    bidder_pending: int = 0,
+    proxy: bool = False,
+) -> dict:
+    """
+    @dev Features of a bid of `amount` mined at `timestamp`, from `auction()`, the unpacked config
+      (see `scripts.client.unpack_config`), `max_bid()`, the token balances of the bidder, the
+      auction house and the current leader and the `pending_returns` of the leader and the bidder.
+      With `proxy`, of a `set_max_bid` of `amount`.
+    """
+
+    first = auction["bid"] == 0
+    raises = proxy and is_leader
+    covered = not first and not is_leader and max_bid >= amount
+    push = not first and not raises and not covered and config["push_refunds"]
+    covered_push = covered and config["push_refunds"]
+    # A covered challenge is refunded to the challenger right after paying, otherwise the leader is refunded
+    if covered:
+        refunded_pending, refunded_balance = bidder_pending, bidder_balance - amount
+    else:
+        refunded_pending, refunded_balance = leader_pending, leader_balance
+    paid = amount - max(max_bid, auction["bid"]) if raises else amount
+    return {
+        "first": first,
+        "extending": not raises and auction["end_time"] - timestamp < config["time_buffer"],
+        "house_empty": house_balance == 0,
+        # A covered challenge pushed back leaves the bidder's balance as it was
+        "drains_balance": not covered_push and bidder_balance == paid,
+        "pending_cold": not first and not raises and not config["push_refunds"] and refunded_pending == 0,
+        "push": push,
+        "push_to_empty": push and refunded_balance == 0,
+        "covered": covered,
+        "covered_push": covered_push,
+        "clears_max_bid": not proxy and not covered and max_bid > 0,
+        "sets_max_bid": proxy and not covered,
+        "replaces_max_bid": proxy and not covered and max_bid > 0,
+        "raises": raises,
+    }
+
+
+def withdraw_features(pending: int, receiver_balance: int, house_balance: int) -> dict:
+    return {"receiver_empty": receiver_balance == 0, "drains_house": pending == house_balance}
+
+
+def settle_features(
+    auction: dict,
+    timestamp: int,
+    by_owner: bool,
+    winner_is_contract: bool = False,
+    receiver_tokens: int = 1,
+    winner_pending: int = 0,
+    proceeds_balances: tuple = (1, 1),
+    owner_buffer: int = 7200,
+    max_bid: int = 0,
+    by_winner: bool = False,
+) -> dict:
+    """
+    @dev `receiver_tokens` is the Frok balance of the winner, or of the owner without a bid.
+      `by_winner` when the winner sends the settlement itself.
+    """
+
+    has_bid = auction["bid"] > 0
+    refund = has_bid and max(max_bid, auction["bid"]) > auction["price"]
+    in_owner_window = by_owner and timestamp < auction["end_time"] + owner_buffer
+    return {
+        "has_bid": has_bid,
+        "winner_is_contract": has_bid and winner_is_contract,
+        "winner_first_token": has_bid and receiver_tokens == 0,
+        "refund_cold": refund and winner_pending == 0,
+        "refund_warm": refund and winner_pending > 0,
+        "clears_max_bid": max_bid > 0,
+        "by_winner": has_bid and by_winner,
+        "proceeds_first": has_bid and 0 in proceeds_balances,
+        "in_owner_window": has_bid and in_owner_window,
+        "owner_first_token": not has_bid and receiver_tokens == 0,
+        "unsold_in_owner_window": not has_bid and in_owner_window,
+    }
+
+
+def create_auction_features(auction: dict) -> dict:
+    return {"after_lot_zero": auction["nft_id"] == 0, "previous_unsold": auction["bid"] == 0}
+
+
+def calldata(entry_point: str, *args) -> bytes:
+    signature = SIGNATURES[entry_point]
+    types = signature[signature.index("(") + 1 : -1].split(",") if args else []
+    return function_signature_to_4byte_selector(signature) + encode(types, list(args))
+
+
+def intrinsic_gas(data: bytes) -> int:
+    return TX_BASE_GAS + calldata_gas(data)
+
+
+class GasModel:
+    def __init__(self, terms: dict):
+        self.terms = terms  # entry point -> {"base": gas, feature: gas}
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "GasModel":
+        return cls(json.loads(Path(path).read_text()))
+
+    def save(self, path: Path = MODEL_PATH):
+        Path(path).write_text(json.dumps(self.terms, indent=2) + "\n")
+
+    @classmethod
+    def fit(cls, samples: list) -> "GasModel":
+        """
+        @dev Least squares fit of `(entry point, features, execution gas)` samples.
+        """
+
+        import numpy as np
+
+        terms = {}
+        for entry_point, names in FEATURES.items():
+            rows = [(features, gas) for name, features, gas in samples if name == entry_point]
+            if not rows:
+                continue
+            x = np.array([[1, *(int(features[name]) for name in names)] for features, _ in rows], dtype=float)
+            y = np.array([gas for _, gas in rows], dtype=float)
+            coefficients = np.linalg.lstsq(x, y, rcond=None)[0]
+            terms[entry_point] = {name: round(value) for name, value in zip(("base", *names), coefficients)}
+        return cls(terms)
+
+    def execution_gas(self, entry_point: str, features: dict) -> int:
+        terms = self.terms[entry_point]
+        return terms["base"] + sum(terms[name] for name, enabled in features.items() if enabled)
+
+    def predict(self, entry_point: str, features: dict, data: bytes | None = None) -> int:
+        return intrinsic_gas(calldata(entry_point) if data is None else data) + self.execution_gas(entry_point, features)
+
+    def create_bid(self, nft_id: int, amount: int, **features) -> int:
+        return self.predict("create_bid", features, calldata("create_bid", nft_id, amount))
+
+    def set_max_bid(self, nft_id: int, amount: int, **features) -> int:
+        return self.predict("create_bid", features, calldata("set_max_bid", nft_id, amount))
+
+    def withdraw(self, **features) -> int:
+        return self.predict("withdraw", features)
+
+    def settle_auction(self, **features) -> int:
+        return self.predict("settle_auction", features)
+
+    def create_auction(self, **features) -> int:
+        return self.predict("create_auction", features)
+
+
+def gas_limit(predicted: int, margin_percentage: int = GAS_MARGIN_PERCENTAGE) -> int:
+    return predicted * (100 + margin_percentage) // 100
+
+
+### CALIBRATION ###
+
+
+class Recorder:
+    """
+    @dev Sends transactions with features read from the chain right before, and keeps
+      `(entry point, features, execution gas)` samples and the receipts.
+    """
+
+    def __init__(self, auction, token, deployer):
+        from ape import project
+
+        self.auction = auction
+        self.token = token
+        self.deployer = deployer
+        self.nft = project.Frok.at(auction.nft())
+        self.samples = []
+        self.receipts = []
+
+    def record(self, entry_point: str, features: dict, receipt):
+        data = bytes(receipt.transaction.data)
+        self.samples.append((entry_point, features, receipt.gas_used - intrinsic_gas(data)))
+        self.receipts.append((entry_point, features, data, receipt.gas_used))
+        return receipt
+
+    def bid(self, bidder, amount: int, timestamp: int | None = None, proxy: bool = False):
+        from ape import chain
+
+        from scripts.client import unpack_config
+
+        auction = self.auction.auction()
+        leader, max_bid = auction["bidder"], self.auction.max_bid()
+        is_leader = bidder.address == leader
+        # Approved exactly, a leader raising its max bid only pays the difference
+        paid = amount - max(max_bid, auction["bid"]) if proxy and is_leader else amount
+        self.token.approve(self.auction, paid, sender=bidder)
+        if timestamp is not None:
+            chain.pending_timestamp = timestamp
+        features = create_bid_features(
+            auction,
+            unpack_config(self.auction.config()),
+            chain.pending_timestamp,
+            amount,
+            self.token.balanceOf(bidder),
+            self.token.balanceOf(self.auction),
+            self.auction.pending_returns(leader),
+            self.token.balanceOf(leader),
+            max_bid,
+            is_leader,
+            self.auction.pending_returns(bidder),
+            proxy,
+        )
+        if proxy:
+            return self.record("create_bid", features, self.auction.set_max_bid(auction["nft_id"], amount, sender=bidder))
+        return self.record("create_bid", features, self.auction.create_bid(auction["nft_id"], amount, sender=bidder))
+
+    def withdraw(self, bidder):
+        features = withdraw_features(
+            self.auction.pending_returns(bidder), self.token.balanceOf(bidder), self.token.balanceOf(self.auction)
+        )
+        return self.record("withdraw", features, self.auction.withdraw(sender=bidder))
+
+    def settle(self, sender, timestamp: int):
+        from ape import chain
+
+        auction = self.auction.auction()
+        winner = auction["bidder"]
+        receiver = winner if auction["bid"] else self.auction.owner()
+        chain.pending_timestamp = timestamp
+        features = settle_features(
+            auction,
+            timestamp,
+            sender.address == self.auction.owner(),
+            winner_is_contract=bool(chain.provider.get_code(winner)),
+            receiver_tokens=self.nft.balanceOf(receiver),
+            winner_pending=self.auction.pending_returns(winner),
+            proceeds_balances=(
+                self.token.balanceOf(self.auction.owner()),
+                self.token.balanceOf(self.auction.proceeds_receiver()),
+            ),
+            max_bid=self.auction.max_bid(),
+            by_winner=sender.address == winner,
+        )
+        return self.record("settle_auction", features, self.auction.settle_auction(sender=sender))
+
+    def create_auction(self):
+        features = create_auction_features(self.auction.auction())
+        return self.record("create_auction", features, self.auction.create_auction(sender=self.deployer))
+
+
+def play_auctions(deployer, split_recipient, push: bool, seed: int = 0) -> Recorder:
+    """
+    @dev Auctions that together cover every feature: a bid war with cold and warm refunds and
+      extensions, a bidder betting their whole balance, a contract winner, settlements without
+      bids, single bids, proxy bids and withdrawals that empty balances. Amounts, the length of the bid war,
+      when it starts extending and who settles when are drawn from `seed`.
+    """
+
+    import random
+
+    from ape import project
+
+    from scripts.deploy import deploy_auction_house, funded_bidders
+
+    rng = random.Random(seed)
+    auction, token = deploy_auction_house(deployer, split_recipient)
+    auction.set_push_refunds(push, sender=deployer)
+    recorder = Recorder(auction, token, deployer)
+    bidders = funded_bidders(token, deployer, 4, 10**24)
+    increment = auction.min_bid_increment_percentage()
+
+    def next_amount(amount: int) -> int:
+        return amount + amount * increment // 100 + rng.randint(1, 10**6)
+
+    def settle():
+        # The owner right after `end_time`, or anybody once the owner-only buffer is over
+        late = rng.random() < 0.5
+        recorder.settle(bidders[2] if late else deployer, auction.auction()["end_time"] + (7200 if late else 1))
+        recorder.create_auction()
+
+    # Bid war, the last rounds inside `time_buffer`
+    rounds = rng.randint(4, 12)
+    extending_from = rng.randint(1, rounds)
+    amount = 100 + rng.randint(0, 1000)
+    for i in range(rounds):
+        timestamp = None
+        if i >= extending_from:
+            timestamp = auction.auction()["end_time"] - rng.randint(1, auction.time_buffer() - 1)
+        recorder.bid(rng.choice([bidder for bidder in bidders[:3] if bidder.address != auction.auction()["bidder"]]), amount, timestamp)
+        amount = next_amount(amount)
+    # A bidder betting everything, then outbid into an empty balance
+    all_in = funded_bidders(token, deployer, 1, amount)[0]
+    recorder.bid(all_in, amount)
+    recorder.bid(bidders[3], next_amount(amount))
+    settle()
+
+    # A contract wins
+    contract_bidder = deployer.deploy(project.ContractBidder)
+    token.mint(contract_bidder, 10**24, sender=deployer)
+    recorder.bid(bidders[0], 100 + rng.randint(0, 1000))
+    # Not recorded, the bid goes through `ContractBidder`'s own call
+    contract_bidder.bid(auction, token, auction.auction()["nft_id"], next_amount(auction.auction()["bid"]), sender=deployer)
+    settle()
+
+    # Nobody bids, the lots go to the owner
+    for _ in range(rng.randint(1, 3)):
+        settle()
+
+    # A single bid pays its own price, from a bidder who already won a lot
+    recorder.bid(bidders[3], 100 + rng.randint(0, 1000))
+    settle()
+
+    # The winner may still be owed `pending_returns` from the first auction
+    recorder.bid(bidders[1], 100 + rng.randint(0, 1000))
+    recorder.bid(bidders[0], next_amount(auction.auction()["bid"]))
+    settle()
+
+    # Proxy bids: challenges the max bid covers (one with a bidder's whole balance), max bids
+    # raised, replaced and cleared, won by a max bid or a plain bid. Fresh bidders leave some
+    # refunds cold
+    def covered_amount() -> int:
+        bid = auction.auction()["bid"]
+        return bid + bid * increment // 100 + rng.randint(1, bid // 10)
+
+    proxy_bidders = []
+    for _ in range(2):
+        fresh = funded_bidders(token, deployer, 2, 10**24)
+        proxy_bidders.extend(fresh)
+        pool = bidders + fresh
+        rng.shuffle(pool)
+        leader, challenger, proxy_challenger, rival = pool[:4]
+        max_bid = (200 + rng.randint(0, 1000)) * rng.randint(20, 40)
+        recorder.bid(leader, max_bid, proxy=True)
+        recorder.bid(challenger, 200 + rng.randint(0, 1000))
+        recorder.bid(challenger, covered_amount())
+        recorder.bid(proxy_challenger, covered_amount(), proxy=True)
+        amount = covered_amount()
+        proxy_bidders.extend(funded_bidders(token, deployer, 1, amount))
+        recorder.bid(proxy_bidders[-1], amount)
+        max_bid = next_amount(max_bid)
+        recorder.bid(leader, max_bid, proxy=True)
+        max_bid = next_amount(max_bid)
+        recorder.bid(rival, max_bid, proxy=True)
+        amount = next_amount(max_bid)
+        recorder.bid(challenger, amount)
+        if rng.random() < 0.5:
+            recorder.bid(challenger, amount * 2, proxy=True)
+            end_time = auction.auction()["end_time"]
+            recorder.bid(proxy_challenger, covered_amount(), end_time - rng.randint(1, auction.time_buffer() - 1))
+        settle()
+
+    # Not recorded, so that the last recorded withdrawal empties the auction house
+    if auction.pending_returns(contract_bidder):
+        auction.withdraw_multiple([contract_bidder], sender=deployer)
+    for bidder in (all_in, *proxy_bidders, *bidders):
+        if auction.pending_returns(bidder):
+            recorder.withdraw(bidder)
+    return recorder
+
+
+def calibration_samples(deployer, split_recipient, seeds=range(4)) -> list:
+    samples = []
+    for seed in seeds:
+        for push in (False, True):
+            samples.extend(play_auctions(deployer, split_recipient, push, seed).samples)
+    return samples
+
+
+def errors(model: GasModel, recorder: Recorder) -> list:
+    """
+    @dev `(entry point, features, predicted, actual)` for every recorded transaction.
+    """
+
+    return [
+        (entry_point, features, model.predict(entry_point, features, data), gas_used)
+        for entry_point, features, data, gas_used in recorder.receipts
+    ]
+
+
+@click.group()
+def cli():
+    pass
+
+
+def _commands():
+    from ape import accounts
+    from ape.cli import ConnectedProviderCommand
+
+    @cli.command(cls=ConnectedProviderCommand)
+    def calibrate():
+        """
+        Fit the model on a local chain and write scripts/gas_model.json.
+        """
+
+        model = GasModel.fit(calibration_samples(accounts.test_accounts[0], accounts.test_accounts[1]))
+        model.save()
+        for entry_point, terms in model.terms.items():
+            click.echo(f"{entry_point}: {terms}")
+
+    @cli.command(cls=ConnectedProviderCommand)
+    @click.option("--seed", default=7, show_default=True, help="Scenario seed, different from the calibration ones")
+    def check(seed):
+        """
+        Compare predictions of the saved model with fresh receipts.
+        """
+
+        model = GasModel.load()
+        worst = 0
+        for push in (False, True):
+            recorder = play_auctions(accounts.test_accounts[0], accounts.test_accounts[1], push, seed)
+            for entry_point, features, predicted, actual in errors(model, recorder):
+                worst = max(worst, abs(predicted - actual))
+                enabled = ",".join(name for name, value in features.items() if value) or "-"
+                click.echo(f"{entry_point:>16} {actual:>9,} {predicted - actual:>+7}  {enabled}")
+        click.echo(f"max error: {worst} gas")
+        if worst > MAX_ERROR:
+            raise click.ClickException(f"model is off by more than {MAX_ERROR} gas, run `ape run gas_model calibrate`")
+
+
+try:
+    _commands()
+except ImportError:  # the model itself does not need ape
+    pass
@@ -0,0 +1,308 @@
+"""
+Asyncio keeper that rolls the auction house over as soon as the chain allows it.
+
+The keeper follows `auction().end_time` through `AuctionCreated`, `AuctionExtended` and
+`AuctionSettled` logs, and submits `settle_auction` (and `create_auction` when running as
+the owner) as soon as the next block, expected one block time after the head, makes them valid.
+Rejected submissions, and submissions still pending after the receipt timeout, are replaced with
+the same nonce and bumped fees.
+
+Usage: ape run keeper --auction <address> --account <alias> --network <network>
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import click
+from ape import chain, project
+from ape.cli import ConnectedProviderCommand, account_option
+from ape.exceptions import ApeException, ContractLogicError
+from web3.exceptions import TransactionNotFound
+
+AUCTION_SETTLEMENT_ONLY_OWNER_BUFFER = 7200
+METRICS_WINDOW = 1000
+# Recent blocks the block time is estimated from
+BLOCK_TIME_SAMPLES = 10
+# Blocks to wait for a receipt before replacing the transaction
+RECEIPT_TIMEOUT_BLOCKS = 3
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RolloverMetrics:
+    # Seconds between `end_time` and the block that settled the auction
+    settle_latency: deque = field(default_factory=lambda: deque(maxlen=METRICS_WINDOW))
+    # Seconds between `end_time` and the block that created the next auction
+    rollover_latency: deque = field(default_factory=lambda: deque(maxlen=METRICS_WINDOW))
+    rollovers: int = 0
+    submissions: int = 0
+    replacements: int = 0
+    failures: int = 0
+
+    def summary(self) -> dict:
+        return {
+            "rollovers": self.rollovers,
+            "submissions": self.submissions,
+            "replacements": self.replacements,
+            "failures": self.failures,
+            "last_settle_latency": self.settle_latency[-1] if self.settle_latency else None,
+            "max_settle_latency": max(self.settle_latency, default=None),
+            "last_rollover_latency": self.rollover_latency[-1] if self.rollover_latency else None,
+            "max_rollover_latency": max(self.rollover_latency, default=None),
+        }
+
+
+class Keeper:
+    def __init__(
+        self,
+        auction,
+        sender,
+        poll_interval: float = 1.0,
+        max_retries: int = 5,
+        fee_bump_percentage: int = 13,
+        max_fee: int | None = None,
+        block_time: float | None = None,
+        receipt_timeout: float | None = None,
+    ):
+        """
+        @dev `block_time` defaults to the median interval of recent blocks, measured in `sync`,
+          and `receipt_timeout` to `RECEIPT_TIMEOUT_BLOCKS` block times.
+        """
+
+        assert fee_bump_percentage >= 10, "Replacements need at least a 10% fee bump"
+
+        self.auction = auction
+        self.sender = sender
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.fee_bump_percentage = fee_bump_percentage
+        self.max_fee = max_fee
+        self.block_time = block_time
+        self.receipt_timeout = receipt_timeout
+        self.metrics = RolloverMetrics()
+
+        self.is_owner = False
+        self.end_time = 0
+        self.live = False
+        self.stopped = False
+        self._last_block = -1
+        self._ended_at = 0
+
+    async def run(self):
+        await self.sync()
+        while not self.stopped:
+            await self.tick()
+            await asyncio.sleep(self.poll_interval)
+
+    async def sync(self):
+        """
+        @dev Load the current auction state. Called once, later updates come from logs.
+        """
+
+        auction, paused, owner, head = await asyncio.gather(
+            self._call(self.auction.auction),
+            self._call(self.auction.paused),
+            self._call(self.auction.owner),
+            self._call(lambda: chain.blocks.head),
+        )
+        self.is_owner = owner == self.sender.address
+        self.end_time = auction["end_time"]
+        self.live = paused and not auction["settled"]
+        self._last_block = head.number
+        if self.block_time is None:
+            self.block_time = await self._call(lambda: self._estimate_block_time(head.number))
+        if self.receipt_timeout is None:
+            self.receipt_timeout = RECEIPT_TIMEOUT_BLOCKS * self.block_time
+
+    @staticmethod
+    def _estimate_block_time(head_number: int) -> float:
+        start = max(head_number - BLOCK_TIME_SAMPLES, 0)
+        timestamps = [block.timestamp for block in chain.blocks.range(start, head_number + 1)]
+        intervals = [later - earlier for earlier, later in zip(timestamps, timestamps[1:])]
+        # Blocks never share a timestamp, so the next one is at least a second away
+        return max(statistics.median(intervals), 1) if intervals else 1
+
+    async def tick(self):
+        """
+        @dev Process new blocks and submit whatever became valid in the next block.
+        """
+
+        if self._last_block < 0:
+            await self.sync()
+
+        head = await self._call(lambda: chain.blocks.head)
+        if head.number > self._last_block:
+            await self._apply_logs(self._last_block + 1, head.number)
+            self._last_block = head.number
+
+        # Submitting now lands in the next block, expected one block time after the head.
+        # A block that comes early just makes the submission revert, the next tick retries.
+        next_timestamp = head.timestamp + self.block_time
+        if self.live and self._can_settle(next_timestamp):
+            await self._settle()
+        if not self.live and self.is_owner and not self.stopped:
+            await self._create()
+
+    def _can_settle(self, timestamp: int) -> bool:
+        if timestamp <= self.end_time:
+            return False
+        return self.is_owner or timestamp >= self.end_time + AUCTION_SETTLEMENT_ONLY_OWNER_BUFFER
+
+    async def _apply_logs(self, start_block: int, stop_block: int):
+        logs = []
+        for event in (self.auction.AuctionCreated, self.auction.AuctionExtended, self.auction.AuctionSettled):
+            logs.extend(await self._call(lambda e=event: list(e.range(start_block, stop_block + 1))))
+
+        for log in sorted(logs, key=lambda log: (log.block_number, log.log_index)):
+            if log.event_name == "AuctionCreated":
+                self.end_time = log.end_time
+                self.live = True
+            elif log.event_name == "AuctionExtended":
+                self.end_time = log.end_time
+                logger.info("auction %s extended to %s", log.nft_id, log.end_time)
+            else:
+                self.live = False
+
+    async def _settle(self):
+        receipt = await self._submit("settle_auction")
+        if receipt is None:
+            return
+        self.live = False
+        self._ended_at = self.end_time
+        self.metrics.settle_latency.append(receipt.timestamp - self.end_time)
+        logger.info("settled in block %s, %ss after end_time", receipt.block_number, receipt.timestamp - self.end_time)
+
+    async def _create(self):
+        receipt = await self._submit("create_auction")
+        if receipt is None:
+            return
+        self.live = True
+        self.end_time = self.auction.AuctionCreated.from_receipt(receipt)[0].end_time
+        self.metrics.rollovers += 1
+        if self._ended_at:
+            self.metrics.rollover_latency.append(receipt.timestamp - self._ended_at)
+        logger.info("created auction in block %s ending at %s", receipt.block_number, self.end_time)
+
+    async def _submit(self, method_name: str):
+        """
+        @dev Send a transaction, replacing it with bumped fees when it is rejected or not mined
+          within `receipt_timeout`. Reverts are not retried since a higher fee would not change
+          the outcome.
+        """
+
+        method = getattr(self.auction, method_name)
+        nonce, base_fee, priority_fee = await asyncio.gather(
+            self._call(lambda: self.sender.nonce),
+            self._call(lambda: chain.provider.base_fee),
+            self._call(lambda: chain.provider.priority_fee),
+        )
+        max_fee = self.max_fee if self.max_fee is not None else 2 * base_fee + priority_fee
+        priority_fee = min(priority_fee, max_fee)
+
+        sent = []  # Every version of the transaction, any of them may be the one mined
+        for attempt in range(self.max_retries + 1):
+            try:
+                receipt = await self._call(
+                    lambda: method(
+                        sender=self.sender,
+                        nonce=nonce,
+                        max_fee=max_fee,
+                        max_priority_fee=priority_fee,
+                        required_confirmations=0,
+                    )
+                )
+            except ContractLogicError as err:
+                self.metrics.failures += 1
+                await self._handle_revert(method_name, err)
+                return None
+            except ApeException as err:
+                logger.warning("%s attempt %s failed: %s", method_name, attempt, err)
+                receipt = await self._wait_for_receipt(sent, 0)
+            else:
+                # Counted once the node accepted the transaction
+                self.metrics.submissions += 1
+                if attempt:
+                    self.metrics.replacements += 1
+                sent.append(receipt.txn_hash)
+                receipt = await self._wait_for_receipt(sent, self.receipt_timeout)
+                if receipt is None:
+                    logger.warning("%s attempt %s not mined after %ss", method_name, attempt, self.receipt_timeout)
+
+            if receipt is not None:
+                return receipt
+            max_fee = max_fee * (100 + self.fee_bump_percentage) // 100 + 1
+            priority_fee = priority_fee * (100 + self.fee_bump_percentage) // 100 + 1
+
+        self.metrics.failures += 1
+        logger.error("%s not mined after %s attempts", method_name, self.max_retries + 1)
+        return None
+
+    async def _wait_for_receipt(self, txn_hashes: list, timeout: float):
+        """
+        @dev Poll until one of `txn_hashes` is mined, or return None after `timeout` seconds.
+          A replacement that lost the race with an earlier version is found here too.
+        """
+
+        deadline = time.monotonic() + timeout
+        while True:
+            for txn_hash in txn_hashes:
+                receipt = await self._call(lambda h=txn_hash: self._mined_receipt(h))
+                if receipt is not None:
+                    return receipt
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+
+    @staticmethod
+    def _mined_receipt(txn_hash):
+        try:
+            chain.provider.web3.eth.get_transaction_receipt(txn_hash)
+        except TransactionNotFound:
+            return None
+        return chain.provider.get_receipt(txn_hash)
+
+    async def _handle_revert(self, method_name: str, err: ContractLogicError):
+        if err.revert_message == "Contract has been emergency paused":
+            logger.error("auction house emergency paused, stopping")
+            self.stopped = True
+        elif err.revert_message == "Auction is paused":
+            # Somebody else created the next auction before us
+            self.live = True
+        elif err.revert_message in ("Auction is not paused", "Auction has already been settled"):
+            # Somebody else settled before us
+            self.live = False
+        else:
+            logger.error("%s reverted: %s", method_name, err.revert_message)
+        await self.sync()
+
+    @staticmethod
+    async def _call(fn):
+        return await asyncio.to_thread(fn)
+
+
+@click.command(cls=ConnectedProviderCommand)
+@account_option()
+@click.option("--auction", "auction_address", required=True, help="VickreyAuction address")
+@click.option("--poll-interval", default=1.0, show_default=True, help="Seconds between head polls")
+@click.option("--max-retries", default=5, show_default=True, help="Fee-bumped replacements per transaction")
+@click.option("--block-time", type=float, help="Seconds between blocks  [default: measured from recent blocks]")
+@click.option("--receipt-timeout", type=float, help="Seconds to wait before replacing a pending transaction")
+def cli(account, auction_address, poll_interval, max_retries, block_time, receipt_timeout):
+    logging.basicConfig(level=logging.INFO)
+    keeper = Keeper(
+        project.VickreyAuction.at(auction_address),
+        account,
+        poll_interval=poll_interval,
+        max_retries=max_retries,
+        block_time=block_time,
+        receipt_timeout=receipt_timeout,
+    )
+    try:
+        asyncio.run(keeper.run())
+    finally:
+        click.echo(keeper.metrics.summary())
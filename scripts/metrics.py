@@ -0,0 +1,261 @@
+"""
+Prometheus metrics exporter for VickreyAuction.
+
+Follows the auction's logs and serves, in the Prometheus text format: bids per minute, gas used
+per entry point, seconds from `end_time` to settlement, extensions, the outstanding
+`pending_returns` liability (batched through `Reconciler`) and the number of `Frok` tokens held
+by the treasury. Samples are kept in rolling windows, so memory does not grow with history.
+
+Usage: ape run metrics --auction <address> [--port 9645] [--multicall <address>] [--treasury <address>]
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+from ape import chain, project
+from ape.cli import ConnectedProviderCommand
+from eth_utils import function_signature_to_4byte_selector
+
+from scripts.reconcile import Reconciler, multicall_at
+
+METRICS_WINDOW = 1000
+RATE_WINDOW = 60
+QUANTILES = (0.5, 0.9, 0.99)
+PREFIX = "vickrey_auction"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+logger = logging.getLogger(__name__)
+
+
+class Summary:
+    """
+    @dev Quantiles over the last `window` samples, with cumulative `_sum` and `_count`.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value: int):
+        self.samples.append(value)
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AuctionMetrics:
+    def __init__(self, auction, multicall, treasury: str | None = None, window: int = METRICS_WINDOW):
+        self.auction = auction
+        self.nft = project.Frok.at(auction.nft())
+        self.treasury = treasury or auction.owner()
+        self.reconciler = Reconciler(auction, multicall)
+        self.window = window
+
+        self.bids = 0
+        self.auctions_created = 0
+        self.auctions_settled = 0
+        self.extensions = 0
+        self.current_extensions = 0
+        self.gas = {}  # entry point -> Summary
+        self.settlement_delay = Summary(window)
+        self.extensions_per_auction = Summary(window)
+        self.report = None
+        self.treasury_tokens = 0
+        self.head_timestamp = 0
+
+        current = auction.auction()
+        self.end_time = current["end_time"]
+        # A challenge the leading max bid covers logs the challenger's bid and then the leader's
+        # raised bid, which is not counted as a bid of its own
+        self._leader = current["bidder"]
+        self._max_bid = auction.max_bid()
+        self._raising = None  # transaction of a covered challenge whose raised bid comes next
+        self.last_block = chain.blocks.height
+        self._bid_timestamps = deque(maxlen=window)
+        self._gas_seen = deque(maxlen=window)  # transactions already counted, `submit_bids` logs several bids
+        self._entry_points = {
+            function_signature_to_4byte_selector(method.selector): method.name
+            for method in auction.contract_type.mutable_methods
+        }
+        self._lock = threading.Lock()
+
+    def update(self, block: int | None = None):
+        """
+        @dev Apply the logs of the blocks after the last update, then refresh the state gauges.
+        """
+
+        block = chain.blocks.height if block is None else block
+        with self._lock:
+            if block > self.last_block:
+                self._apply_logs(self.last_block + 1, block)
+                self.last_block = block
+            self.head_timestamp = chain.blocks[block].timestamp
+            self.report = self.reconciler.reconcile(block)
+            self.treasury_tokens = self.nft.balanceOf(self.treasury, block_id=block)
+
+    def bids_per_minute(self) -> float:
+        since = self.head_timestamp - RATE_WINDOW
+        return sum(1 for timestamp in self._bid_timestamps if timestamp > since) * 60 / RATE_WINDOW
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+
+            def metric(name, kind, help, samples):
+                lines.append(f"# HELP {PREFIX}_{name} {help}")
+                lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+                for suffix, labels, value in samples:
+                    label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+                    lines.append(f"{PREFIX}_{name}{suffix}{{{label_text}}} {value}" if labels else f"{PREFIX}_{name}{suffix} {value}")
+
+            def summary(name, help, summaries):
+                samples = []
+                for labels, values in summaries:
+                    for q in QUANTILES:
+                        value = values.quantile(q)
+                        samples.append(("", {**labels, "quantile": q}, "NaN" if value is None else value))
+                    samples.append(("_sum", labels, values.sum))
+                    samples.append(("_count", labels, values.count))
+                metric(name, "summary", help, samples)
+
+            metric("bids_total", "counter", "Bids placed.", [("", {}, self.bids)])
+            metric("bids_per_minute", "gauge", f"Bids in the last {RATE_WINDOW} seconds, per minute.", [("", {}, self.bids_per_minute())])
+            summary(
+                "gas_used",
+                "Gas used by transactions that bid or settle, by entry point.",
+                [({"entry_point": name}, values) for name, values in sorted(self.gas.items())],
+            )
+            metric("auctions_created_total", "counter", "Auctions created.", [("", {}, self.auctions_created)])
+            metric("auctions_settled_total", "counter", "Auctions settled.", [("", {}, self.auctions_settled)])
+            summary("settlement_delay_seconds", "Seconds from end_time to the settling block.", [({}, self.settlement_delay)])
+            metric("extensions_total", "counter", "Auction extensions.", [("", {}, self.extensions)])
+            metric("current_auction_extensions", "gauge", "Extensions of the current auction.", [("", {}, self.current_extensions)])
+            summary("extensions_per_auction", "Extensions of settled auctions.", [({}, self.extensions_per_auction)])
+            if self.report is not None:
+                metric("pending_returns", "gauge", "Outstanding pending_returns liability.", [("", {}, self.report.pending_returns)])
+                metric("live_bid", "gauge", "Highest bid of the live auction.", [("", {}, self.report.live_bid)])
+                metric("token_balance", "gauge", "Bid token balance of the auction house.", [("", {}, self.report.balance)])
+                metric("liability_drift", "gauge", "Token balance minus liability, negative is insolvent.", [("", {}, self.report.drift)])
+                metric("owed_bidders", "gauge", "Bidders with pending_returns.", [("", {}, self.report.owed_bidders)])
+            metric(
+                "treasury_tokens",
+                "gauge",
+                "Frok tokens held by the treasury (length of its ids_by_owner).",
+                [("", {"treasury": self.treasury}, self.treasury_tokens)],
+            )
+            metric("last_block", "gauge", "Last block applied.", [("", {}, self.last_block)])
+            return "\n".join(lines) + "\n"
+
+    def _apply_logs(self, start_block: int, stop_block: int):
+        logs = []
+        for event in (
+            self.auction.AuctionCreated,
+            self.auction.AuctionMaxBid,
+            self.auction.AuctionBid,
+            self.auction.AuctionExtended,
+            self.auction.AuctionSettled,
+        ):
+            logs.extend(event.range(start_block, stop_block + 1))
+
+        timestamps = {}
+        for log in sorted(logs, key=lambda log: (log.block_number, log.log_index)):
+            if log.block_number not in timestamps:
+                timestamps[log.block_number] = chain.blocks[log.block_number].timestamp
+            timestamp = timestamps[log.block_number]
+
+            if log.event_name == "AuctionCreated":
+                self.auctions_created += 1
+                self.current_extensions = 0
+                self.end_time = log.end_time
+                self._leader, self._max_bid = ZERO_ADDRESS, 0
+            elif log.event_name == "AuctionMaxBid":
+                # Logged for the leading bidder, before the bid that takes the lead
+                self._leader, self._max_bid = log.bidder, log.max_bid
+            elif log.event_name == "AuctionBid":
+                if self._raising == log.transaction_hash:
+                    self._raising = None
+                    continue
+                if log.sender != self._leader and log.bid <= self._max_bid:
+                    self._raising = log.transaction_hash
+                else:
+                    self._leader = log.sender
+                self.bids += 1
+                self._bid_timestamps.append(timestamp)
+                self._observe_gas(log.transaction_hash)
+            elif log.event_name == "AuctionExtended":
+                self.extensions += 1
+                self.current_extensions += 1
+                self.end_time = log.end_time
+            else:
+                self.auctions_settled += 1
+                self._leader, self._max_bid = ZERO_ADDRESS, 0
+                self.settlement_delay.observe(timestamp - self.end_time)
+                self.extensions_per_auction.observe(self.current_extensions)
+                self._observe_gas(log.transaction_hash)
+
+    def _observe_gas(self, txn_hash: str):
+        if txn_hash in self._gas_seen:
+            return
+        self._gas_seen.append(txn_hash)
+        receipt = chain.provider.get_receipt(txn_hash)
+        # Packed calldata has no selector and is dispatched to `__default__`
+        name = self._entry_points.get(bytes(receipt.transaction.data[:4]), "__default__")
+        if name not in self.gas:
+            self.gas[name] = Summary(self.window)
+        self.gas[name].observe(receipt.gas_used)
+
+
+def handler(metrics: AuctionMetrics):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            data = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return Handler
+
+
+def serve(metrics: AuctionMetrics, host: str = "127.0.0.1", port: int = 9645) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), handler(metrics))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@click.command(cls=ConnectedProviderCommand)
+@click.option("--auction", "auction_address", required=True, help="VickreyAuction address")
+@click.option("--multicall", "multicall_address", default=None, help="aggregate3 contract (default: Multicall3)")
+@click.option("--treasury", default=None, help="Address whose Frok balance is exported (default: auction owner)")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=9645, show_default=True)
+@click.option("--poll-interval", default=5.0, show_default=True)
+def cli(auction_address, multicall_address, treasury, host, port, poll_interval):
+    logging.basicConfig(level=logging.INFO)
+    metrics = AuctionMetrics(project.VickreyAuction.at(auction_address), multicall_at(multicall_address), treasury)
+    metrics.update()
+    server = serve(metrics, host, port)
+    click.echo(f"serving metrics on http://{host}:{port}/metrics")
+    try:
+        while True:
+            time.sleep(poll_interval)
+            metrics.update()
+    finally:
+        server.shutdown()
@@ -0,0 +1,236 @@
+"""
+Batched NumPy reference model of the VickreyAuction bidding and settlement rules.
+
+Arrays are indexed by auction along axis 0 and by bid along axis 1, so a single call
+replays thousands of independent bid sequences. Every division is a floor division,
+exactly like the uint256 arithmetic in `_create_bid`, `_settle_auction` and
+`PriceProvider.get_price`, which lets the results be compared against a local chain.
+
+Usage: ape run model
+"""
+
+from dataclasses import dataclass
+
+import click
+import numpy as np
+
+PRICISION = 100
+
+# Largest bid that keeps `bid * PRICISION` inside int64. Use `dtype=object` for wei-sized amounts.
+MAX_INT64_BID = np.iinfo(np.int64).max // PRICISION
+
+# Outcome of every bid in a sequence
+PADDING = -1
+ACCEPTED = 0
+EXPIRED = 1
+BELOW_RESERVE = 2
+BELOW_MIN_INCREMENT = 3
+ABOVE_PRICE = 4
+
+REVERT_REASONS = {
+    EXPIRED: "Auction expired",
+    BELOW_RESERVE: "Must send at least reservePrice",
+    BELOW_MIN_INCREMENT: "Must send more than last bid by min_bid_increment_percentage amount",
+    ABOVE_PRICE: "Bid must be greater than or equal to price",
+}
+
+NO_BIDDER = -1
+
+
+@dataclass
+class BidResult:
+    # Final auction state, shape (n_auctions,)
+    bid: np.ndarray
+    price: np.ndarray
+    bidder: np.ndarray
+    end_time: np.ndarray
+    # Per bid, shape (n_auctions, n_bids)
+    outcome: np.ndarray
+    extended: np.ndarray
+    refund: np.ndarray  # amount credited to `pending_returns` of the outbid bidder
+    refund_to: np.ndarray  # index of the outbid bidder, NO_BIDDER if none
+
+
+@dataclass
+class SettlementResult:
+    refund: np.ndarray  # escrow - price, credited to the winner's `pending_returns`
+    owner_amount: np.ndarray
+    proceeds_receiver_amount: np.ndarray
+
+
+def _as_int_array(values, dtype):
+    array = np.asarray(values, dtype=dtype)
+    if dtype is not object and array.size and np.max(np.abs(array)) > MAX_INT64_BID:
+        raise OverflowError("values too large for int64, pass dtype=object")
+    return array
+
+
+def _column(value, n_auctions, dtype):
+    return np.broadcast_to(_as_int_array(value, dtype), (n_auctions,)).copy()
+
+
+def get_price(highest_bid, second_highest_bid, k):
+    """
+    @dev Vectorized `PriceProvider.get_price`.
+    """
+
+    highest_bid = np.asarray(highest_bid)
+    second_highest_bid = np.asarray(second_highest_bid)
+    return second_highest_bid + (k * (highest_bid - second_highest_bid)) // PRICISION
+
+
+def simulate_bids(
+    bids,
+    timestamps,
+    end_time,
+    reserve_price,
+    min_bid_increment_percentage,
+    time_buffer,
+    k,
+    bidders=None,
+    mask=None,
+    dtype=np.int64,
+):
+    """
+    @dev Replay bid sequences through `_create_bid`.
+      `bids` and `timestamps` have shape (n_auctions, n_bids). `end_time` and every config
+      value may be a scalar or one value per auction. `bidders` holds integer bidder indices
+      (defaults to the bid's position) and `mask` flags which entries are real bids.
+    """
+
+    bids = np.atleast_2d(_as_int_array(bids, dtype))
+    n_auctions, n_bids = bids.shape
+    timestamps = np.broadcast_to(_as_int_array(timestamps, dtype), bids.shape)
+    if bidders is None:
+        bidders = np.broadcast_to(np.arange(n_bids), bids.shape)
+    bidders = np.broadcast_to(np.asarray(bidders, dtype=np.int64), bids.shape)
+    if mask is None:
+        mask = np.ones(bids.shape, dtype=bool)
+    mask = np.broadcast_to(np.asarray(mask, dtype=bool), bids.shape)
+
+    end_time = _column(end_time, n_auctions, dtype)
+    reserve_price = _column(reserve_price, n_auctions, dtype)
+    min_bid_increment_percentage = _column(min_bid_increment_percentage, n_auctions, dtype)
+    time_buffer = _column(time_buffer, n_auctions, dtype)
+    k = _column(k, n_auctions, dtype)
+
+    bid = np.zeros(n_auctions, dtype=dtype)
+    price = np.zeros(n_auctions, dtype=dtype)
+    bidder = np.full(n_auctions, NO_BIDDER, dtype=np.int64)
+
+    outcome = np.full(bids.shape, PADDING, dtype=np.int8)
+    extended = np.zeros(bids.shape, dtype=bool)
+    refund = np.zeros(bids.shape, dtype=dtype)
+    refund_to = np.full(bids.shape, NO_BIDDER, dtype=np.int64)
+
+    for i in range(n_bids):
+        _bid = bids[:, i]
+        _now = timestamps[:, i]
+
+        has_bid = (bid > 0).astype(bool)
+        min_next_bid = bid + (bid * min_bid_increment_percentage) // PRICISION
+        _price = np.where(has_bid, get_price(_bid, bid, k), _bid)
+
+        # Same order as the asserts in `_create_bid`
+        code = np.select(
+            [
+                (_now >= end_time).astype(bool),
+                (_bid < reserve_price).astype(bool),
+                has_bid & (_bid < min_next_bid).astype(bool),
+                has_bid & (_bid < _price).astype(bool),
+            ],
+            [EXPIRED, BELOW_RESERVE, BELOW_MIN_INCREMENT, ABOVE_PRICE],
+            ACCEPTED,
+        )
+        code = np.where(mask[:, i], code, PADDING)
+        outcome[:, i] = code
+        accepted = code == ACCEPTED
+
+        outbid = accepted & (bidder != NO_BIDDER)
+        refund[:, i] = np.where(outbid, bid, 0)
+        refund_to[:, i] = np.where(outbid, bidder, NO_BIDDER)
+
+        bid = np.where(accepted, _bid, bid)
+        price = np.where(accepted, _price, price)
+        bidder = np.where(accepted, bidders[:, i], bidder)
+
+        _extended = accepted & (end_time - _now < time_buffer).astype(bool)
+        extended[:, i] = _extended
+        end_time = np.where(_extended, _now + time_buffer, end_time)
+
+    return BidResult(
+        bid=bid,
+        price=price,
+        bidder=bidder,
+        end_time=end_time,
+        outcome=outcome,
+        extended=extended,
+        refund=refund,
+        refund_to=refund_to,
+    )
+
+
+def settle_auctions(bid, price, bidder, proceeds_receiver_split_percentage, max_bid=0):
+    """
+    @dev Vectorized `_settle_auction` payouts.
+      The proceeds receiver gets `price * split / PRICISION` and the owner gets the remainder.
+      The winner is refunded its escrow, `max(max_bid, bid)`, above the price.
+    """
+
+    bid = np.asarray(bid)
+    price = np.asarray(price)
+    has_bidder = np.asarray(bidder) != NO_BIDDER
+    fee = (price * proceeds_receiver_split_percentage) // PRICISION
+    return SettlementResult(
+        refund=np.where(has_bidder, np.maximum(max_bid, bid) - price, 0),
+        owner_amount=price - fee,
+        proceeds_receiver_amount=fee,
+    )
+
+
+def pending_returns(result, settlement, n_bidders):
+    """
+    @dev Per auction `pending_returns` balances after settlement, shape (n_auctions, n_bidders).
+    """
+
+    n_auctions = result.bid.shape[0]
+    balances = np.zeros((n_auctions, n_bidders), dtype=result.refund.dtype)
+    rows, cols = np.nonzero(result.refund_to != NO_BIDDER)
+    np.add.at(balances, (rows, result.refund_to[rows, cols]), result.refund[rows, cols])
+    winners = np.nonzero(result.bidder != NO_BIDDER)[0]
+    np.add.at(balances, (winners, result.bidder[winners]), settlement.refund[winners])
+    return balances
+
+
+def random_bid_sequences(rng, n_auctions, n_bids, duration, reserve_price, n_bidders=5):
+    """
+    @dev Random increasing bid sequences for parameter sweeps.
+      Returns (bids, timestamps, bidders) with timestamps relative to the auction start.
+    """
+
+    steps = rng.integers(0, 30, size=(n_auctions, n_bids))
+    bids = reserve_price * (100 + np.cumsum(steps, axis=1)) // 100
+    timestamps = np.sort(rng.integers(1, duration + duration // 10, size=(n_auctions, n_bids)), axis=1)
+    bidders = rng.integers(0, n_bidders, size=(n_auctions, n_bids))
+    return bids, timestamps, bidders
+
+
+def main():
+    rng = np.random.default_rng(0)
+    duration = 3600
+    reserve_price = 10**6
+    bids, timestamps, bidders = random_bid_sequences(rng, 100_000, 20, duration, reserve_price)
+    for k in (10, 25, 50, 75, 90):
+        result = simulate_bids(
+            bids,
+            timestamps,
+            end_time=duration,
+            reserve_price=reserve_price,
+            min_bid_increment_percentage=5,
+            time_buffer=100,
+            k=k,
+            bidders=bidders,
+        )
+        extensions = result.extended.sum(axis=1)
+        discount = 1 - result.price.sum() / result.bid.sum()
+        click.echo(f"k={k:>2} mean price={result.price.mean():,.0f} discount={discount:.2%} mean extensions={extensions.mean():.2f}")
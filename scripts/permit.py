@@ -0,0 +1,46 @@
+"""
+Signing of ERC-4494 permits for `Frok`, the off-chain half of `Frok.permit`.
+
+Usage:
+    from scripts.permit import sign_permit
+    sig = sign_permit(owner, nft, spender, token_id, deadline)
+    nft.permit(spender, token_id, deadline, sig, sender=spender)
+"""
+
+from ape import chain
+from eth_account.messages import encode_typed_data
+
+
+def permit_typed_data(nft_address: str, chain_id: int, spender: str, token_id: int, nonce: int, deadline: int) -> dict:
+    return {
+        "types": {
+            "EIP712Domain": [
+                {"name": "name", "type": "string"},
+                {"name": "version", "type": "string"},
+                {"name": "chainId", "type": "uint256"},
+                {"name": "verifyingContract", "type": "address"},
+            ],
+            "Permit": [
+                {"name": "spender", "type": "address"},
+                {"name": "tokenId", "type": "uint256"},
+                {"name": "nonce", "type": "uint256"},
+                {"name": "deadline", "type": "uint256"},
+            ],
+        },
+        "primaryType": "Permit",
+        "domain": {"name": "Frok", "version": "1", "chainId": chain_id, "verifyingContract": nft_address},
+        "message": {"spender": spender, "tokenId": token_id, "nonce": nonce, "deadline": deadline},
+    }
+
+
+def sign_permit(account, nft, spender: str, token_id: int, deadline: int, nonce: int = None) -> bytes:
+    """
+    @dev ERC-4494 permit of `account` for `spender` as the `r || s || v` bytes `Frok.permit` takes.
+    """
+
+    nonce = nft.nonces(token_id) if nonce is None else nonce
+    message = encode_typed_data(
+        full_message=permit_typed_data(nft.address, chain.chain_id, str(spender), token_id, nonce, deadline)
+    )
+    signature = account.sign_message(message)
+    return signature.r + signature.s + bytes([signature.v])
@@ -0,0 +1,302 @@
+"""
+Per call frame gas profiler with a storage access report.
+
+Transactions are replayed with `debug_traceTransaction` (geth, anvil and hardhat style struct
+logs), so this needs a tracing node such as `--network ethereum:local:foundry`. Every opcode's
+gas is attributed to the call frame that spent it, and every SLOAD/SSTORE is attributed to a
+named storage variable using the Vyper storage layout and the KECCAK256 preimages seen in
+the trace. Frames are written in folded-stack format for flamegraph.pl or speedscope.
+
+Usage: ape run profile_gas <tx_hash> [<tx_hash> ...] [--folded <path>]
+"""
+
+import json
+import re
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import click
+from ape import chain, project
+from ape.cli import ConnectedProviderCommand
+from eth_utils import function_signature_to_4byte_selector
+
+CALL_OPS = {"CALL", "CALLCODE", "DELEGATECALL", "STATICCALL", "CREATE", "CREATE2"}
+HASH_OPS = {"KECCAK256", "SHA3"}
+SUCCESS_OPS = {"RETURN", "STOP", "SELFDESTRUCT"}
+INTRINSIC = "[intrinsic+refund]"
+
+# Largest distance from a named base slot that is still attributed to it (struct fields, strings, arrays)
+MAX_SLOT_OFFSET = 2**32
+
+
+@dataclass
+class ContractInfo:
+    name: str
+    selectors: dict = field(default_factory=dict)  # 4-byte selector -> method name
+    layout: dict = field(default_factory=dict)  # slot -> variable name
+
+
+@dataclass
+class StorageCounts:
+    cold_sload: int = 0
+    warm_sload: int = 0
+    cold_sstore: int = 0
+    warm_sstore: int = 0
+
+
+@dataclass
+class Profile:
+    gas_used: int
+    inclusive: dict  # frame path -> gas including children
+    exclusive: dict  # frame path -> gas spent in the frame itself
+    storage: dict  # (contract, variable) -> StorageCounts
+
+    def folded(self) -> str:
+        return "\n".join(f"{';'.join(path)} {gas}" for path, gas in self.exclusive.items() if gas > 0)
+
+    def report(self) -> str:
+        lines = [f"gas used: {self.gas_used}", "", f"{'inclusive':>10} {'self':>10}  frame"]
+        for path, gas in sorted(self.inclusive.items(), key=lambda item: item[0]):
+            lines.append(f"{gas:>10} {self.exclusive.get(path, 0):>10}  {'  ' * (len(path) - 1)}{path[-1]}")
+        lines += ["", f"{'cold SLOAD':>10} {'warm SLOAD':>10} {'cold SSTORE':>11} {'warm SSTORE':>11}  variable"]
+        for (contract, variable), counts in sorted(self.storage.items()):
+            lines.append(
+                f"{counts.cold_sload:>10} {counts.warm_sload:>10} {counts.cold_sstore:>11} "
+                f"{counts.warm_sstore:>11}  {contract}.{variable}"
+            )
+        return "\n".join(lines)
+
+
+@dataclass
+class _Frame:
+    path: tuple
+    storage_address: str
+    call_gas: int = 0  # gas left at the CALL that created the current child
+    inclusive: int = 0
+    journal: list = field(default_factory=list)  # slots first warmed in this frame
+
+
+def _word(value) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def _stack(step, position: int) -> int:
+    return _word(step["stack"][-position])
+
+
+def _memory(step, offset: int, size: int) -> bytes:
+    memory = bytes.fromhex("".join(word.removeprefix("0x") for word in step.get("memory") or []))
+    return memory[offset : offset + size].ljust(size, b"\x00")
+
+
+def _address(value: int) -> str:
+    return "0x" + value.to_bytes(32, "big")[-20:].hex()
+
+
+def _generalize(variable: str) -> str:
+    return re.sub(r"\[\+\d+\]", "[+*]", re.sub(r"\[[^+\]][^\]]*\]", "[*]", variable))
+
+
+class StorageNamer:
+    """
+    @dev Names storage slots from declared layouts and KECCAK256 preimages.
+      Vyper hashes `slot ++ key`, Solidity hashes `key ++ slot`, both are recognised.
+    """
+
+    def __init__(self, layout: dict):
+        self.layout = layout
+        self.preimages = {}
+
+    def record(self, digest: int, preimage: bytes):
+        if len(preimage) == 64:
+            self.preimages[digest] = (int.from_bytes(preimage[:32], "big"), int.from_bytes(preimage[32:], "big"))
+
+    def name(self, slot: int, depth: int = 0) -> str | None:
+        if depth > 8:
+            return None
+        if slot in self.layout:
+            return self.layout[slot]
+        if slot in self.preimages:
+            first, second = self.preimages[slot]
+            for base, key in ((first, second), (second, first)):
+                parent = self.name(base, depth + 1)
+                if parent is not None:
+                    return f"{parent}[{hex(key) if key >= 2**64 else key}]"
+        bases = [base for base in (*self.layout, *self.preimages) if 0 < slot - base < MAX_SLOT_OFFSET]
+        if bases:
+            base = max(bases)
+            parent = self.name(base, depth + 1)
+            if parent is not None:
+                return f"{parent}[+{slot - base}]"
+        return None
+
+
+def analyze(struct_logs: list, to_address: str, calldata: bytes, gas_used: int, contracts: dict) -> Profile:
+    """
+    @dev Attribute the gas and storage accesses of one traced transaction.
+      `contracts` maps lowercase addresses to `ContractInfo`.
+    """
+
+    namers = {address: StorageNamer(info.layout) for address, info in contracts.items()}
+    inclusive = defaultdict(int)
+    exclusive = defaultdict(int)
+    storage = defaultdict(StorageCounts)
+    warm = set()
+    accesses = []  # (storage address, slot, op, cold)
+
+    def label(address: str, data: bytes) -> str:
+        info = contracts.get(address)
+        name = info.name if info else address
+        method = info.selectors.get(data[:4]) if info else None
+        return f"{name}.{method}" if method else f"{name}.{data[:4].hex() or 'fallback'}"
+
+    to_address = to_address.lower()
+    root = (label(to_address, calldata),)
+    frames = [_Frame(path=root, storage_address=to_address)]
+
+    for i, step in enumerate(struct_logs):
+        frame = frames[-1]
+        next_step = struct_logs[i + 1] if i + 1 < len(struct_logs) else None
+        op = step["op"]
+
+        if op in ("SLOAD", "SSTORE"):
+            key = (frame.storage_address, _stack(step, 1))
+            cold = key not in warm
+            if cold:
+                warm.add(key)
+                frame.journal.append(key)
+            accesses.append((*key, op, cold))
+
+        elif op in HASH_OPS and next_step is not None and next_step["depth"] == step["depth"]:
+            preimage = _memory(step, _stack(step, 1), _stack(step, 2))
+            namer = namers.setdefault(frame.storage_address, StorageNamer({}))
+            namer.record(_stack(next_step, 1), preimage)
+
+        if next_step is None or next_step["depth"] < step["depth"]:
+            # Last opcode of the frame
+            frame.inclusive += step["gasCost"]
+            exclusive[frame.path] += step["gasCost"]
+            inclusive[frame.path] += frame.inclusive
+            frames.pop()
+            if op not in SUCCESS_OPS:
+                warm.difference_update(frame.journal)
+            if not frames or next_step is None:
+                break
+            parent = frames[-1]
+            if op in SUCCESS_OPS:
+                parent.journal.extend(frame.journal)
+            overhead = parent.call_gas - next_step["gas"] - frame.inclusive
+            parent.inclusive += frame.inclusive + overhead
+            exclusive[parent.path] += overhead
+
+        elif next_step["depth"] > step["depth"]:
+            # Entering a child frame
+            frame.call_gas = step["gas"]
+            if op in ("CREATE", "CREATE2"):
+                child_address, child_label = frame.storage_address, "[create]"
+            else:
+                child_address = _address(_stack(step, 2))
+                args = (4, 5) if op in ("CALL", "CALLCODE") else (3, 4)
+                child_label = label(child_address, _memory(step, _stack(step, args[0]), min(_stack(step, args[1]), 4)))
+                if op in ("DELEGATECALL", "CALLCODE"):
+                    child_address = frame.storage_address
+            frames.append(_Frame(path=frame.path + (child_label,), storage_address=child_address))
+
+        else:
+            cost = step["gas"] - next_step["gas"]
+            frame.inclusive += cost
+            exclusive[frame.path] += cost
+
+    inclusive[(INTRINSIC,)] = exclusive[(INTRINSIC,)] = gas_used - inclusive.get(root, 0)
+
+    for address, slot, op, cold in accesses:
+        info = contracts.get(address)
+        namer = namers.get(address)
+        variable = (namer.name(slot) if namer else None) or hex(slot)
+        counts = storage[(info.name if info else address, _generalize(variable))]
+        attribute = f"{'cold' if cold else 'warm'}_{op.lower()}"
+        setattr(counts, attribute, getattr(counts, attribute) + 1)
+
+    return Profile(gas_used=gas_used, inclusive=dict(inclusive), exclusive=dict(exclusive), storage=dict(storage))
+
+
+### LOCAL CHAIN ###
+
+
+def storage_layout(contract_type) -> dict:
+    """
+    @dev Slot -> variable name for a project Vyper contract, struct getters expanded to fields.
+    """
+
+    source = project.path / (contract_type.source_id or "")
+    if not source.is_file():
+        source = project.contracts_folder / (contract_type.source_id or "")
+    if source.suffix != ".vy" or not source.is_file():
+        return {}
+
+    import vvm
+
+    pragma = re.search(r"@version\s+\^?([0-9.]+)", source.read_text())
+    executable = vvm.install.get_executable(pragma.group(1)) if pragma else "vyper"
+    output = subprocess.run([str(executable), "-f", "layout", str(source)], capture_output=True, check=True, text=True)
+    storage_layout = json.loads(output.stdout)["storage_layout"]
+
+    getters = {abi.name: abi for abi in contract_type.view_methods if not abi.inputs}
+    layout = {}
+    for name, item in storage_layout.items():
+        slot = item["slot"]
+        layout[slot] = name
+        getter = getters.get(name)
+        if getter and len(getter.outputs) == 1 and getter.outputs[0].components:
+            for offset, component in enumerate(getter.outputs[0].components):
+                layout[slot + offset] = f"{name}.{component.name}"
+    return layout
+
+
+def contract_info(address: str) -> ContractInfo:
+    try:
+        contract_type = chain.contracts.instance_at(address).contract_type
+    except Exception:
+        return ContractInfo(name=address)
+    selectors = {
+        function_signature_to_4byte_selector(abi.selector): abi.name
+        for abi in (*contract_type.mutable_methods, *contract_type.view_methods)
+    }
+    return ContractInfo(name=contract_type.name, selectors=selectors, layout=storage_layout(contract_type))
+
+
+def trace(tx_hash: str) -> list:
+    return chain.provider.make_request(
+        "debug_traceTransaction", [tx_hash, {"enableMemory": True, "disableStack": False, "disableStorage": True}]
+    )["structLogs"]
+
+
+def profile(tx_hash: str, contracts: dict | None = None) -> Profile:
+    receipt = chain.provider.get_receipt(tx_hash)
+    struct_logs = trace(tx_hash)
+    if contracts is None:
+        contracts = {}
+    addresses = {receipt.receiver.lower()}
+    addresses.update(
+        _address(_stack(step, 2)) for step in struct_logs if step["op"] in CALL_OPS - {"CREATE", "CREATE2"}
+    )
+    for address in addresses - contracts.keys():
+        contracts[address] = contract_info(address)
+    return analyze(struct_logs, receipt.receiver, bytes(receipt.transaction.data), receipt.gas_used, contracts)
+
+
+@click.command(cls=ConnectedProviderCommand)
+@click.argument("tx_hashes", nargs=-1, required=True)
+@click.option("--folded", "folded_path", type=click.Path(dir_okay=False, path_type=Path), help="Folded stacks output")
+def cli(tx_hashes, folded_path):
+    contracts = {}
+    folded = []
+    for tx_hash in tx_hashes:
+        result = profile(tx_hash, contracts)
+        click.echo(f"# {tx_hash}\n{result.report()}\n")
+        folded.append(result.folded())
+    if folded_path:
+        folded_path.write_text("\n".join(folded) + "\n")
+        click.echo(f"folded stacks written to {folded_path}")
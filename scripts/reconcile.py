@@ -0,0 +1,303 @@
+"""
+Refund liability reconciler for VickreyAuction.
+
+Proves that `token.balanceOf(VickreyAuction)` covers every `pending_returns` balance plus the
+live `auction.bid`, or the leader's `max_bid` escrow for a proxy bid. Bidders are discovered from
+`AuctionBid` logs and their balances are read in large batches through a Multicall3-compatible
+`aggregate3` at a pinned block. Balances are cached, so each new block only re-reads the
+addresses its logs could have changed. Bidders that are owed nothing and do not lead are dropped
+until a log names them again, so memory follows the outstanding liability rather than history,
+and past `cache_size` tracked bidders every block is read in full instead of cached.
+
+Usage: ape run reconcile run --auction <address> [--multicall <address>]
+       ape run reconcile benchmark --bidders 100000
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import click
+from ape import accounts, chain, project
+from ape.cli import ConnectedProviderCommand
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, keccak, to_checksum_address
+
+from scripts.deploy import deploy_auction_house
+from scripts.profile_gas import storage_layout
+
+# Canonical Multicall3 deployment, available on most live networks
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+BATCH_SIZE = 1000
+REPORT_CACHE_SIZE = 64
+PENDING_CACHE_SIZE = 1_000_000
+
+PENDING_RETURNS = function_signature_to_4byte_selector("pending_returns(address)")
+BALANCE_OF = function_signature_to_4byte_selector("balanceOf(address)")
+AUCTION = function_signature_to_4byte_selector("auction()")
+MAX_BID = function_signature_to_4byte_selector("max_bid()")
+EMERGENCY_PAUSED = function_signature_to_4byte_selector("emergency_paused()")
+
+
+@dataclass(frozen=True)
+class Report:
+    block: int
+    balance: int
+    pending_returns: int
+    live_bid: int
+    bidders: int
+    owed_bidders: int
+
+    @property
+    def liability(self) -> int:
+        return self.pending_returns + self.live_bid
+
+    @property
+    def drift(self) -> int:
+        # Positive is a surplus (e.g. tokens sent directly), negative means the contract is insolvent
+        return self.balance - self.liability
+
+    def __str__(self) -> str:
+        return (
+            f"block {self.block}: balance={self.balance} pending_returns={self.pending_returns} "
+            f"live_bid={self.live_bid} liability={self.liability} drift={self.drift} "
+            f"({self.owed_bidders}/{self.bidders} bidders owed)"
+        )
+
+
+class Reconciler:
+    def __init__(self, auction, multicall, batch_size: int = BATCH_SIZE, cache_size: int = PENDING_CACHE_SIZE):
+        self.auction = auction
+        self.multicall = multicall
+        self.token = auction.token()
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+
+        self.rpc_calls = 0
+        self.bidders = set()
+        self._pending = {}  # address -> pending_returns as of `self._block`
+        self._block = -1
+        self._scanned_block = -1
+        self._leaders = {}  # nft_id -> current highest bidder, to find who was outbid
+        self._reports = OrderedDict()
+
+    def add_bidders(self, addresses):
+        """
+        @dev Track addresses that did not come from `AuctionBid` logs.
+        """
+
+        new = set(addresses) - self.bidders
+        self.bidders.update(new)
+        return new
+
+    def reconcile(self, block: int | None = None, full: bool = False) -> Report:
+        """
+        @dev Reconcile at `block` (default: head). Reports are cached per block.
+        """
+
+        block = chain.blocks.height if block is None else block
+        if not full and block in self._reports:
+            return self._reports[block]
+
+        dirty = self._scan(block)
+        cached = len(self.bidders) <= self.cache_size
+        if full or not cached or self._block < 0 or block < self._block:
+            (balance, auction, max_bid, emergency_paused), pending = self._read(block, sorted(self.bidders))
+            if not cached:
+                self._pending, self._block = {}, -1
+            elif block >= self._block:
+                self._pending, self._block = pending, block
+        else:
+            (balance, auction, max_bid, emergency_paused), changed = self._read(block, sorted(dirty))
+            self._pending.update(changed)
+            self._block = block
+            pending = self._pending
+
+        if block == self._scanned_block:
+            self._prune(pending)
+
+        # `emergency_pause` moves the live bid into `pending_returns`
+        live_bid = 0 if auction[6] or emergency_paused else max(auction[1], max_bid)
+        report = Report(
+            block=block,
+            balance=balance,
+            pending_returns=sum(pending.values()),
+            live_bid=live_bid,
+            bidders=len(self.bidders),
+            owed_bidders=sum(1 for amount in pending.values() if amount),
+        )
+        self._reports[block] = report
+        if len(self._reports) > REPORT_CACHE_SIZE:
+            self._reports.popitem(last=False)
+        return report
+
+    def _scan(self, block: int) -> set:
+        """
+        @dev Read new logs up to `block` and return the addresses whose balance may have changed.
+        """
+
+        start = self._scanned_block + 1
+        if start > block:
+            return set()
+
+        logs = []
+        for event in (self.auction.AuctionBid, self.auction.AuctionSettled, self.auction.Withdraw):
+            logs.extend(event.range(start, block + 1))
+        self.rpc_calls += 3
+        self._scanned_block = block
+
+        dirty = set()
+        for log in sorted(logs, key=lambda log: (log.block_number, log.log_index)):
+            if log.event_name == "AuctionBid":
+                previous = self._leaders.get(log.nft_id)
+                if previous is not None:
+                    dirty.add(previous)
+                self._leaders[log.nft_id] = log.sender
+                dirty.add(log.sender)
+            elif log.event_name == "AuctionSettled":
+                self._leaders.pop(log.nft_id, None)
+                dirty.add(log.winner)
+            else:
+                dirty.add(log.user)
+
+        # `emergency_pause` credits the live bidder without a log of its own
+        dirty.update(self._leaders.values())
+        self.add_bidders(dirty)
+        return dirty
+
+    def _prune(self, pending: dict):
+        """
+        @dev Stop tracking bidders owed nothing at the last scanned block. Every later credit comes
+          with a log that names them, except `emergency_pause`'s, so leaders are kept.
+        """
+
+        leaders = set(self._leaders.values())
+        idle = {address for address, amount in pending.items() if not amount and address not in leaders}
+        self.bidders -= idle
+        for address in idle:
+            self._pending.pop(address, None)
+
+    def _read(self, block: int, addresses: list):
+        auction_address = self.auction.address
+        head = [
+            (self.token, False, BALANCE_OF + encode(["address"], [auction_address])),
+            (auction_address, False, AUCTION),
+            (auction_address, False, MAX_BID),
+            (auction_address, False, EMERGENCY_PAUSED),
+        ]
+        calls = head + [(auction_address, False, PENDING_RETURNS + encode(["address"], [a])) for a in addresses]
+
+        results = []
+        for i in range(0, len(calls), self.batch_size):
+            results.extend(self.multicall.aggregate3(calls[i : i + self.batch_size], block_id=block))
+            self.rpc_calls += 1
+
+        data = [result.return_data for result in results]
+        balance = decode(["uint256"], data[0])[0]
+        auction = decode(["(uint256,uint256,uint256,uint256,uint256,address,bool)"], data[1])[0]
+        max_bid = decode(["uint256"], data[2])[0]
+        emergency_paused = decode(["bool"], data[3])[0]
+        pending = {address: decode(["uint256"], value)[0] for address, value in zip(addresses, data[4:])}
+        return (balance, auction, max_bid, emergency_paused), pending
+
+
+def multicall_at(address: str | None):
+    if address:
+        return project.Multicall.at(address)
+    if chain.provider.get_code(MULTICALL3):
+        return project.Multicall.at(MULTICALL3)
+    return accounts.test_accounts[0].deploy(project.Multicall)
+
+
+### BENCHMARK ###
+
+
+def pending_returns_slot(address: str, base: int) -> int:
+    # Vyper HashMap slots are keccak256(slot ++ key)
+    return int.from_bytes(keccak(encode(["uint256", "address"], [base, address])), "big")
+
+
+def seed_bidders(auction, token, deployer, n_bidders: int) -> list:
+    """
+    @dev Create `n_bidders` owed bidders. Writes storage directly when the provider supports it
+      (anvil, hardhat), otherwise outbids one account after another, which is slow.
+    """
+
+    addresses = [f"0x{(0xB1DD << 144) + i:040x}" for i in range(n_bidders)]
+    layout = {name: slot for slot, name in storage_layout(project.VickreyAuction.contract_type).items()}
+    try:
+        for i, address in enumerate(addresses):
+            slot = pending_returns_slot(address, layout["pending_returns"])
+            chain.provider.set_storage(auction.address, slot, (i + 1).to_bytes(32, "big"))
+        token.mint(auction, n_bidders * (n_bidders + 1) // 2, sender=deployer)
+        return [to_checksum_address(address) for address in addresses]
+    except NotImplementedError:
+        pass
+
+    bidders = []
+    amount = 100
+    for _ in range(n_bidders):
+        bidder = accounts.test_accounts.generate_test_account()
+        deployer.transfer(bidder, 10**17)
+        token.mint(bidder, amount, sender=deployer)
+        token.approve(auction, amount, sender=bidder)
+        auction.create_bid(0, amount, sender=bidder)
+        bidders.append(bidder.address)
+        amount = amount * 106 // 100
+    return bidders
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@click.option("--auction", "auction_address", required=True, help="VickreyAuction address")
+@click.option("--multicall", "multicall_address", default=None, help="aggregate3 contract (default: Multicall3)")
+@click.option("--block", type=int, default=None, help="Block to reconcile at (default: head)")
+@click.option("--batch-size", default=BATCH_SIZE, show_default=True)
+def run(auction_address, multicall_address, block, batch_size):
+    reconciler = Reconciler(project.VickreyAuction.at(auction_address), multicall_at(multicall_address), batch_size)
+    report = reconciler.reconcile(block)
+    click.echo(report)
+    if report.drift < 0:
+        raise click.ClickException(f"liability exceeds balance by {-report.drift}")
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@click.option("--bidders", "n_bidders", default=100_000, show_default=True)
+@click.option("--batch-size", default=BATCH_SIZE, show_default=True)
+@click.option("--naive-sample", default=1000, show_default=True, help="Addresses read one by one for comparison")
+def benchmark(n_bidders, batch_size, naive_sample):
+    deployer, split_recipient = accounts.test_accounts[0], accounts.test_accounts[1]
+    auction, token = deploy_auction_house(deployer, split_recipient)
+    bidders = seed_bidders(auction, token, deployer, n_bidders)
+
+    reconciler = Reconciler(auction, deployer.deploy(project.Multicall), batch_size)
+    reconciler.add_bidders(bidders)
+    rows = []
+
+    def measure(label, fn):
+        calls_before = reconciler.rpc_calls
+        start = time.perf_counter()
+        result = fn()
+        rows.append((label, time.perf_counter() - start, reconciler.rpc_calls - calls_before))
+        return result
+
+    report = measure("batched, cold", lambda: reconciler.reconcile())
+    measure("batched, same block (cached)", lambda: reconciler.reconcile())
+    chain.mine()
+    measure("batched, new empty block", lambda: reconciler.reconcile())
+
+    sample = bidders[:naive_sample]
+    start = time.perf_counter()
+    for address in sample:
+        auction.pending_returns(address)
+    elapsed = time.perf_counter() - start
+    rows.append((f"one call per address (extrapolated from {len(sample)})", elapsed * n_bidders / len(sample), n_bidders))
+
+    click.echo(report)
+    click.echo(f"{'seconds':>10} {'rpc calls':>10}  mode")
+    for label, seconds, calls in rows:
+        click.echo(f"{seconds:>10.3f} {calls:>10}  {label}")
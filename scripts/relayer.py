@@ -0,0 +1,273 @@
+"""
+Relayer for EIP-712 signed bids.
+
+Bidders sign `Bid(bidder, nft_id, amount, nonce, deadline)` off-chain with their current
+`bid_nonces`, approve the auction house for `amount` and post the signature to the relayer. The
+relayer keeps the valid bids of the live auction and, shortly before `end_time`, places only the
+second highest and the highest bid in a single `submit_bids` transaction, which is all
+`PriceProvider.get_price` needs. When the highest bid does not beat the second highest by
+`min_bid_increment_percentage`, it goes through `submit_top_bid` with the second highest as its
+price. Losing signatures never touch the chain, a bidder revokes its signatures with
+`cancel_signed_bids`.
+
+Usage: ape run relayer --auction <address> --account <alias> [--port 8645] [--submit-before 60]
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+from ape import Contract, chain, project
+from ape.cli import ConnectedProviderCommand, account_option
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_utils import to_checksum_address
+
+PRICISION = 100
+SECP256K1_HALF_N = 57896044618658097711785492504343953926418782139537452191302581570759080747168
+ERC20_VIEWS = [
+    {
+        "type": "function",
+        "name": name,
+        "stateMutability": "view",
+        "inputs": [{"name": f"_{i}", "type": "address"} for i in range(n_inputs)],
+        "outputs": [{"name": "", "type": "uint256"}],
+    }
+    for name, n_inputs in (("balanceOf", 1), ("allowance", 2))
+]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SignedBid:
+    bidder: str
+    nft_id: int
+    amount: int
+    deadline: int
+    v: int
+    r: int
+    s: int
+
+    def as_tuple(self) -> tuple:
+        return (self.bidder, self.nft_id, self.amount, self.deadline, self.v, self.r, self.s)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "SignedBid":
+        fields = json.loads(data)
+        return cls(
+            to_checksum_address(fields["bidder"]),
+            *(int(fields[name]) for name in ("nft_id", "amount", "deadline", "v", "r", "s")),
+        )
+
+
+def typed_data(
+    auction_address: str, chain_id: int, bidder: str, nft_id: int, amount: int, nonce: int, deadline: int
+) -> dict:
+    return {
+        "types": {
+            "EIP712Domain": [
+                {"name": "name", "type": "string"},
+                {"name": "version", "type": "string"},
+                {"name": "chainId", "type": "uint256"},
+                {"name": "verifyingContract", "type": "address"},
+            ],
+            "Bid": [
+                {"name": "bidder", "type": "address"},
+                {"name": "nft_id", "type": "uint256"},
+                {"name": "amount", "type": "uint256"},
+                {"name": "nonce", "type": "uint256"},
+                {"name": "deadline", "type": "uint256"},
+            ],
+        },
+        "primaryType": "Bid",
+        "domain": {"name": "VickreyAuction", "version": "1", "chainId": chain_id, "verifyingContract": auction_address},
+        "message": {"bidder": bidder, "nft_id": nft_id, "amount": amount, "nonce": nonce, "deadline": deadline},
+    }
+
+
+def sign_bid(account, auction, nft_id: int, amount: int, deadline: int, nonce: int = None) -> SignedBid:
+    nonce = auction.bid_nonces(account) if nonce is None else nonce
+    message = encode_typed_data(
+        full_message=typed_data(auction.address, chain.chain_id, account.address, nft_id, amount, nonce, deadline)
+    )
+    signature = account.sign_message(message)
+    return SignedBid(
+        account.address,
+        nft_id,
+        amount,
+        deadline,
+        signature.v,
+        int.from_bytes(signature.r, "big"),
+        int.from_bytes(signature.s, "big"),
+    )
+
+
+def signer(signed: SignedBid, auction_address: str, chain_id: int, nonce: int) -> str:
+    message = encode_typed_data(
+        full_message=typed_data(
+            auction_address, chain_id, signed.bidder, signed.nft_id, signed.amount, nonce, signed.deadline
+        )
+    )
+    return Account.recover_message(message, vrs=(signed.v, signed.r, signed.s))
+
+
+def min_next_bid(bid: int, min_bid_increment_percentage: int) -> int:
+    return bid + bid * min_bid_increment_percentage // PRICISION
+
+
+class Relayer:
+    def __init__(self, auction, sender):
+        self.auction = auction
+        self.sender = sender
+        self.token = Contract(auction.token(), abi=ERC20_VIEWS)
+        self.chain_id = chain.chain_id
+        self.bids = {}  # bidder -> their highest valid signed bid
+        self.submissions = 0
+        self._lock = threading.Lock()
+
+    def add(self, signed: SignedBid):
+        """
+        @dev Keep `signed` if the auction house would accept it now. Raises `ValueError` with the
+          contract's revert reason otherwise.
+        """
+
+        with self._lock:
+            self._validate(signed, self._state())
+            best = self.bids.get(signed.bidder)
+            if best is None or signed.amount > best.amount:
+                self.bids[signed.bidder] = signed
+
+    def select(self) -> tuple:
+        """
+        @dev The bids to submit and the runner-up to price the top bid against without placing it.
+          The runner-up is placed before the top bid if the top bid outbids it, otherwise the top
+          bid goes alone with the runner-up as its price. Bids that became invalid are dropped.
+        """
+
+        with self._lock:
+            state = self._state()
+            for bidder, signed in list(self.bids.items()):
+                try:
+                    self._validate(signed, state)
+                except ValueError:
+                    del self.bids[bidder]
+
+            ranked = sorted(self.bids.values(), key=lambda signed: signed.amount, reverse=True)
+            if len(ranked) < 2:
+                return ranked, None
+            highest, second = ranked[:2]
+            if highest.amount >= min_next_bid(second.amount, state["min_bid_increment_percentage"]):
+                return [second, highest], None
+            return [highest], second
+
+    def submit(self):
+        selected, runner_up = self.select()
+        if not selected:
+            return None
+        if runner_up is None:
+            receipt = self.auction.submit_bids([signed.as_tuple() for signed in selected], sender=self.sender)
+        else:
+            receipt = self.auction.submit_top_bid(selected[0].as_tuple(), runner_up.as_tuple(), sender=self.sender)
+        self.submissions += 1
+        with self._lock:
+            for signed in (*selected, runner_up):
+                if signed is not None:
+                    self.bids.pop(signed.bidder, None)
+        logger.info(
+            "submitted %s of the collected bids in %s, top bid %s", len(selected), receipt.txn_hash, selected[-1].amount
+        )
+        return receipt
+
+    def _state(self) -> dict:
+        return {
+            "auction": self.auction.auction(),
+            "reserve_price": self.auction.reserve_price(),
+            "min_bid_increment_percentage": self.auction.min_bid_increment_percentage(),
+            "timestamp": chain.pending_timestamp,
+        }
+
+    def _validate(self, signed: SignedBid, state: dict):
+        auction = state["auction"]
+        nonce = self.auction.bid_nonces(signed.bidder)
+        if signed.s > SECP256K1_HALF_N or signer(signed, self.auction.address, self.chain_id, nonce) != signed.bidder:
+            raise ValueError("Invalid signature")
+        if signed.deadline < state["timestamp"]:
+            raise ValueError("Signed bid expired")
+        if signed.nft_id != auction["nft_id"]:
+            raise ValueError("NFT not up for auction")
+        if state["timestamp"] >= auction["end_time"]:
+            raise ValueError("Auction expired")
+        if signed.amount < state["reserve_price"]:
+            raise ValueError("Must send at least reservePrice")
+        if auction["bid"] > 0 and signed.amount < min_next_bid(auction["bid"], state["min_bid_increment_percentage"]):
+            raise ValueError("Must send more than last bid by min_bid_increment_percentage amount")
+        if self.token.allowance(signed.bidder, self.auction) < signed.amount:
+            raise ValueError("Insufficient allowance")
+        if self.token.balanceOf(signed.bidder) < signed.amount:
+            raise ValueError("Insufficient balance")
+
+
+def handler(relayer: Relayer):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/bids":
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                relayer.add(SignedBid.from_json(self.rfile.read(int(self.headers.get("Content-Length", 0)))))
+            except (KeyError, TypeError, json.JSONDecodeError):
+                self._reply(400, {"error": "malformed bid"})
+            except ValueError as err:
+                self._reply(400, {"error": str(err)})
+            else:
+                self._reply(202, {"accepted": True})
+
+        def _reply(self, status: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return Handler
+
+
+def serve(relayer: Relayer, host: str = "127.0.0.1", port: int = 8645) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), handler(relayer))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@click.command(cls=ConnectedProviderCommand)
+@account_option()
+@click.option("--auction", "auction_address", required=True, help="VickreyAuction address")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8645, show_default=True)
+@click.option("--submit-before", default=60, show_default=True, help="Seconds before end_time to submit")
+@click.option("--poll-interval", default=1.0, show_default=True)
+def cli(account, auction_address, host, port, submit_before, poll_interval):
+    logging.basicConfig(level=logging.INFO)
+    relayer = Relayer(project.VickreyAuction.at(auction_address), account)
+    server = serve(relayer, host, port)
+    click.echo(f"collecting signed bids on http://{host}:{port}/bids")
+    try:
+        while True:
+            end_time = relayer.auction.auction()["end_time"]
+            # Submitting extends the auction by `time_buffer`, later bids are submitted in the next window
+            if relayer.bids and 0 < end_time - chain.pending_timestamp <= submit_before:
+                relayer.submit()
+            time.sleep(poll_interval)
+    finally:
+        server.shutdown()
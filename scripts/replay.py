@@ -0,0 +1,501 @@
+"""
+Production-state replay for reproducible local load tests.
+
+`record` reads the `VickreyAuction` and `Frok` logs of a deployment into a JSONL recording: a
+header with the contracts' configuration, then one line per event with its block timestamp.
+`replay` deploys fresh contracts on a local chain, maps every recorded address to a local account
+(funded with ETH and Token as needed) and re-sends the recorded actions in log order, moving the
+chain's clock so auctions start, get extended and end at the recorded times plus a fixed offset.
+Every replayed bid and settlement is checked against the recording. Proxy bids are replayed as
+`set_max_bid` from their `AuctionMaxBid` event, the bids they place are logged by that transaction
+or by the challenge they cover, so recorded bids the replayed auction already holds are not re-sent.
+
+The replayed chain is saved as a snapshot: the py-evm database of the local test provider, or
+`anvil_dumpState` on anvil. `load_snapshot` restores it in milliseconds, so tests and benchmarks
+can start from a long extension chain, hundreds of `pending_returns` or a treasury with thousands
+of `ids_by_owner` entries without replaying again.
+
+Bids placed through `submit_top_bid` were priced against a runner-up that was never placed, so
+their transaction is read at record time and they are replayed through `submit_top_bid` with
+the same runner-up, signed by its local account. Other signed bids are replayed as `create_bid`.
+
+The recording has to start at the auction house's deployment block. Contract bidders are replayed
+as plain accounts, so NFTs they could not receive are delivered directly.
+
+Usage:
+    ape run replay record --auction <address> --from-block <deployment block> --output history.jsonl --network <live network>
+    ape run replay replay history.jsonl --snapshot history.snapshot
+    ape run replay load history.snapshot
+"""
+
+import json
+import pickle
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import click
+from ape import accounts, chain, project
+from ape.cli import ConnectedProviderCommand
+from ape.types import LogFilter
+from eth_abi import decode
+from eth_account import Account
+from eth_utils import encode_hex, function_signature_to_4byte_selector, keccak, to_checksum_address
+
+from scripts.client import unpack_config
+from scripts.relayer import sign_bid
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+AUCTION_EVENTS = ("AuctionCreated", "AuctionMaxBid", "AuctionBid", "AuctionSettled", "Withdraw", "EmergencyPaused")
+CONFIG_EVENTS = (
+    "AuctionTimeBufferUpdated",
+    "AuctionReservePriceUpdated",
+    "AuctionMinBidIncrementPercentageUpdated",
+    "AuctionDurationUpdated",
+    "ProceedsReceiverSplitPercentageUpdated",
+    "PushRefundsUpdated",
+    "PriceProviderUpdated",
+)
+CONFIG_ARGS = (
+    "time_buffer",
+    "reserve_price",
+    "min_bid_increment_percentage",
+    "duration",
+    "proceeds_receiver_split_percentage",
+    "push_refunds",
+)
+ACCOUNT_INDEX_OFFSET = 10_000  # Aliases of replay accounts, clear of ape's own test accounts
+ACCOUNT_ETH = 10**18
+# Skips `eth_estimateGas`, which would run every replayed transaction twice
+REPLAY_GAS = "max"
+SIGNED_BID = "(address,uint256,uint256,uint256,uint256,uint256,uint256)"
+SUBMIT_TOP_BID = function_signature_to_4byte_selector(f"submit_top_bid({SIGNED_BID},{SIGNED_BID})")
+REPLAY_DEADLINE = 2**64  # Replayed signatures are used right away
+
+
+# Recording
+
+
+def configuration(auction, block: int) -> dict:
+    """
+    @dev The settings a fresh deployment needs to behave like `auction` at `block`.
+    """
+
+    config = unpack_config(auction.config(block_id=block))
+    price_provider = project.PriceProvider.at(auction.price_provider(block_id=block))
+    return {
+        **{name: config[name] for name in CONFIG_ARGS},
+        "k": price_provider.k(block_id=block),
+    }
+
+
+def record(auction, start_block: int, stop_block: int | None = None) -> tuple[dict, list]:
+    """
+    @dev `(header, events)` of `auction` and its `Frok` between two blocks, inclusive. Config
+      changes become one `Config` event per block holding the configuration after that block.
+    """
+
+    stop_block = chain.blocks.height if stop_block is None else stop_block
+    nft = project.Frok.at(auction.nft())
+    header = {
+        "auction": auction.address,
+        "nft": nft.address,
+        "owner": auction.owner(block_id=start_block),
+        "proceeds_receiver": auction.proceeds_receiver(block_id=start_block),
+        "from_block": start_block,
+        "to_block": stop_block,
+        "config": configuration(auction, start_block),
+    }
+
+    # One query for every event of both contracts, `eth_getLogs` scans the range once
+    abis = [getattr(auction, name).abi for name in AUCTION_EVENTS + CONFIG_EVENTS] + [nft.Transfer.abi]
+    log_filter = LogFilter(
+        addresses=[auction.address, nft.address],
+        events=abis,
+        topic_filter=[[encode_hex(keccak(text=abi.selector)) for abi in abis]],
+        start_block=start_block,
+        stop_block=stop_block,
+    )
+    logs, config_blocks = [], set()
+    for log in chain.provider.get_contract_logs(log_filter):
+        if log.event_name in CONFIG_EVENTS:
+            config_blocks.add(log.block_number)
+        else:
+            logs.append(log)
+
+    timestamps = {}
+
+    def timestamp(block: int) -> int:
+        if block not in timestamps:
+            timestamps[block] = chain.blocks[block].timestamp
+        return timestamps[block]
+
+    def runner_up(log) -> dict:
+        # Only `submit_top_bid` prices a bid against another that is not logged
+        data = bytes(chain.provider.get_receipt(log.transaction_hash).transaction.data)
+        if data[:4] != SUBMIT_TOP_BID:
+            return {}
+        signed = decode([SIGNED_BID, SIGNED_BID], data[4:])[1]
+        return {"runner_up": to_checksum_address(signed[0]), "runner_up_amount": signed[2]}
+
+    events = [
+        {
+            "block": log.block_number,
+            "log_index": log.log_index,
+            "timestamp": timestamp(log.block_number),
+            "event": log.event_name,
+            **{key: value if isinstance(value, (int, bool)) else str(value) for key, value in log.event_arguments.items()},
+            **(runner_up(log) if log.event_name == "AuctionBid" else {}),
+        }
+        for log in logs
+    ]
+    # After every other event of its block, since it holds the configuration at the end of the block
+    events.extend(
+        {"block": block, "log_index": 2**32, "timestamp": timestamp(block), "event": "Config", **configuration(auction, block)}
+        for block in config_blocks
+    )
+    events.sort(key=lambda event: (event["block"], event["log_index"]))
+    return header, events
+
+
+def write_recording(path: Path, header: dict, events: list):
+    with open(path, "w") as f:
+        f.write(json.dumps(header) + "\n")
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def read_recording(path: Path) -> tuple[dict, list]:
+    with open(path) as f:
+        header = json.loads(f.readline())
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+# Replay
+
+
+def local_account(address: str, index: int):
+    """
+    @dev Signer standing in for `address`, with a key derived from it so replays are repeatable.
+    """
+
+    key = keccak(b"frok-replay" + bytes.fromhex(address[2:]))
+    return accounts.test_accounts.init_test_account(index, Account.from_key(key).address, "0x" + key.hex())
+
+
+@dataclass
+class Replayed:
+    auction: object
+    nft: object
+    token: object
+    owner: object
+    offset: int
+    header: dict
+    accounts: dict = field(default_factory=dict)  # recorded address -> local signer
+    transactions: int = 0
+    gas: int = 0
+    mismatches: list = field(default_factory=list)
+
+    def account(self, address: str):
+        address = to_checksum_address(str(address))
+        if address == to_checksum_address(self.header["owner"]):
+            return self.owner
+        if address not in self.accounts:
+            self.accounts[address] = local_account(address, ACCOUNT_INDEX_OFFSET + len(self.accounts))
+        return self.accounts[address]
+
+    def local(self, address: str) -> str:
+        """
+        @dev Local address of a recorded contract or account.
+        """
+
+        address = to_checksum_address(str(address))
+        if address == to_checksum_address(self.header["auction"]):
+            return self.auction.address
+        if address == to_checksum_address(self.header["nft"]):
+            return self.nft.address
+        return self.account(address).address
+
+    def fund(self, address: str, tokens: int = 0):
+        """
+        @dev Give the signer for `address` ETH for gas and `tokens` Token, approved to the auction.
+        """
+
+        signer = self.account(address)
+        if signer != self.owner:
+            self.owner.transfer(signer, ACCOUNT_ETH)
+        if tokens:
+            self.token.mint(signer, tokens, sender=self.owner)
+        self.token.approve(self.auction, 2**256 - 1, sender=signer)
+
+    def send(self, timestamp: int, method, *args, sender):
+        chain.pending_timestamp = max(timestamp + self.offset, chain.pending_timestamp)
+        receipt = method(*args, sender=sender, gas=REPLAY_GAS)
+        self.transactions += 1
+        self.gas += receipt.gas_used
+        return receipt
+
+    def check(self, event: dict, logs, fields: tuple):
+        if not logs:
+            self.mismatches.append(f"block {event['block']}: no {event['event']} replayed")
+            return
+        for name in fields:
+            if getattr(logs[0], name) != event[name]:
+                self.mismatches.append(
+                    f"block {event['block']}: {event['event']}.{name} {getattr(logs[0], name)} != {event[name]}"
+                )
+
+
+def deploy(deployer, header: dict) -> tuple:
+    config = header["config"]
+    nft = deployer.deploy(project.Frok)
+    token = deployer.deploy(project.BasicERC20)
+    price_provider = deployer.deploy(project.PriceProvider, config["k"])
+    auction = deployer.deploy(
+        project.VickreyAuction,
+        nft,
+        token,
+        price_provider,
+        config["time_buffer"],
+        config["reserve_price"],
+        config["min_bid_increment_percentage"],
+        config["duration"],
+        config["proceeds_receiver_split_percentage"],
+        local_account(header["proceeds_receiver"], ACCOUNT_INDEX_OFFSET - 1),
+    )
+    if config["push_refunds"]:
+        auction.set_push_refunds(True, sender=deployer)
+    nft.set_minter(auction, sender=deployer)
+    return auction, nft, token
+
+
+def replay(deployer, header: dict, events: list) -> Replayed:
+    """
+    @dev Replay a recording on fresh contracts deployed by `deployer`, which stands in for the
+      recorded owner. Timestamps move by one offset, so the first event lands after the local head.
+    """
+
+    auction, nft, token = deploy(deployer, header)
+    state = Replayed(auction, nft, token, deployer, 0, header)
+    state.accounts[to_checksum_address(header["proceeds_receiver"])] = local_account(
+        header["proceeds_receiver"], ACCOUNT_INDEX_OFFSET - 1
+    )
+    # Funding first, so the replayed transactions keep the recorded spacing in time
+    for address, tokens in senders(header, events).items():
+        state.fund(address, tokens)
+    state.offset = max(0, chain.pending_timestamp - events[0]["timestamp"]) if events else 0
+
+    recorded_auction, recorded_nft = to_checksum_address(header["auction"]), to_checksum_address(header["nft"])
+    for event in events:
+        name, timestamp = event["event"], event["timestamp"]
+        if name == "AuctionCreated":
+            receipt = state.send(timestamp, auction.create_auction, sender=deployer)
+            state.check(event, auction.AuctionCreated.from_receipt(receipt), ("nft_id",))
+        elif name == "AuctionMaxBid":
+            # A zero max bid is logged by the plain bid that took the lead from a proxy bid
+            if event["max_bid"]:
+                receipt = state.send(
+                    timestamp, auction.set_max_bid, event["nft_id"], event["max_bid"], sender=state.account(event["bidder"])
+                )
+                state.check(event, auction.AuctionMaxBid.from_receipt(receipt), ("max_bid",))
+        elif name == "AuctionBid":
+            current = auction.auction()
+            if (current["nft_id"], current["bidder"], current["bid"]) == (
+                event["nft_id"],
+                state.local(event["sender"]),
+                event["bid"],
+            ):
+                # Placed by a replayed proxy bid, or raised by the max bid covering the previous bid
+                if current["price"] != event["price"]:
+                    state.mismatches.append(f"block {event['block']}: AuctionBid.price {current['price']} != {event['price']}")
+                continue
+            signer = state.account(event["sender"])
+            if "runner_up" in event:
+                receipt = replay_top_bid(state, event, signer)
+            else:
+                receipt = state.send(timestamp, auction.create_bid, event["nft_id"], event["bid"], sender=signer)
+            state.check(event, auction.AuctionBid.from_receipt(receipt), ("bid", "price", "extended"))
+        elif name == "AuctionSettled":
+            # The owner may settle at any time after `end_time`
+            receipt = state.send(timestamp, auction.settle_auction, sender=deployer)
+            state.check(event, auction.AuctionSettled.from_receipt(receipt), ("bid", "price"))
+        elif name == "Withdraw":
+            state.send(timestamp, auction.withdraw, state.local(event["user"]), sender=state.account(event["called_by"]))
+        elif name == "EmergencyPaused":
+            state.send(timestamp, auction.emergency_pause, sender=deployer)
+        elif name == "Config":
+            replay_config(state, event)
+        elif name == "Transfer":
+            replay_transfer(state, event, recorded_auction, recorded_nft)
+    return state
+
+
+def senders(header: dict, events: list) -> dict:
+    """
+    @dev Recorded address -> Token it needs, for every address that sends a replayed transaction.
+      Bidders need everything they ever bid, refunds are not counted on.
+    """
+
+    recorded_auction = to_checksum_address(header["auction"])
+    needs = defaultdict(int)
+    for event in events:
+        if event["event"] == "AuctionBid":
+            needs[to_checksum_address(event["sender"])] += event["bid"]
+            if "runner_up" in event:
+                # Must hold and have approved its amount, though it is not charged
+                needs[to_checksum_address(event["runner_up"])] += event["runner_up_amount"]
+        elif event["event"] == "AuctionMaxBid":
+            needs[to_checksum_address(event["bidder"])] += event["max_bid"]
+        elif event["event"] == "Withdraw":
+            needs[to_checksum_address(event["called_by"])] += 0
+        elif event["event"] == "Transfer" and recorded_auction not in (event["_from"], event["_to"]):
+            needs[to_checksum_address(event["_from"] if event["_from"] != ZERO_ADDRESS else event["_to"])] += 0
+    return needs
+
+
+def replay_top_bid(state: Replayed, event: dict, signer):
+    auction, nft_id = state.auction, event["nft_id"]
+    bid = sign_bid(signer, auction, nft_id, event["bid"], REPLAY_DEADLINE)
+    runner_up = sign_bid(state.account(event["runner_up"]), auction, nft_id, event["runner_up_amount"], REPLAY_DEADLINE)
+    return state.send(event["timestamp"], auction.submit_top_bid, bid.as_tuple(), runner_up.as_tuple(), sender=signer)
+
+
+def replay_config(state: Replayed, event: dict):
+    auction, timestamp = state.auction, event["timestamp"]
+    config = unpack_config(auction.config())
+    if any(config[name] != event[name] for name in CONFIG_ARGS):
+        state.send(timestamp, auction.set_config, *(event[name] for name in CONFIG_ARGS), sender=state.owner)
+    if project.PriceProvider.at(auction.price_provider()).k() != event["k"]:
+        price_provider = state.owner.deploy(project.PriceProvider, event["k"])
+        state.send(timestamp, auction.set_price_provider, price_provider, sender=state.owner)
+
+
+def replay_transfer(state: Replayed, event: dict, recorded_auction: str, recorded_nft: str):
+    sender, receiver = to_checksum_address(event["_from"]), to_checksum_address(event["_to"])
+    timestamp, nft = event["timestamp"], state.nft
+    # Mints for auctions and deliveries by the auction house are replayed by the auction's own calls
+    if sender == recorded_auction or (sender == ZERO_ADDRESS and receiver == recorded_auction):
+        return
+    if sender == ZERO_ADDRESS:
+        # Minted outside the auction: the recorded receiver mints it itself, keeping ids in step
+        minter = state.account(receiver)
+        state.send(timestamp, nft.set_minter, minter, sender=state.owner)
+        state.send(timestamp, nft.mint, sender=minter)
+        state.send(timestamp, nft.set_minter, state.auction, sender=state.owner)
+    elif receiver != recorded_nft:
+        state.send(timestamp, nft.transferFrom, state.local(sender), state.local(receiver), event["_tokenId"], sender=state.account(sender))
+
+
+# Snapshots
+
+
+def _py_evm_db(provider):
+    return provider.evm_backend.chain.chaindb.db.wrapped_db.kv_store
+
+
+def save_snapshot(path: Path, state: Replayed):
+    provider = chain.provider
+    if hasattr(provider, "evm_backend"):
+        backend = {"kind": "py-evm", "db": dict(_py_evm_db(provider)), "head": provider.evm_backend.take_snapshot()}
+    else:
+        backend = {"kind": "anvil", "state": provider.make_request("anvil_dumpState", [])}
+    meta = {
+        "auction": state.auction.address,
+        "nft": state.nft.address,
+        "token": state.token.address,
+        "owner": state.owner.index,
+        "offset": state.offset,
+        "header": state.header,
+        "accounts": {
+            address: (signer.index, signer.address, signer.private_key) for address, signer in state.accounts.items()
+        },
+    }
+    with open(path, "wb") as f:
+        pickle.dump({"backend": backend, "meta": meta}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_snapshot(path: Path) -> Replayed:
+    """
+    @dev Restore a snapshot saved by `save_snapshot` on the connected local chain.
+      Snapshots are pickles, only load your own.
+    """
+
+    with open(path, "rb") as f:
+        snapshot = pickle.load(f)
+    backend, meta = snapshot["backend"], snapshot["meta"]
+    provider = chain.provider
+    if backend["kind"] == "py-evm":
+        _py_evm_db(provider).update(backend["db"])
+        provider.restore(backend["head"])
+    else:
+        provider.make_request("anvil_loadState", [backend["state"]])
+
+    state = Replayed(
+        project.VickreyAuction.at(meta["auction"]),
+        project.Frok.at(meta["nft"]),
+        project.BasicERC20.at(meta["token"]),
+        accounts.test_accounts[meta["owner"]],
+        meta["offset"],
+        meta["header"],
+    )
+    # Addresses are stored, deriving them from the keys would take longer than the rest of the load
+    for address, (index, local_address, key) in meta["accounts"].items():
+        state.accounts[address] = accounts.test_accounts.init_test_account(index, local_address, key)
+    return state
+
+
+def summary(state: Replayed) -> str:
+    auction = state.auction
+    owed = sum(1 for signer in state.accounts.values() if auction.pending_returns(signer))
+    return "\n".join(
+        [
+            f"auction house   {auction.address} (current nft id {auction.auction()['nft_id']})",
+            f"accounts        {len(state.accounts)}, {owed} with pending_returns",
+            f"treasury tokens {state.nft.balanceOf(state.owner)}",
+            f"block           {chain.blocks.height}, time offset {state.offset:,}s",
+        ]
+    )
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command("record", cls=ConnectedProviderCommand)
+@click.option("--auction", "auction_address", required=True, help="VickreyAuction address")
+@click.option("--from-block", required=True, type=int, help="Deployment block of the auction house")
+@click.option("--to-block", default=None, type=int, help="Last block (default: head)")
+@click.option("--output", type=click.Path(path_type=Path), default=Path("history.jsonl"), show_default=True)
+def record_cmd(auction_address, from_block, to_block, output):
+    header, events = record(project.VickreyAuction.at(auction_address), from_block, to_block)
+    write_recording(output, header, events)
+    click.echo(f"{len(events)} events from blocks {header['from_block']}-{header['to_block']} written to {output}")
+
+
+@cli.command("replay", cls=ConnectedProviderCommand)
+@click.argument("recording", type=click.Path(exists=True, path_type=Path))
+@click.option("--snapshot", type=click.Path(path_type=Path), default=None, help="Snapshot file (default: <recording>.snapshot)")
+def replay_cmd(recording, snapshot):
+    header, events = read_recording(recording)
+    start = time.perf_counter()
+    state = replay(accounts.test_accounts[0], header, events)
+    click.echo(f"replayed {len(events)} events in {state.transactions} transactions, {state.gas:,} gas, {time.perf_counter() - start:.1f}s")
+    click.echo(summary(state))
+    for mismatch in state.mismatches:
+        click.echo(f"mismatch: {mismatch}")
+    snapshot = snapshot or recording.with_suffix(".snapshot")
+    save_snapshot(snapshot, state)
+    click.echo(f"snapshot written to {snapshot}")
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@click.argument("snapshot", type=click.Path(exists=True, path_type=Path))
+def load(snapshot):
+    chain.blocks.height  # Starts the local chain, which is not part of the load
+    start = time.perf_counter()
+    state = load_snapshot(snapshot)
+    click.echo(f"loaded in {(time.perf_counter() - start) * 1000:.0f}ms")
+    click.echo(summary(state))
+
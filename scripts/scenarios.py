@@ -0,0 +1,211 @@
+"""
+Gas benchmark scenarios on a local chain, shared by `scripts/benchmark.py` and the tests.
+
+Each scenario deploys a fresh auction house, plays the same auction under the modes being
+compared and tallies the transactions and the gas the chain spent on them, including the
+follow-up transactions (like withdrawals) a mode needs.
+"""
+
+import random
+from dataclasses import dataclass
+
+from ape import chain, project
+
+from scripts.deploy import deploy_auction_house, deploy_through_factory, funded_bidders
+from scripts.permit import sign_permit
+
+
+@dataclass
+class GasTally:
+    transactions: int = 0
+    gas: int = 0
+
+    def add(self, receipt):
+        self.transactions += 1
+        self.gas += receipt.gas_used
+        return receipt
+
+    def __str__(self) -> str:
+        return f"{self.transactions:>6} txs {self.gas:>12,} gas"
+
+
+def bid_war(auction, token, deployer, bidders, rounds: int) -> GasTally:
+    """
+    @dev Bidders take turns outbidding each other, then the auction is settled and everybody
+      still owed `pending_returns` withdraws.
+    """
+
+    tally = GasTally()
+    nft_id = auction.auction()["nft_id"]
+    amount = auction.reserve_price()
+    for i in range(rounds):
+        bidder = bidders[i % len(bidders)]
+        tally.add(token.approve(auction, amount, sender=bidder))
+        tally.add(auction.create_bid(nft_id, amount, sender=bidder))
+        amount = amount + amount * auction.min_bid_increment_percentage() // 100 + 1
+
+    chain.pending_timestamp = auction.auction()["end_time"] + 1
+    tally.add(auction.settle_auction(sender=deployer))
+    for bidder in bidders:
+        if auction.pending_returns(bidder):
+            tally.add(auction.withdraw(sender=bidder))
+    return tally
+
+
+def min_next_bid(auction) -> int:
+    bid = auction.auction()["bid"]
+    if bid == 0:
+        return auction.reserve_price()
+    return bid + bid * auction.min_bid_increment_percentage() // 100
+
+
+def settle_and_withdraw(auction, deployer, bidders, tally: GasTally):
+    chain.pending_timestamp = auction.auction()["end_time"] + 1
+    tally.add(auction.settle_auction(sender=deployer))
+    for bidder in bidders:
+        if auction.pending_returns(bidder):
+            tally.add(auction.withdraw(sender=bidder))
+
+
+def manual_bid_war(auction, deployer, bidders, values, tally: GasTally):
+    """
+    @dev Bidders take turns outbidding the leader by the minimum increment with `create_bid`, each
+      until the next bid would exceed its value. Bidding starts inside `time_buffer`, so bids extend.
+    """
+
+    nft_id = auction.auction()["nft_id"]
+    chain.pending_timestamp = auction.auction()["end_time"] - 10
+    leader, turn = None, 0
+    while True:
+        amount = min_next_bid(auction)
+        for _ in range(len(bidders)):
+            bidder, value = bidders[turn % len(bidders)], values[turn % len(bidders)]
+            turn += 1
+            if bidder != leader and value >= amount:
+                break
+        else:
+            break
+        tally.add(auction.create_bid(nft_id, amount, sender=bidder))
+        leader = bidder
+
+    settle_and_withdraw(auction, deployer, bidders, tally)
+
+
+def proxy_bid_war(auction, deployer, bidders, values, tally: GasTally):
+    """
+    @dev The same bidders each send their value once through `set_max_bid`, unless it is already
+      below the minimum next bid.
+    """
+
+    nft_id = auction.auction()["nft_id"]
+    chain.pending_timestamp = auction.auction()["end_time"] - 10
+    for bidder, value in zip(bidders, values):
+        if value >= min_next_bid(auction):
+            tally.add(auction.set_max_bid(nft_id, value, sender=bidder))
+
+    settle_and_withdraw(auction, deployer, bidders, tally)
+
+
+def bidding_modes(deployer, split_recipient, n_bidders: int, n_auctions: int, seed: int = 0) -> dict:
+    """
+    @dev `n_auctions` auctions with bidders valuing the NFT at 2-20x the reserve price, played with
+      `create_bid` bid wars and with proxy bids. Bidders approve the auction once, up front.
+      Returns the tally and the (winner's index, price) of every auction per mode.
+    """
+
+    rng = random.Random(seed)
+    multiples = [[rng.randint(2, 20) for _ in range(n_bidders)] for _ in range(n_auctions)]
+    results = {}
+    for mode, play in (("create_bid", manual_bid_war), ("set_max_bid", proxy_bid_war)):
+        auction, token = deploy_auction_house(deployer, split_recipient)
+        bidders = funded_bidders(token, deployer, n_bidders, 10**24)
+        tally, outcomes = GasTally(), []
+        for bidder in bidders:
+            tally.add(token.approve(auction, 2**256 - 1, sender=bidder))
+        for auction_multiples in multiples:
+            play(auction, deployer, bidders, [auction.reserve_price() * m for m in auction_multiples], tally)
+            settled = auction.auction()
+            outcomes.append((bidders.index(settled["bidder"]), settled["price"]))
+            auction.create_auction(sender=deployer)
+        results[mode] = (tally, outcomes)
+    return results
+
+
+def bid_costs(auction, token, deployer, bidders) -> dict:
+    """
+    @dev Gas of the single transactions of an auction: first bid, outbid, extending outbid, settle
+      and creating the next auction.
+    """
+
+    alice, bob = bidders[:2]
+    nft_id = auction.auction()["nft_id"]
+    for bidder in (alice, bob):
+        token.approve(auction, 10**24, sender=bidder)
+
+    costs = {"first bid": auction.create_bid(nft_id, 100, sender=alice).gas_used}
+    costs["outbid"] = auction.create_bid(nft_id, 200, sender=bob).gas_used
+    chain.pending_timestamp = auction.auction()["end_time"] - 1
+    costs["extending outbid"] = auction.create_bid(nft_id, 300, sender=alice).gas_used
+    chain.pending_timestamp = auction.auction()["end_time"] + 1
+    costs["settle"] = auction.settle_auction(sender=deployer).gas_used
+    costs["create auction"] = auction.create_auction(sender=deployer).gas_used
+    return costs
+
+
+def refund_modes(deployer, split_recipient, n_bidders: int, rounds: int) -> dict:
+    results = {}
+    for push in (False, True):
+        auction, token = deploy_auction_house(deployer, split_recipient)
+        auction.set_push_refunds(push, sender=deployer)
+        bidders = funded_bidders(token, deployer, n_bidders, 10**24)
+        results["push" if push else "pull"] = bid_war(auction, token, deployer, bidders, rounds)
+    return results
+
+
+def deployment_gas(contract) -> int:
+    return chain.provider.get_receipt(contract.txn_hash).gas_used
+
+
+def deployment_costs(deployer, split_recipient) -> dict:
+    """
+    @dev Gas to deploy an auction house directly and through `AuctionHouseFactory`, and what
+      bidding and settlement cost on each.
+    """
+
+    direct, token = deploy_auction_house(deployer, split_recipient)
+    costs = {"deploy VickreyAuction": deployment_gas(direct)}
+    direct_bids = bid_costs(direct, token, deployer, funded_bidders(token, deployer, 2, 10**24))
+
+    implementation = deploy_auction_house(deployer, split_recipient)[0]
+    factory = deployer.deploy(project.AuctionHouseFactory, implementation)
+    proxy, token, receipt = deploy_through_factory(deployer, split_recipient, factory)
+    costs["deploy AuctionHouseFactory (once)"] = deployment_gas(factory)
+    costs["create_auction_house"] = receipt.gas_used
+    proxy_bids = bid_costs(proxy, token, deployer, funded_bidders(token, deployer, 2, 10**24))
+
+    for step in direct_bids:
+        costs[f"{step} (direct)"] = direct_bids[step]
+        costs[f"{step} (proxy)"] = proxy_bids[step]
+    return costs
+
+
+def permit_costs(deployer, spender, recipients) -> dict:
+    """
+    @dev Gas of handing an NFT to `spender` with an `approve` transaction of the owner and with an
+      ERC-4494 permit signed off-chain, each followed by `spender`'s `transferFrom`. Both tokens are
+      the owner's last one when moved and go to fresh recipients, so only the approval differs.
+    """
+
+    nft = deployer.deploy(project.Frok)
+    for _ in range(3):
+        nft.mint(sender=deployer)
+
+    costs = {"approve": nft.approve(spender, 2, sender=deployer).gas_used}
+    costs["transferFrom after approve"] = nft.transferFrom(deployer, recipients[0], 2, sender=spender).gas_used
+    deadline = chain.pending_timestamp + 3600
+    sig = sign_permit(deployer, nft, spender, 1, deadline)
+    costs["permit"] = nft.permit(spender, 1, deadline, sig, sender=spender).gas_used
+    costs["transferFrom after permit"] = nft.transferFrom(deployer, recipients[1], 1, sender=spender).gas_used
+    costs["approve + transferFrom"] = costs["approve"] + costs["transferFrom after approve"]
+    costs["permit + transferFrom"] = costs["permit"] + costs["transferFrom after permit"]
+    return costs
@@ -0,0 +1,155 @@
+"""
+Frok holder snapshots rebuilt from `Transfer` logs.
+
+Ownership is kept in a flat NumPy array indexed by token id, holding an index into an interned
+address table, so a snapshot of the whole collection is a few bytes per token. Snapshots are
+checkpointed to `.npz` files and later runs only replay the blocks after the newest usable
+checkpoint, which also makes historical snapshots possible on non-archive nodes.
+
+Usage: ape run snapshot --nft <address> [--block <n>] [--csv holders.csv] [--parquet holders.parquet]
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import click
+import numpy as np
+from ape import chain, project
+from ape.cli import ConnectedProviderCommand
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+CHECKPOINT_DIR = Path(".snapshots")
+LOG_CHUNK_BLOCKS = 10_000
+
+
+@dataclass
+class Snapshot:
+    block: int = -1
+    owners: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint32))
+    addresses: list = field(default_factory=lambda: [ZERO_ADDRESS])  # index 0: not minted
+    _index: dict = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._index = {address: i for i, address in enumerate(self.addresses)}
+
+    def apply(self, token_ids, receivers, block: int):
+        """
+        @dev Apply transfers given in log order. Only the last transfer of each token matters.
+        """
+
+        token_ids = np.asarray(token_ids, dtype=np.int64)
+        if token_ids.size:
+            receivers = np.fromiter((self._intern(address) for address in receivers), dtype=np.uint32)
+            # Keep the last occurrence of each token id
+            unique, last = np.unique(token_ids[::-1], return_index=True)
+            if unique[-1] >= self.owners.size:
+                grown = np.zeros(max(int(unique[-1]) + 1, 2 * self.owners.size), dtype=np.uint32)
+                grown[: self.owners.size] = self.owners
+                self.owners = grown
+            self.owners[unique] = receivers[::-1][last]
+        self.block = block
+
+    def holdings(self) -> dict:
+        """
+        @dev owner -> sorted token ids.
+        """
+
+        token_ids = np.nonzero(self.owners)[0]
+        owners = self.owners[token_ids]
+        order = np.argsort(owners, kind="stable")
+        owners, token_ids = owners[order], token_ids[order]
+        boundaries = np.flatnonzero(np.diff(owners)) + 1
+        return {
+            self.addresses[group_owners[0]]: group_ids.tolist()
+            for group_owners, group_ids in zip(np.split(owners, boundaries), np.split(token_ids, boundaries))
+            if group_owners.size
+        }
+
+    def to_frame(self):
+        import pandas as pd
+
+        holdings = self.holdings()
+        return pd.DataFrame(
+            {
+                "owner": list(holdings),
+                "balance": [len(ids) for ids in holdings.values()],
+                "token_ids": list(holdings.values()),
+            }
+        )
+
+    def to_csv(self, path: Path):
+        frame = self.to_frame()
+        frame["token_ids"] = frame["token_ids"].map(lambda ids: " ".join(map(str, ids)))
+        frame.to_csv(path, index=False)
+
+    def to_parquet(self, path: Path):
+        self.to_frame().to_parquet(path, index=False)
+
+    def save(self, directory: Path) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.block}.npz"
+        np.savez_compressed(path, block=self.block, owners=self.owners, addresses=np.array(self.addresses))
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "Snapshot":
+        with np.load(path) as data:
+            return cls(block=int(data["block"]), owners=data["owners"], addresses=data["addresses"].tolist())
+
+    def _intern(self, address: str) -> int:
+        index = self._index.get(address)
+        if index is None:
+            index = self._index[address] = len(self.addresses)
+            self.addresses.append(address)
+        return index
+
+
+def latest_checkpoint(directory: Path, block: int) -> Snapshot:
+    """
+    @dev Newest checkpoint at or before `block`, or an empty snapshot.
+    """
+
+    blocks = sorted(int(path.stem) for path in directory.glob("*.npz") if path.stem.isdigit())
+    usable = [checkpoint for checkpoint in blocks if checkpoint <= block]
+    return Snapshot.load(directory / f"{usable[-1]}.npz") if usable else Snapshot()
+
+
+def build(nft, block: int | None = None, checkpoint_dir: Path | None = None) -> tuple:
+    """
+    @dev Snapshot `nft` at `block` (default: head), replaying only blocks after the newest
+      checkpoint. Returns the snapshot and the number of logs replayed.
+    """
+
+    block = chain.blocks.height if block is None else block
+    snapshot = latest_checkpoint(checkpoint_dir, block) if checkpoint_dir else Snapshot()
+
+    replayed = 0
+    checkpoint_block = snapshot.block
+    start = snapshot.block + 1
+    while start <= block:
+        stop = min(start + LOG_CHUNK_BLOCKS - 1, block)
+        logs = list(nft.Transfer.range(start, stop + 1))
+        snapshot.apply([log._tokenId for log in logs], [log._to for log in logs], stop)
+        replayed += len(logs)
+        start = stop + 1
+
+    snapshot.block = block
+    if checkpoint_dir and block > checkpoint_block:
+        snapshot.save(checkpoint_dir)
+    return snapshot, replayed
+
+
+@click.command(cls=ConnectedProviderCommand)
+@click.option("--nft", "nft_address", required=True, help="Frok address")
+@click.option("--block", type=int, default=None, help="Snapshot block (default: head)")
+@click.option("--checkpoints", "checkpoint_dir", type=click.Path(file_okay=False, path_type=Path), default=None)
+@click.option("--csv", "csv_path", type=click.Path(dir_okay=False, path_type=Path), default=None)
+@click.option("--parquet", "parquet_path", type=click.Path(dir_okay=False, path_type=Path), default=None)
+def cli(nft_address, block, checkpoint_dir, csv_path, parquet_path):
+    nft = project.Frok.at(nft_address)
+    snapshot, replayed = build(nft, block, (checkpoint_dir or CHECKPOINT_DIR) / nft.address)
+    click.echo(f"block {snapshot.block}: {len(snapshot.holdings())} holders, {replayed} transfers replayed")
+    if csv_path:
+        snapshot.to_csv(csv_path)
+    if parquet_path:
+        snapshot.to_parquet(parquet_path)
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from scripts import analytics
+
+
+# Helper methods
+
+
+def bid(auction, erc20token, bidder, amount):
+    erc20token.approve(auction, amount, sender=bidder)
+    return auction.create_bid(auction.auction()["nft_id"], amount, sender=bidder)
+
+
+def settle(chain, auction, deployer):
+    chain.pending_timestamp = auction.auction()["end_time"] + 1
+    auction.settle_auction(sender=deployer)
+
+
+@pytest.fixture(scope="function")
+def synthetic():
+    return analytics.synthetic(np.random.default_rng(3), 500, 12, n_bidders=40)
+
+
+def test_load_matches_chain(
+    chain, vickrey_auction, token, minted_erc20token_to_users, deployer, split_recipient, alice, bob, charlie
+):
+    auction, erc20token = vickrey_auction, minted_erc20token_to_users
+    start_block = chain.provider.get_receipt(auction.txn_hash).block_number
+    balances = {account: erc20token.balanceOf(account) for account in (deployer, split_recipient)}
+    token.set_minter(auction, sender=deployer)
+
+    # Sold at a split of 95, with two extensions
+    auction.create_auction(sender=deployer)
+    bid(auction, erc20token, alice, 1001)
+    chain.pending_timestamp = auction.auction()["end_time"] - 50
+    bid(auction, erc20token, bob, 2003)
+    bid(auction, erc20token, charlie, 3007)
+    settle(chain, auction, deployer)
+    auction.withdraw(sender=alice)
+    auction.withdraw(sender=bob)
+
+    # Unsold, then sold to a proxy bid at a split of 50
+    auction.create_auction(sender=deployer)
+    settle(chain, auction, deployer)
+    auction.set_config(100, 100, 5, 3600, 50, False, sender=deployer)
+    auction.create_auction(sender=deployer)
+    bid(auction, erc20token, alice, 999)
+    erc20token.approve(auction, 3000, sender=charlie)
+    auction.set_max_bid(auction.auction()["nft_id"], 3000, sender=charlie)
+    bid(auction, erc20token, bob, 1200)
+    settle(chain, auction, deployer)
+
+    events = analytics.load(auction, start_block)
+    assert events.settlements["split"].tolist() == [95, 95, 50]
+    assert events.settlements["max_bid"].tolist() == [0, 0, 3000]
+    summary = analytics.summarize(events)
+
+    # 3007 sells at 2003 + (3007 - 2003) // 2 = 2505, bob's 1200 raises charlie to 1260, which
+    # sells at 1200 + 60 // 2 = 1230 and refunds charlie's escrow above it
+    assert summary["revenue"] == 2505 + 1230
+    assert summary["owner_amount"] == erc20token.balanceOf(deployer) - balances[deployer]
+    assert summary["proceeds_receiver_amount"] == erc20token.balanceOf(split_recipient) - balances[split_recipient]
+    assert summary["proceeds_receiver_amount"] == 2505 * 95 // 100 + 1230 * 50 // 100
+    assert summary["winner_refunds"] == auction.pending_returns(charlie) == (3007 - 2505) + (3000 - 1230)
+    assert summary["auctions_settled"] == 3
+    assert summary["auctions_sold"] == 2
+    assert summary["bids"] == 7
+    assert summary["extensions_per_auction"] == pytest.approx(2 / 3)
+    assert summary["extended_auction_share"] == pytest.approx(1 / 3)
+    assert summary["mean_discount"] == pytest.approx(((1 - 2505 / 3007) + (1 - 1230 / 1260)) / 2)
+    assert summary["winners"] == 1
+    assert summary["spend_hhi"] == 1
+    assert summary["bidders"] == 3
+    assert summary["withdrawn"] == 1001 + 2003
+    assert summary["withdrawals"] == 2
+
+
+def test_summarize_matches_row_by_row(synthetic):
+    summary = analytics.summarize(synthetic)
+    rows = analytics.summarize_rows(synthetic)
+    for name in ("revenue", "owner_amount", "proceeds_receiver_amount"):
+        assert summary[name] == rows[name]
+    assert summary["mean_discount"] == pytest.approx(rows["mean_discount"])
+    assert summary["bid_count_hhi"] == pytest.approx(rows["bid_count_hhi"])
+    assert summary["owner_amount"] + summary["proceeds_receiver_amount"] == summary["revenue"]
+    assert summary["bids"] == len(synthetic.bids)
+
+
+def test_weekly_matches_summarize(synthetic):
+    weeks = analytics.weekly(synthetic)
+    assert len(weeks) > 2
+    summary = analytics.summarize(synthetic)
+    for name in ("revenue", "owner_amount", "proceeds_receiver_amount", "bids", "withdrawn", "auctions_settled"):
+        assert weeks[name].sum() == summary[name]
+
+    week_start = int(weeks.index[1])
+    week = analytics.summarize(synthetic.between(week_start, week_start + analytics.WEEK))
+    for name, value in week.items():
+        assert weeks.loc[week_start, name] == pytest.approx(value), name
+
+
+def test_weekly_from_start(synthetic):
+    weeks = analytics.weekly(synthetic)
+    start = int(weeks.index[1]) + analytics.WEEK // 2
+
+    later = analytics.weekly(synthetic, start)
+
+    assert int(later.index[0]) == start
+    assert later["bids"].sum() == len(synthetic.bids.query("timestamp >= @start"))
+    first_week = analytics.summarize(synthetic.between(start, start + analytics.WEEK))
+    assert later.iloc[0]["revenue"] == first_week["revenue"]
+    assert analytics.weekly(synthetic, int(weeks.index[-1]) + analytics.WEEK).empty
+
+
+def test_wei_amounts_are_exact():
+    price = [10**24 + 1, 3 * 10**23 + 99]
+    events = analytics.AuctionEvents.from_columns(
+        {"timestamp": [1, 2], "nft_id": [0, 1], "bidder": ["0x01", "0x02"], "bid": [10**25, 10**24], "price": price, "extended": [False, False]},
+        {"timestamp": [3, 4], "nft_id": [0, 1], "winner": ["0x01", "0x02"], "bid": [10**25, 10**24], "price": price, "split": [95, 33], "max_bid": [0, 2 * 10**25]},
+        {"timestamp": [], "nft_id": [], "end_time": []},
+        {"timestamp": [5], "user": ["0x01"], "receiver": ["0x01"], "amount": [10**25 - price[0]]},
+    )
+    assert events.settlements["price"].dtype == object
+    summary = analytics.summarize(events)
+    fees = price[0] * 95 // 100 + price[1] * 33 // 100
+    assert summary["revenue"] == sum(price)
+    assert summary["proceeds_receiver_amount"] == fees
+    assert summary["owner_amount"] == sum(price) - fees
+    assert summary["withdrawn"] == 10**25 - price[0]
+    assert summary["winner_refunds"] == 10**25 - price[0] + 2 * 10**25 - price[1]
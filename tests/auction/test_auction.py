@@ -1,4 +1,7 @@
 import ape
+from ape import project
+
+from scripts.scenarios import refund_modes
 
 
 # Helper methods
@@ -159,6 +162,88 @@ def test_set_duration_not_owner(vickrey_auction, alice):
         vickrey_auction.set_duration(1000, sender=alice)
 
 
+def test_set_push_refunds(vickrey_auction, deployer):
+    assert not vickrey_auction.push_refunds()
+    tx = vickrey_auction.set_push_refunds(True, sender=deployer)
+    assert vickrey_auction.push_refunds()
+    assert tx.events == [vickrey_auction.PushRefundsUpdated(True)]
+
+
+def test_set_push_refunds_not_owner(vickrey_auction, alice):
+    with ape.reverts("Caller is not the owner"):
+        vickrey_auction.set_push_refunds(True, sender=alice)
+
+
+def test_set_config(vickrey_auction, deployer):
+    tx = vickrey_auction.set_config(200, 10**20, 10, 7200, 90, True, sender=deployer)
+    assert vickrey_auction.time_buffer() == 200
+    assert vickrey_auction.reserve_price() == 10**20
+    assert vickrey_auction.min_bid_increment_percentage() == 10
+    assert vickrey_auction.duration() == 7200
+    assert vickrey_auction.proceeds_receiver_split_percentage() == 90
+    assert vickrey_auction.push_refunds()
+    assert tx.events == [
+        vickrey_auction.AuctionTimeBufferUpdated(200),
+        vickrey_auction.AuctionReservePriceUpdated(10**20),
+        vickrey_auction.AuctionMinBidIncrementPercentageUpdated(10),
+        vickrey_auction.AuctionDurationUpdated(7200),
+        vickrey_auction.ProceedsReceiverSplitPercentageUpdated(90),
+        vickrey_auction.PushRefundsUpdated(True),
+    ]
+
+
+def test_config_single_slot(vickrey_auction_created, deployer):
+    vickrey_auction_created.set_push_refunds(True, sender=deployer)
+    assert vickrey_auction_created.config() == (
+        100 | 100 << 96 | 3600 << 128 | 5 << 160 | 95 << 168 | 1 << 176 | 1 << 178
+    )
+
+
+def test_set_config_keeps_flags(vickrey_auction_created, deployer):
+    vickrey_auction_created.set_push_refunds(True, sender=deployer)
+    vickrey_auction_created.set_config(200, 200, 10, 7200, 90, False, sender=deployer)
+    assert vickrey_auction_created.paused()
+    assert not vickrey_auction_created.emergency_paused()
+    assert not vickrey_auction_created.push_refunds()
+
+
+def test_set_config_out_of_range(vickrey_auction, deployer):
+    with ape.reverts("_reserve_price out of range"):
+        vickrey_auction.set_config(100, 2**96, 5, 3600, 95, False, sender=deployer)
+    with ape.reverts("_time_buffer out of range"):
+        vickrey_auction.set_config(259201, 100, 5, 3600, 95, False, sender=deployer)
+    with ape.reverts("_min_bid_increment_percentage out of range"):
+        vickrey_auction.set_config(100, 100, 16, 3600, 95, False, sender=deployer)
+    with ape.reverts("_duration out of range"):
+        vickrey_auction.set_config(100, 100, 5, 259201, 95, False, sender=deployer)
+    with ape.reverts("_proceeds_receiver_split_percentage out of range"):
+        vickrey_auction.set_config(100, 100, 5, 3600, 100, False, sender=deployer)
+
+
+def test_set_config_not_owner(vickrey_auction, alice):
+    with ape.reverts("Caller is not the owner"):
+        vickrey_auction.set_config(100, 100, 5, 3600, 95, False, sender=alice)
+
+
+def test_set_reserve_price_out_of_range(vickrey_auction, deployer):
+    with ape.reverts("_reserve_price out of range"):
+        vickrey_auction.set_reserve_price(2**96, sender=deployer)
+    assert vickrey_auction.reserve_price() == 100
+
+
+def test_setters_reject_zero(vickrey_auction, deployer):
+    with ape.reverts("_time_buffer must be greater than 0"):
+        vickrey_auction.set_time_buffer(0, sender=deployer)
+    with ape.reverts("_reserve_price must be greater than 0"):
+        vickrey_auction.set_reserve_price(0, sender=deployer)
+    with ape.reverts("_time_buffer must be greater than 0"):
+        vickrey_auction.set_config(0, 100, 5, 3600, 95, False, sender=deployer)
+    with ape.reverts("_reserve_price must be greater than 0"):
+        vickrey_auction.set_config(100, 0, 5, 3600, 95, False, sender=deployer)
+    assert vickrey_auction.time_buffer() == 100
+    assert vickrey_auction.reserve_price() == 100
+
+
 # Public Bidding
         
 # @todo (1) test_create_bid_send_eth - fail
@@ -446,4 +531,129 @@ def test_create_bid_auction_not_extended(chain, vickrey_auction_created, alice,
     chain.pending_timestamp += vickrey_auction_created.duration() + 1
     minted_erc20token_to_users.approve(vickrey_auction_created, 1000, sender=bob)
     with ape.reverts("Auction expired"):
-        vickrey_auction_created.create_bid(0, 1000, sender=bob)
\ No newline at end of file
+        vickrey_auction_created.create_bid(0, 1000, sender=bob)
+
+
+# PUSH REFUNDS
+
+
+def test_push_refund_on_outbid(vickrey_auction_created, deployer, alice, bob, minted_erc20token_to_users):
+    vickrey_auction_created.set_push_refunds(True, sender=deployer)
+    alice_balance_before = minted_erc20token_to_users.balanceOf(alice)
+
+    minted_erc20token_to_users.approve(vickrey_auction_created, 100, sender=alice)
+    vickrey_auction_created.create_bid(0, 100, sender=alice)
+    minted_erc20token_to_users.approve(vickrey_auction_created, 200, sender=bob)
+    tx = vickrey_auction_created.create_bid(0, 200, sender=bob)
+
+    assert minted_erc20token_to_users.balanceOf(alice) == alice_balance_before
+    assert vickrey_auction_created.pending_returns(alice) == 0
+    assert minted_erc20token_to_users.balanceOf(vickrey_auction_created) == 200
+    assert list(tx.decode_logs(vickrey_auction_created.AuctionBidRefunded)) == [
+        vickrey_auction_created.AuctionBidRefunded(0, alice, 100)
+    ]
+
+
+def test_pull_refund_on_outbid_by_default(vickrey_auction_created, alice, bob, minted_erc20token_to_users):
+    create_pending_returns(vickrey_auction_created, alice, bob, minted_erc20token_to_users)
+    assert vickrey_auction_created.pending_returns(alice) == 100
+    assert minted_erc20token_to_users.balanceOf(vickrey_auction_created) == 300
+
+
+def test_push_refund_falls_back_to_pending_returns(accounts, token, price_provider, deployer, alice, bob, split_recipient):
+    blocklist_token = project.BlocklistERC20.deploy(sender=deployer)
+    auction = project.VickreyAuction.deploy(
+        token, blocklist_token, price_provider, 100, 100, 5, 3600, 95, split_recipient, sender=deployer
+    )
+    token.set_minter(auction, sender=deployer)
+    auction.create_auction(sender=deployer)
+    auction.set_push_refunds(True, sender=deployer)
+    for bidder in (alice, bob):
+        blocklist_token.mint(bidder, 1000, sender=deployer)
+        blocklist_token.approve(auction, 1000, sender=bidder)
+
+    auction.create_bid(0, 100, sender=alice)
+    blocklist_token.set_blocked(alice, True, sender=deployer)
+    # A refund that cannot be delivered must not stop the next bid
+    auction.create_bid(0, 200, sender=bob)
+
+    assert auction.auction()["bidder"] == bob
+    assert auction.pending_returns(alice) == 100
+    assert blocklist_token.balanceOf(auction) == 300
+
+    blocklist_token.set_blocked(alice, False, sender=deployer)
+    auction.withdraw(sender=alice)
+    assert auction.pending_returns(alice) == 0
+    assert blocklist_token.balanceOf(alice) == 1000
+
+
+def test_push_refunds_use_less_gas_per_auction(deployer, split_recipient):
+    results = refund_modes(deployer, split_recipient, n_bidders=3, rounds=6)
+    assert results["push"].transactions < results["pull"].transactions
+    assert results["push"].gas < results["pull"].gas
+
+
+# NFT DELIVERY
+
+
+def test_settle_auction_contract_winner(chain, token, deployer, vickrey_auction_created, contract_bidder, minted_erc20token_to_users):
+    contract_bidder.bid(vickrey_auction_created, minted_erc20token_to_users, 0, 100, sender=deployer)
+    chain.pending_timestamp += vickrey_auction_created.duration()
+    vickrey_auction_created.settle_auction(sender=deployer)
+    assert token.ownerOf(0) == contract_bidder
+    assert contract_bidder.received() == 1
+    assert vickrey_auction_created.claimable_nfts(0) == ape.utils.ZERO_ADDRESS
+
+
+def test_settle_auction_rejecting_winner(
+        chain, token, deployer, vickrey_auction_created, contract_bidder, alice, split_recipient, minted_erc20token_to_users
+    ):
+    contract_bidder.set_mode(1, sender=deployer)
+    contract_bidder.bid(vickrey_auction_created, minted_erc20token_to_users, 0, 100, sender=deployer)
+    chain.pending_timestamp += vickrey_auction_created.duration()
+    split_recipient_before = minted_erc20token_to_users.balanceOf(split_recipient)
+
+    tx = vickrey_auction_created.settle_auction(sender=deployer)
+
+    assert vickrey_auction_created.auction()["settled"]
+    assert token.ownerOf(0) == vickrey_auction_created
+    assert vickrey_auction_created.claimable_nfts(0) == contract_bidder
+    assert minted_erc20token_to_users.balanceOf(split_recipient) == split_recipient_before + 95
+    assert list(tx.decode_logs(vickrey_auction_created.NFTClaimable)) == [
+        vickrey_auction_created.NFTClaimable(0, contract_bidder)
+    ]
+
+    contract_bidder.claim_nft(vickrey_auction_created, 0, alice, sender=deployer)
+    assert token.ownerOf(0) == alice
+    assert vickrey_auction_created.claimable_nfts(0) == ape.utils.ZERO_ADDRESS
+
+    with ape.reverts():
+        contract_bidder.claim_nft(vickrey_auction_created, 0, alice, sender=deployer)
+
+
+def test_settle_current_and_create_new_auction_gas_burning_winner(
+        chain, token, deployer, vickrey_auction_created, contract_bidder, minted_erc20token_to_users
+    ):
+    contract_bidder.set_mode(2, sender=deployer)
+    contract_bidder.bid(vickrey_auction_created, minted_erc20token_to_users, 0, 100, sender=deployer)
+    chain.pending_timestamp += vickrey_auction_created.duration()
+
+    tx = vickrey_auction_created.settle_current_and_create_new_auction(sender=deployer)
+
+    assert vickrey_auction_created.claimable_nfts(0) == contract_bidder
+    assert vickrey_auction_created.auction()["nft_id"] == 1
+    assert not vickrey_auction_created.auction()["settled"]
+    assert vickrey_auction_created.paused()
+    # The receiver can burn at most the delivery stipend
+    assert tx.gas_used < 600_000
+
+
+def test_settle_current_and_create_new_auction_not_owner(chain, vickrey_auction_created, alice):
+    chain.pending_timestamp += vickrey_auction_created.duration() + 7200
+    with ape.reverts("Caller is not the owner"):
+        vickrey_auction_created.settle_current_and_create_new_auction(sender=alice)
+
+
+def test_claim_nft_not_claimable(vickrey_auction_created, alice):
+    with ape.reverts("Caller cannot claim this NFT"):
+        vickrey_auction_created.claim_nft(0, sender=alice)
@@ -0,0 +1,190 @@
+import ape
+
+from scripts.scenarios import bidding_modes
+
+
+# Helper methods
+
+
+def max_bid(auction, erc20token, bidder, amount):
+    erc20token.approve(auction, amount, sender=bidder)
+    return auction.set_max_bid(0, amount, sender=bidder)
+
+
+def bid(auction, erc20token, bidder, amount):
+    erc20token.approve(auction, amount, sender=bidder)
+    return auction.create_bid(0, amount, sender=bidder)
+
+
+# Proxy bids
+
+
+def test_first_max_bid_leads_at_reserve_price(vickrey_auction_created, minted_erc20token_to_users, alice):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    balance = erc20token.balanceOf(alice)
+    receipt = max_bid(auction, erc20token, alice, 1000)
+
+    current = auction.auction()
+    assert (current["bidder"], current["bid"], current["price"]) == (alice, 100, 100)
+    assert auction.max_bid() == 1000
+    assert erc20token.balanceOf(alice) == balance - 1000
+    event = auction.AuctionMaxBid.from_receipt(receipt)[0]
+    assert (event.nft_id, event.bidder, event.max_bid) == (0, alice, 1000)
+
+    with ape.reverts("Max bid cannot be zero"):
+        auction.set_max_bid(0, 0, sender=alice)
+
+
+def test_covered_challenge_raises_leading_bid(vickrey_auction_created, minted_erc20token_to_users, alice, bob):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    max_bid(auction, erc20token, alice, 1000)
+    balance = erc20token.balanceOf(bob)
+    receipt = bid(auction, erc20token, bob, 200)
+
+    # 200 plus 5% keeps alice ahead, priced against bob's bid: 200 + (210 - 200) // 2
+    current = auction.auction()
+    assert (current["bidder"], current["bid"], current["price"]) == (alice, 210, 205)
+    assert auction.max_bid() == 1000
+    # bob's bid is escrowed and refunded like any outbid bid
+    assert erc20token.balanceOf(bob) == balance - 200
+    assert auction.pending_returns(bob) == 200
+    events = auction.AuctionBid.from_receipt(receipt)
+    assert [(event.sender, event.bid, event.price) for event in events] == [(bob, 200, 205), (alice, 210, 205)]
+
+    with ape.reverts("Must send more than last bid by min_bid_increment_percentage amount"):
+        bid(auction, erc20token, bob, 219)
+
+
+def test_challenge_up_to_max_bid_is_covered(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    max_bid(auction, erc20token, alice, 1000)
+
+    # 960 plus 5% is above alice's max bid, she still leads at her max bid: 960 + (1000 - 960) // 2
+    bid(auction, erc20token, bob, 960)
+    current = auction.auction()
+    assert (current["bidder"], current["bid"], current["price"]) == (alice, 1000, 980)
+    assert auction.pending_returns(bob) == 960
+
+    # A max bid equal to the leading one does not take the lead either
+    max_bid(auction, erc20token, alice, 1100)
+    max_bid(auction, erc20token, charlie, 1100)
+    current = auction.auction()
+    assert (current["bidder"], current["bid"], current["price"]) == (alice, 1100, 1100)
+    assert auction.max_bid() == 1100
+    assert auction.pending_returns(charlie) == 1100
+
+
+def test_covered_challenge_must_pay(accounts, vickrey_auction_created, minted_erc20token_to_users, alice, bob):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    max_bid(auction, erc20token, alice, 1000)
+    end_time = auction.auction()["end_time"]
+
+    with ape.reverts():
+        auction.create_bid(0, 200, sender=bob)
+    with ape.reverts():
+        auction.set_max_bid(0, 200, sender=accounts[9])
+    assert auction.auction()["bid"] == 100
+    assert auction.auction()["end_time"] == end_time
+
+
+def test_covered_challenge_push_refund(vickrey_auction_created, minted_erc20token_to_users, deployer, alice, bob):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    auction.set_push_refunds(True, sender=deployer)
+    max_bid(auction, erc20token, alice, 1000)
+    balance = erc20token.balanceOf(bob)
+
+    receipt = bid(auction, erc20token, bob, 200)
+
+    assert erc20token.balanceOf(bob) == balance
+    assert auction.pending_returns(bob) == 0
+    event = auction.AuctionBidRefunded.from_receipt(receipt)[0]
+    assert (event.bidder, event.amount) == (bob, 200)
+
+
+def test_challenge_above_max_bid_takes_lead(vickrey_auction_created, minted_erc20token_to_users, alice, bob):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    max_bid(auction, erc20token, alice, 1000)
+    receipt = bid(auction, erc20token, bob, 1100)
+
+    # Priced against alice's max bid: 1000 + (1100 - 1000) // 2
+    current = auction.auction()
+    assert (current["bidder"], current["bid"], current["price"]) == (bob, 1100, 1050)
+    assert auction.max_bid() == 0
+    assert auction.pending_returns(alice) == 1000
+    event = auction.AuctionMaxBid.from_receipt(receipt)[0]
+    assert (event.bidder, event.max_bid) == (bob, 0)
+
+
+def test_max_bids_compete(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    max_bid(auction, erc20token, alice, 1000)
+    receipt = max_bid(auction, erc20token, bob, 2000)
+
+    # bob leads with the lowest bid above alice's max bid, the max bid is logged first
+    assert [log.event_name for log in receipt.events][-3:-1] == ["AuctionMaxBid", "AuctionBid"]
+    current = auction.auction()
+    assert (current["bidder"], current["bid"], current["price"]) == (bob, 1050, 1025)
+    assert auction.max_bid() == 2000
+    assert auction.pending_returns(alice) == 1000
+
+    balance = erc20token.balanceOf(charlie)
+    max_bid(auction, erc20token, charlie, 1500)
+    current = auction.auction()
+    assert (current["bidder"], current["bid"], current["price"]) == (bob, 1575, 1537)
+    assert erc20token.balanceOf(charlie) == balance - 1500
+    assert auction.pending_returns(charlie) == 1500
+
+
+def test_leader_raises_max_bid(vickrey_auction_created, minted_erc20token_to_users, alice, bob):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    bid(auction, erc20token, alice, 300)
+    balance = erc20token.balanceOf(alice)
+
+    # A plain bid becomes a proxy bid, only the difference is escrowed
+    max_bid(auction, erc20token, alice, 1000)
+    assert erc20token.balanceOf(alice) == balance - 700
+    max_bid(auction, erc20token, alice, 1500)
+    assert erc20token.balanceOf(alice) == balance - 1200
+    assert auction.auction()["bid"] == 300
+    assert auction.max_bid() == 1500
+
+    with ape.reverts("Max bid must be above the current one"):
+        auction.set_max_bid(0, 1500, sender=alice)
+
+    bid(auction, erc20token, bob, 1400)
+    assert auction.auction()["bidder"] == alice
+    assert auction.auction()["bid"] == 1470
+
+
+def test_settle_refunds_unused_escrow(
+    chain, token, vickrey_auction_created, minted_erc20token_to_users, deployer, split_recipient, alice, bob
+):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    max_bid(auction, erc20token, alice, 1000)
+    bid(auction, erc20token, bob, 200)
+    chain.pending_timestamp = auction.auction()["end_time"] + 1
+    auction.settle_auction(sender=deployer)
+
+    assert token.ownerOf(0) == alice
+    assert auction.pending_returns(alice) == 1000 - 205
+    assert erc20token.balanceOf(split_recipient) == 205 * 95 // 100
+    assert erc20token.balanceOf(auction) == 1000 - 205 + 200
+    assert auction.max_bid() == 0
+
+
+def test_emergency_pause_returns_escrow(vickrey_auction_created, minted_erc20token_to_users, deployer, alice, bob):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    max_bid(auction, erc20token, alice, 1000)
+    bid(auction, erc20token, bob, 200)
+    auction.emergency_pause(sender=deployer)
+    assert auction.pending_returns(alice) == 1000
+    assert auction.pending_returns(bob) == 200
+
+
+def test_proxy_bids_need_fewer_transactions(deployer, split_recipient):
+    results = bidding_modes(deployer, split_recipient, n_bidders=3, n_auctions=2)
+    manual, manual_outcomes = results["create_bid"]
+    proxy, proxy_outcomes = results["set_max_bid"]
+    assert proxy.transactions < manual.transactions
+    assert proxy.gas < manual.gas
+    assert [winner for winner, _ in proxy_outcomes] == [winner for winner, _ in manual_outcomes]
@@ -0,0 +1,114 @@
+import ape
+import pytest
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
+
+from scripts import calldata
+
+
+def bid_state(auction, token, bidders):
+    return (
+        auction.auction(),
+        [auction.pending_returns(bidder) for bidder in bidders],
+        [token.balanceOf(bidder) for bidder in bidders],
+        token.balanceOf(auction),
+    )
+
+
+def arguments(logs):
+    return [dict(log.event_arguments) for log in logs]
+
+
+def play(auction, token, bids, packed):
+    """
+    @dev Send `bids` through the ABI or the packed entry point and return the events and final state.
+    """
+
+    events = []
+    for bidder, amount in bids:
+        token.approve(auction, amount, sender=bidder)
+        if packed:
+            tx = calldata.send(auction, calldata.create_bid(0, amount), sender=bidder)
+        else:
+            tx = auction.create_bid(0, amount, sender=bidder)
+        events.extend(tx.decode_logs(auction.AuctionBid))
+    return arguments(events), bid_state(auction, token, [bidder for bidder, _ in bids])
+
+
+def test_encode_create_bid():
+    assert calldata.create_bid(7, 1000) == (7).to_bytes(4, "big") + (1000).to_bytes(12, "big")
+    assert len(calldata.create_bid(7, 1000)) == 16
+    abi_data = function_signature_to_4byte_selector("create_bid(uint256,uint256)") + encode(
+        ["uint256", "uint256"], [7, 1000]
+    )
+    assert calldata.calldata_gas(calldata.create_bid(7, 1000)) < calldata.calldata_gas(abi_data)
+
+
+def test_encode_out_of_range():
+    with pytest.raises(ValueError):
+        calldata.create_bid(2**32, 100)
+    with pytest.raises(ValueError):
+        calldata.create_bid(0, 2**96)
+    with pytest.raises(ValueError):
+        calldata.withdraw_multiple([])
+
+
+def test_encode_withdraw_multiple(alice, bob):
+    data = calldata.withdraw_multiple([alice, bob])
+    assert data == bytes.fromhex(alice.address[2:] + bob.address[2:])
+
+
+def test_selectors_do_not_start_with_small_nft_ids(vickrey_auction):
+    # The first 4 bytes of a packed bid are the nft id, which must not be routed to a function
+    assert all(int.from_bytes(selector, "big") > 2**24 for selector in calldata.selectors(vickrey_auction.contract_type))
+
+
+def test_packed_bids_match_abi_bids(chain, vickrey_auction_created, alice, bob, charlie, minted_erc20token_to_users):
+    bids = [(alice, 100), (bob, 1000), (charlie, 1050), (alice, 5000)]
+    snapshot = chain.snapshot()
+    expected = play(vickrey_auction_created, minted_erc20token_to_users, bids, packed=False)
+    chain.restore(snapshot)
+    assert play(vickrey_auction_created, minted_erc20token_to_users, bids, packed=True) == expected
+
+
+@pytest.mark.parametrize(
+    "nft_id,amount,message",
+    [
+        (1, 100, "NFT not up for auction"),
+        (0, 1, "Must send at least reservePrice"),
+    ],
+)
+def test_packed_bid_reverts_like_abi_bid(vickrey_auction_created, alice, minted_erc20token_to_users, nft_id, amount, message):
+    minted_erc20token_to_users.approve(vickrey_auction_created, amount, sender=alice)
+    with ape.reverts(message):
+        vickrey_auction_created.create_bid(nft_id, amount, sender=alice)
+    with ape.reverts(message):
+        calldata.send(vickrey_auction_created, calldata.create_bid(nft_id, amount), sender=alice)
+
+
+def test_packed_withdraw_multiple_matches_abi(chain, vickrey_auction_created, alice, bob, charlie, minted_erc20token_to_users):
+    bids = [(alice, 100), (bob, 200), (charlie, 300)]
+    play(vickrey_auction_created, minted_erc20token_to_users, bids, packed=False)
+    bidders = [alice, bob]
+
+    snapshot = chain.snapshot()
+    tx = vickrey_auction_created.withdraw_multiple(bidders, sender=charlie)
+    expected = (
+        arguments(tx.decode_logs(vickrey_auction_created.Withdraw)),
+        bid_state(vickrey_auction_created, minted_erc20token_to_users, bidders),
+    )
+    chain.restore(snapshot)
+    tx = calldata.send(vickrey_auction_created, calldata.withdraw_multiple(bidders), sender=charlie)
+    packed = (
+        arguments(tx.decode_logs(vickrey_auction_created.Withdraw)),
+        bid_state(vickrey_auction_created, minted_erc20token_to_users, bidders),
+    )
+
+    assert packed == expected
+    assert vickrey_auction_created.pending_returns(alice) == 0
+    assert vickrey_auction_created.pending_returns(bob) == 0
+
+
+def test_invalid_packed_calldata(vickrey_auction_created, alice):
+    with ape.reverts("Invalid packed calldata"):
+        alice.transfer(vickrey_auction_created, 0, data=b"\x01" * 21)
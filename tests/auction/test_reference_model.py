@@ -0,0 +1,136 @@
+import random
+
+import ape
+import numpy as np
+import pytest
+
+from scripts import model
+
+BIDS_PER_SCENARIO = 8
+SCENARIOS = 4
+
+
+# Helper methods
+
+
+def generate_scenarios():
+    rng = random.Random(42)
+    bids = np.zeros((SCENARIOS, BIDS_PER_SCENARIO), dtype=np.int64)
+    offsets = np.zeros((SCENARIOS, BIDS_PER_SCENARIO), dtype=np.int64)
+    bidders = np.zeros((SCENARIOS, BIDS_PER_SCENARIO), dtype=np.int64)
+    for scenario in range(SCENARIOS):
+        amount, offset = 100, 0
+        for i in range(BIDS_PER_SCENARIO):
+            # Mix of valid outbids, too-small increments, bids under reserve, extensions and expiry
+            amount = max(1, amount + amount * rng.randint(-20, 60) // 100)
+            offset += rng.randint(1, 900)
+            bids[scenario, i] = amount
+            offsets[scenario, i] = offset
+            bidders[scenario, i] = rng.randrange(3)
+    return bids, offsets, bidders
+
+
+# Differential tests
+
+
+@pytest.mark.parametrize("scenario", range(SCENARIOS))
+def test_model_matches_contract(
+    chain,
+    token,
+    vickrey_auction,
+    price_provider,
+    deployer,
+    split_recipient,
+    alice,
+    bob,
+    charlie,
+    minted_erc20token_to_users,
+    scenario,
+):
+    accounts = [alice, bob, charlie]
+    for account in accounts:
+        minted_erc20token_to_users.approve(vickrey_auction, 2**256 - 1, sender=account)
+    token.set_minter(vickrey_auction, sender=deployer)
+    vickrey_auction.create_auction(sender=deployer)
+
+    bids, offsets, bidders = generate_scenarios()
+    start_time = vickrey_auction.auction()["start_time"]
+    result = model.simulate_bids(
+        bids,
+        start_time + offsets,
+        end_time=start_time + vickrey_auction.duration(),
+        reserve_price=vickrey_auction.reserve_price(),
+        min_bid_increment_percentage=vickrey_auction.min_bid_increment_percentage(),
+        time_buffer=vickrey_auction.time_buffer(),
+        k=price_provider.k(),
+        bidders=bidders,
+    )
+
+    for i in range(BIDS_PER_SCENARIO):
+        chain.pending_timestamp = start_time + int(offsets[scenario, i])
+        amount = int(bids[scenario, i])
+        sender = accounts[bidders[scenario, i]]
+        outcome = result.outcome[scenario, i]
+        if outcome == model.ACCEPTED:
+            receipt = vickrey_auction.create_bid(0, amount, sender=sender)
+            event = vickrey_auction.AuctionBid.from_receipt(receipt)[0]
+            assert event.bid == amount
+            assert event.extended == result.extended[scenario, i]
+        else:
+            with ape.reverts(model.REVERT_REASONS[outcome]):
+                vickrey_auction.create_bid(0, amount, sender=sender)
+
+    auction = vickrey_auction.auction()
+    assert auction["bid"] == result.bid[scenario]
+    assert auction["price"] == result.price[scenario]
+    assert auction["end_time"] == result.end_time[scenario]
+    if result.bidder[scenario] == model.NO_BIDDER:
+        assert auction["bidder"] == ape.utils.ZERO_ADDRESS
+    else:
+        assert auction["bidder"] == accounts[result.bidder[scenario]]
+
+    settlement = model.settle_auctions(
+        result.bid, result.price, result.bidder, vickrey_auction.proceeds_receiver_split_percentage()
+    )
+    expected_pending_returns = model.pending_returns(result, settlement, len(accounts))
+
+    owner_before = minted_erc20token_to_users.balanceOf(deployer)
+    receiver_before = minted_erc20token_to_users.balanceOf(split_recipient)
+    chain.pending_timestamp = max(chain.pending_timestamp, auction["end_time"] + 1)
+    vickrey_auction.settle_auction(sender=deployer)
+
+    assert minted_erc20token_to_users.balanceOf(deployer) - owner_before == settlement.owner_amount[scenario]
+    assert (
+        minted_erc20token_to_users.balanceOf(split_recipient) - receiver_before
+        == settlement.proceeds_receiver_amount[scenario]
+    )
+    for index, account in enumerate(accounts):
+        assert vickrey_auction.pending_returns(account) == expected_pending_returns[scenario, index]
+
+
+# Model only
+
+
+def test_get_price_rounds_down():
+    assert model.get_price(1000, 100, 50) == 550
+    assert model.get_price(105, 100, 50) == 102
+    np.testing.assert_array_equal(model.get_price([1000, 105], [100, 100], 50), [550, 102])
+
+
+def test_settle_auctions_split():
+    settlement = model.settle_auctions([1000, 0], [550, 0], [0, model.NO_BIDDER], 95)
+    np.testing.assert_array_equal(settlement.refund, [450, 0])
+    np.testing.assert_array_equal(settlement.proceeds_receiver_amount, [522, 0])
+    np.testing.assert_array_equal(settlement.owner_amount, [28, 0])
+
+
+def test_settle_auctions_refunds_max_bid_escrow():
+    settlement = model.settle_auctions([1000, 1000], [550, 550], [0, 1], 95, max_bid=[2000, 0])
+    np.testing.assert_array_equal(settlement.refund, [1450, 450])
+
+
+def test_int64_overflow_guard():
+    with pytest.raises(OverflowError):
+        model.simulate_bids([[10**18]], [[1]], 100, 100, 5, 100, 50)
+    result = model.simulate_bids([[10**21]], [[1]], 100, 100, 5, 100, 50, dtype=object)
+    assert result.price[0] == 10**21
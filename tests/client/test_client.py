@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from scripts.client import ABI, ABI_DIR, AuctionClient, LocalRPCServer, RPCError, unpack_config
+
+
+@pytest.fixture(scope="function")
+def server(chain):
+    server = LocalRPCServer(chain.provider.web3)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(scope="function")
+def client(server, vickrey_auction_created):
+    # poll_interval=0 syncs with the chain on every read
+    return AuctionClient(server.url, vickrey_auction_created.address, poll_interval=0)
+
+
+def bid(auction, token, bidder, amount):
+    token.approve(auction, amount, sender=bidder)
+    return auction.create_bid(0, amount, sender=bidder)
+
+
+@pytest.mark.parametrize("name", ["VickreyAuction", "Frok"])
+def test_shipped_abis_are_up_to_date(project, name):
+    # Run `ape run client export-abis` after changing a contract's interface
+    shipped = json.loads((ABI_DIR / f"{name}.json").read_text())
+    compiled = [entry.model_dump(mode="json", by_alias=True, exclude_none=True) for entry in getattr(project, name).contract_type.abi]
+    assert shipped == compiled
+
+
+def test_unpack_config(vickrey_auction_created, client):
+    assert client.config() == {
+        "reserve_price": vickrey_auction_created.reserve_price(),
+        "time_buffer": vickrey_auction_created.time_buffer(),
+        "duration": vickrey_auction_created.duration(),
+        "min_bid_increment_percentage": vickrey_auction_created.min_bid_increment_percentage(),
+        "proceeds_receiver_split_percentage": vickrey_auction_created.proceeds_receiver_split_percentage(),
+        "paused": vickrey_auction_created.paused(),
+        "emergency_paused": vickrey_auction_created.emergency_paused(),
+        "push_refunds": vickrey_auction_created.push_refunds(),
+    }
+    assert unpack_config(vickrey_auction_created.config()) == client.config()
+
+
+def test_reads_match_ape(vickrey_auction_created, minted_erc20token_to_users, client, alice, bob):
+    bid(vickrey_auction_created, minted_erc20token_to_users, alice, 100)
+    bid(vickrey_auction_created, minted_erc20token_to_users, bob, 200)
+
+    expected = vickrey_auction_created.auction()
+    assert client.auction() == {name: expected[name] for name in client.auction()}
+    assert client.pending_returns_many([alice, bob]) == {alice.address: 100, bob.address: 0}
+    assert client.call("owner") == vickrey_auction_created.owner()
+    assert client.nft_calls([("ownerOf", 0), ("balanceOf", vickrey_auction_created.address)]) == [
+        vickrey_auction_created.address,
+        1,
+    ]
+
+
+def test_cached_reads_only_poll_for_logs(client, alice, bob):
+    client.state()
+    client.pending_returns_many([alice, bob])
+    requests = client.rpc.requests
+
+    client.state()
+    client.pending_returns_many([alice, bob])
+    # eth_blockNumber only: no new blocks means no eth_getLogs and no eth_call
+    assert client.rpc.requests == requests + 2
+    assert client.hits == 3
+
+
+def test_reads_are_batched_over_one_connection(client, alice, bob, charlie):
+    client.pending_returns_many([alice, bob, charlie])
+    assert client.rpc.requests == 4  # eth_blockNumber + 3 eth_call
+    assert client.rpc.round_trips == 2
+    connection = client.rpc._connection
+    client.state()
+    assert client.rpc._connection is connection
+
+
+def test_bid_invalidates_auction_and_outbid_pending_returns(vickrey_auction_created, minted_erc20token_to_users, client, alice, bob, charlie):
+    bid(vickrey_auction_created, minted_erc20token_to_users, alice, 100)
+    assert client.auction()["bidder"] == alice.address
+    assert client.pending_returns_many([alice, bob, charlie]) == {alice.address: 0, bob.address: 0, charlie.address: 0}
+
+    bid(vickrey_auction_created, minted_erc20token_to_users, bob, 200)
+    assert client.auction()["bidder"] == bob.address
+    assert client.pending_returns(alice) == 100
+    # The auction and the outbid leader were re-read, bob and charlie were not
+    assert client.misses == 6
+
+
+def test_withdraw_invalidates_pending_returns(vickrey_auction_created, minted_erc20token_to_users, client, alice, bob):
+    bid(vickrey_auction_created, minted_erc20token_to_users, alice, 100)
+    bid(vickrey_auction_created, minted_erc20token_to_users, bob, 200)
+    assert client.pending_returns(alice) == 100
+
+    vickrey_auction_created.withdraw(sender=alice)
+    assert client.pending_returns(alice) == 0
+
+
+def test_config_update_invalidates_config(vickrey_auction_created, client, deployer):
+    assert client.config()["reserve_price"] == vickrey_auction_created.reserve_price()
+    vickrey_auction_created.set_reserve_price(12345, sender=deployer)
+    assert client.config()["reserve_price"] == 12345
+
+
+def test_settlement_invalidates_auction(chain, vickrey_auction_created, minted_erc20token_to_users, client, deployer, alice):
+    bid(vickrey_auction_created, minted_erc20token_to_users, alice, 100)
+    client.auction()
+
+    chain.pending_timestamp = client.auction()["end_time"] + 1
+    vickrey_auction_created.settle_auction(sender=deployer)
+    assert client.auction()["settled"]
+    assert client.auction()["bidder"] == alice.address
+    assert not client.config()["paused"]
+
+
+def test_abi_decodes_logs(vickrey_auction_created, minted_erc20token_to_users, alice):
+    tx = bid(vickrey_auction_created, minted_erc20token_to_users, alice, 100)
+    log = next(log for log in tx.logs if log["address"] == vickrey_auction_created.address)
+    name, arguments = ABI.load("VickreyAuction").decode_log(
+        {"topics": ["0x" + bytes(topic).hex() for topic in log["topics"]], "data": "0x" + bytes(log["data"]).hex()}
+    )
+    assert name == "AuctionBid"
+    assert arguments == {"nft_id": 0, "sender": alice.address, "bid": 100, "price": 100, "extended": False}
+
+
+def test_rpc_errors_are_raised(client):
+    with pytest.raises(RPCError, match="not supported"):
+        client.rpc.request("eth_sendTransaction", [{}])
@@ -1,5 +1,6 @@
 import pytest
 
+
 @pytest.fixture(scope="function")
 def token(project, deployer):
     return deployer.deploy(project.Frok)
@@ -91,4 +92,10 @@ def vickrey_auction(project, token, erc20token, price_provider, deployer, split_
 def vickrey_auction_created(vickrey_auction, token, deployer):
     token.set_minter(vickrey_auction, sender=deployer)
     vickrey_auction.create_auction(sender=deployer)
-    return vickrey_auction
\ No newline at end of file
+    return vickrey_auction
+
+@pytest.fixture(scope="function")
+def contract_bidder(project, deployer, minted_erc20token_to_users):
+    contract_bidder = project.ContractBidder.deploy(sender=deployer)
+    minted_erc20token_to_users.mint(contract_bidder, 1000 * 10 ** 18, sender=deployer)
+    return contract_bidder
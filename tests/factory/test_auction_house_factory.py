@@ -0,0 +1,93 @@
+import ape
+import pytest
+
+from scripts.scenarios import deployment_costs
+
+ARGS = (100, 100, 5, 3600, 95)  # time_buffer, reserve_price, min_bid_increment_percentage, duration, split
+
+
+@pytest.fixture(scope="function")
+def factory(project, vickrey_auction, deployer):
+    return project.AuctionHouseFactory.deploy(vickrey_auction, sender=deployer)
+
+
+@pytest.fixture(scope="function")
+def auction_house(project, factory, token, erc20token, price_provider, deployer, alice, split_recipient):
+    tx = factory.create_auction_house(token, erc20token, price_provider, *ARGS, split_recipient, alice, sender=deployer)
+    return project.VickreyAuction.at(factory.AuctionHouseCreated.from_receipt(tx)[0].auction_house)
+
+
+def test_create_auction_house(factory, auction_house, token, erc20token, price_provider, vickrey_auction, alice, split_recipient):
+    assert factory.implementation() == vickrey_auction
+    assert factory.auction_house_count() == 1
+    assert factory.auction_houses(0) == auction_house
+    assert auction_house.owner() == alice
+    assert auction_house.nft() == token
+    assert auction_house.token() == erc20token
+    assert auction_house.price_provider() == price_provider
+    assert auction_house.time_buffer() == 100
+    assert auction_house.reserve_price() == 100
+    assert auction_house.min_bid_increment_percentage() == 5
+    assert auction_house.duration() == 3600
+    assert auction_house.proceeds_receiver_split_percentage() == 95
+    assert auction_house.proceeds_receiver() == split_recipient
+    assert not auction_house.paused()
+
+
+def test_create_auction_house_event(factory, token, erc20token, price_provider, deployer, alice, split_recipient):
+    tx = factory.create_auction_house(token, erc20token, price_provider, *ARGS, split_recipient, alice, sender=deployer)
+    assert tx.events.filter(factory.AuctionHouseCreated) == [
+        factory.AuctionHouseCreated(factory.auction_houses(0), token, erc20token, price_provider, alice)
+    ]
+
+
+def test_initialize_twice(auction_house, token, erc20token, price_provider, alice, split_recipient):
+    with ape.reverts("Already initialized"):
+        auction_house.initialize(token, erc20token, price_provider, *ARGS, split_recipient, alice, sender=alice)
+
+
+def test_initialize_implementation(vickrey_auction, token, erc20token, price_provider, alice, split_recipient):
+    with ape.reverts("Already initialized"):
+        vickrey_auction.initialize(token, erc20token, price_provider, *ARGS, split_recipient, alice, sender=alice)
+
+
+@pytest.mark.parametrize(
+    "args,message",
+    [
+        ((0, 100, 5, 3600, 95), "_time_buffer must be greater than 0"),
+        ((100, 0, 5, 3600, 95), "_reserve_price must be greater than 0"),
+        ((100, 100, 1, 3600, 95), "_min_bid_increment_percentage out of range"),
+        ((100, 100, 5, 60, 95), "_duration out of range"),
+        ((100, 100, 5, 3600, 100), "_proceeds_receiver_split_percentage out of range"),
+    ],
+)
+def test_initialize_validation(project, factory, token, erc20token, price_provider, deployer, alice, split_recipient, args, message):
+    with ape.reverts(message):
+        project.VickreyAuction.deploy(token, erc20token, price_provider, *args, split_recipient, sender=deployer)
+    with ape.reverts(message):
+        factory.create_auction_house(token, erc20token, price_provider, *args, split_recipient, alice, sender=deployer)
+
+
+def test_initialize_zero_addresses(factory, token, erc20token, price_provider, deployer, alice, split_recipient):
+    with ape.reverts("_proceeds_receiver cannot be empty"):
+        factory.create_auction_house(token, erc20token, price_provider, *ARGS, ape.utils.ZERO_ADDRESS, alice, sender=deployer)
+    with ape.reverts("Cannot set owner to zero address"):
+        factory.create_auction_house(
+            token, erc20token, price_provider, *ARGS, split_recipient, ape.utils.ZERO_ADDRESS, sender=deployer
+        )
+
+
+def test_auction_house_round(chain, auction_house, token, deployer, alice, bob, split_recipient, minted_erc20token_to_users):
+    token.set_minter(auction_house, sender=deployer)
+    auction_house.create_auction(sender=alice)
+    minted_erc20token_to_users.approve(auction_house, 100, sender=bob)
+    auction_house.create_bid(0, 100, sender=bob)
+    chain.pending_timestamp += auction_house.duration()
+    auction_house.settle_auction(sender=alice)
+    assert token.ownerOf(0) == bob
+    assert minted_erc20token_to_users.balanceOf(split_recipient) == 95
+
+
+def test_proxy_deployment_is_cheaper(deployer, split_recipient):
+    costs = deployment_costs(deployer, split_recipient)
+    assert costs["create_auction_house"] * 5 < costs["deploy VickreyAuction"]
@@ -0,0 +1,136 @@
+import pytest
+
+from scripts.calldata import calldata_gas
+from scripts.gas_model import (
+    FEATURES,
+    MAX_ERROR,
+    GasModel,
+    calldata,
+    create_bid_features,
+    errors,
+    gas_limit,
+    play_auctions,
+    settle_features,
+    withdraw_features,
+)
+
+CONFIG = {"time_buffer": 100, "push_refunds": False}
+
+
+def enabled(features):
+    return {name for name, value in features.items() if value}
+
+
+# Features
+
+
+def test_create_bid_features():
+    auction = {"bid": 0, "end_time": 1000}
+    assert create_bid_features(auction, CONFIG, 500, 100, 10**18, 0) == {
+        "first": True,
+        "extending": False,
+        "house_empty": True,
+        "drains_balance": False,
+        "pending_cold": False,
+        "push": False,
+        "push_to_empty": False,
+        "covered": False,
+        "covered_push": False,
+        "clears_max_bid": False,
+        "sets_max_bid": False,
+        "replaces_max_bid": False,
+        "raises": False,
+    }
+
+    auction = {"bid": 100, "end_time": 1000}
+    features = create_bid_features(auction, CONFIG, 950, 200, 200, 100, leader_pending=0)
+    assert features["extending"] and features["drains_balance"] and features["pending_cold"]
+    assert not create_bid_features(auction, CONFIG, 950, 200, 10**18, 100, leader_pending=5)["pending_cold"]
+
+    features = create_bid_features(auction, {**CONFIG, "push_refunds": True}, 500, 200, 10**18, 100, leader_balance=0)
+    assert features["push"] and features["push_to_empty"] and not features["pending_cold"]
+
+
+def test_max_bid_features():
+    auction = {"bid": 100, "end_time": 1000}
+
+    # Covered by a max bid of 500: the challenger pays and is refunded at once
+    features = create_bid_features(auction, CONFIG, 500, 200, 200, 500, max_bid=500, bidder_pending=0)
+    assert enabled(features) == {"covered", "drains_balance", "pending_cold"}
+    features = create_bid_features(auction, {**CONFIG, "push_refunds": True}, 500, 200, 200, 500, max_bid=500)
+    assert enabled(features) == {"covered", "covered_push"}
+    features = create_bid_features(auction, CONFIG, 500, 200, 10**18, 500, max_bid=500, bidder_pending=5, proxy=True)
+    assert enabled(features) == {"covered"}
+
+    # Above the max bid, a plain bid clears it and a proxy bid replaces it
+    features = create_bid_features(auction, CONFIG, 500, 600, 10**18, 500, leader_pending=5, max_bid=500)
+    assert enabled(features) == {"clears_max_bid"}
+    features = create_bid_features(auction, CONFIG, 500, 600, 10**18, 500, leader_pending=5, max_bid=500, proxy=True)
+    assert enabled(features) == {"sets_max_bid", "replaces_max_bid"}
+
+    # The leader raising its max bid pays the difference and returns early
+    features = create_bid_features(auction, CONFIG, 950, 800, 300, 500, max_bid=500, is_leader=True, proxy=True)
+    assert enabled(features) == {"sets_max_bid", "replaces_max_bid", "raises", "drains_balance"}
+    features = create_bid_features(auction, CONFIG, 950, 800, 10**18, 100, is_leader=True, proxy=True)
+    assert enabled(features) == {"sets_max_bid", "raises"}
+
+
+def test_settle_features():
+    auction = {"bid": 0, "price": 0, "end_time": 1000}
+    features = settle_features(auction, 1001, by_owner=True, receiver_tokens=0)
+    assert {name for name, enabled in features.items() if enabled} == {"owner_first_token", "unsold_in_owner_window"}
+
+    auction = {"bid": 300, "price": 250, "end_time": 1000}
+    features = settle_features(auction, 1000 + 7200, by_owner=True, winner_is_contract=True, winner_pending=1)
+    assert {name for name, enabled in features.items() if enabled} == {"has_bid", "winner_is_contract", "refund_warm"}
+
+    # A proxy bid won at its own bid still refunds the rest of its escrow
+    auction = {"bid": 300, "price": 300, "end_time": 1000}
+    assert not settle_features(auction, 1001, by_owner=True)["refund_cold"]
+    features = settle_features(auction, 1000 + 7200, by_owner=False, max_bid=900, by_winner=True)
+    assert enabled(features) == {"has_bid", "refund_cold", "clears_max_bid", "by_winner"}
+
+
+def test_withdraw_features():
+    assert withdraw_features(100, 0, 100) == {"receiver_empty": True, "drains_house": True}
+    assert withdraw_features(100, 1, 300) == {"receiver_empty": False, "drains_house": False}
+
+
+# Model
+
+
+def test_fit_recovers_additive_terms():
+    terms = {"base": 50000, "first": 30000, "extending": 4000, "pending_cold": 17000}
+    samples = []
+    for first in (False, True):
+        for extending in (False, True):
+            for pending_cold in (False, True):
+                features = {name: False for name in FEATURES["create_bid"]}
+                features.update(first=first, extending=extending, pending_cold=pending_cold and not first)
+                gas = terms["base"] + sum(terms[name] for name, enabled in features.items() if enabled)
+                samples.append(("create_bid", features, gas))
+
+    fitted = GasModel.fit(samples).terms["create_bid"]
+    assert {name: fitted[name] for name in terms} == terms
+
+
+def test_prediction_includes_calldata():
+    model = GasModel.load()
+    features = {name: False for name in FEATURES["create_bid"]}
+    small, large = model.create_bid(0, 100, **features), model.create_bid(0, 10**24, **features)
+    assert large - small == calldata_gas(calldata("create_bid", 0, 10**24)) - calldata_gas(calldata("create_bid", 0, 100))
+    assert gas_limit(small) == small * 110 // 100
+
+
+# Accuracy against the contracts
+
+
+@pytest.mark.parametrize("push", [False, True])
+def test_model_predicts_receipts(deployer, split_recipient, push):
+    # Seed 11 is not one of the calibration seeds, so bid wars, extensions and settlements differ
+    recorder = play_auctions(deployer, split_recipient, push, seed=11)
+    results = errors(GasModel.load(), recorder)
+
+    assert {entry_point for entry_point, *_ in results} == set(FEATURES)
+    worst = max(abs(predicted - actual) for _, _, predicted, actual in results)
+    assert worst <= MAX_ERROR, "run `ape run gas_model calibrate` after changing the contracts"
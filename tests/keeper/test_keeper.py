@@ -0,0 +1,159 @@
+import asyncio
+
+from scripts.keeper import AUCTION_SETTLEMENT_ONLY_OWNER_BUFFER, BLOCK_TIME_SAMPLES, Keeper
+
+
+# Helper methods
+
+
+def bid(vickrey_auction, erc20token, bidder, amount):
+    erc20token.approve(vickrey_auction, amount, sender=bidder)
+    return vickrey_auction.create_bid(vickrey_auction.auction()["nft_id"], amount, sender=bidder)
+
+
+def mine_at(chain, timestamp):
+    chain.pending_timestamp = timestamp
+    chain.mine()
+
+
+# Rollover
+
+
+def test_keeper_idle_before_end_time(chain, vickrey_auction_created, deployer):
+    keeper = Keeper(vickrey_auction_created, deployer, block_time=1)
+    asyncio.run(keeper.sync())
+    mine_at(chain, keeper.end_time - 1)
+    asyncio.run(keeper.tick())
+    assert not vickrey_auction_created.auction()["settled"]
+    assert keeper.metrics.submissions == 0
+
+
+def test_keeper_rolls_over_in_first_valid_block(chain, vickrey_auction_created, deployer, alice, minted_erc20token_to_users):
+    keeper = Keeper(vickrey_auction_created, deployer, block_time=1)
+    asyncio.run(keeper.sync())
+    bid(vickrey_auction_created, minted_erc20token_to_users, alice, 100)
+    end_time = vickrey_auction_created.auction()["end_time"]
+
+    mine_at(chain, end_time)
+    asyncio.run(keeper.tick())
+
+    auction = vickrey_auction_created.auction()
+    assert auction["nft_id"] == 1
+    assert not auction["settled"]
+    assert keeper.live
+    assert keeper.end_time == auction["end_time"]
+    assert list(keeper.metrics.settle_latency) == [1]
+    assert keeper.metrics.rollovers == 1
+    assert keeper.metrics.rollover_latency[0] <= 2
+
+
+def test_keeper_follows_extension(chain, vickrey_auction_created, deployer, alice, bob, minted_erc20token_to_users):
+    keeper = Keeper(vickrey_auction_created, deployer, block_time=1)
+    asyncio.run(keeper.sync())
+    original_end_time = keeper.end_time
+
+    bid(vickrey_auction_created, minted_erc20token_to_users, alice, 100)
+    chain.pending_timestamp = original_end_time - 50
+    minted_erc20token_to_users.approve(vickrey_auction_created, 1000, sender=bob)
+    vickrey_auction_created.create_bid(0, 1000, sender=bob)
+    extended_end_time = vickrey_auction_created.auction()["end_time"]
+    assert extended_end_time > original_end_time
+
+    mine_at(chain, original_end_time)
+    asyncio.run(keeper.tick())
+    assert keeper.end_time == extended_end_time
+    assert not vickrey_auction_created.auction()["settled"]
+
+    mine_at(chain, extended_end_time)
+    asyncio.run(keeper.tick())
+    assert vickrey_auction_created.auction()["nft_id"] == 1
+    assert list(keeper.metrics.settle_latency) == [1]
+
+
+def test_keeper_non_owner_waits_for_owner_buffer(chain, vickrey_auction_created, alice):
+    keeper = Keeper(vickrey_auction_created, alice, block_time=1)
+    asyncio.run(keeper.sync())
+    end_time = keeper.end_time
+
+    mine_at(chain, end_time)
+    asyncio.run(keeper.tick())
+    assert not vickrey_auction_created.auction()["settled"]
+
+    mine_at(chain, end_time + AUCTION_SETTLEMENT_ONLY_OWNER_BUFFER - 1)
+    asyncio.run(keeper.tick())
+    assert vickrey_auction_created.auction()["settled"]
+    # Only the owner can create the next auction
+    assert not vickrey_auction_created.paused()
+    assert keeper.metrics.rollovers == 0
+
+
+def test_keeper_replaces_underpriced_transaction(chain, vickrey_auction_created, deployer):
+    keeper = Keeper(vickrey_auction_created, deployer, block_time=1, max_fee=1, fee_bump_percentage=1000, max_retries=20)
+    asyncio.run(keeper.sync())
+    mine_at(chain, keeper.end_time)
+    asyncio.run(keeper.tick())
+    assert vickrey_auction_created.auction()["nft_id"] == 1
+    assert keeper.metrics.replacements > 0
+    assert keeper.metrics.failures == 0
+
+
+def test_keeper_submits_one_block_time_ahead(chain, vickrey_auction_created, deployer):
+    for _ in range(BLOCK_TIME_SAMPLES + 1):
+        chain.pending_timestamp += 12
+    keeper = Keeper(vickrey_auction_created, deployer)
+    asyncio.run(keeper.sync())
+    assert keeper.block_time == 12
+    assert keeper.receipt_timeout == 36
+
+    # With 1s blocks the next block is still before `end_time`
+    one_second = Keeper(vickrey_auction_created, deployer, block_time=1)
+    asyncio.run(one_second.sync())
+    mine_at(chain, keeper.end_time - 5)
+    asyncio.run(one_second.tick())
+    assert one_second.metrics.submissions == one_second.metrics.failures == 0
+
+    # With 12s blocks it is expected past `end_time`, so the keeper submits. The local chain mines
+    # 1s later, too early, and the revert leaves the auction to the next tick.
+    asyncio.run(keeper.tick())
+    assert keeper.metrics.failures == 1
+    assert keeper.live
+    assert not vickrey_auction_created.auction()["settled"]
+
+
+def test_keeper_replaces_stuck_transaction(chain, vickrey_auction_created, deployer):
+    keeper = Keeper(vickrey_auction_created, deployer, block_time=1, receipt_timeout=0.3, poll_interval=0.05)
+    asyncio.run(keeper.sync())
+    mine_at(chain, keeper.end_time)
+
+    async def tick_while_mining_replacements():
+        # Nothing is mined until the keeper replaces a pending transaction
+        tick = asyncio.create_task(keeper.tick())
+        mined = 0
+        while not tick.done():
+            if keeper.metrics.replacements > mined:
+                mined = keeper.metrics.replacements
+                # `chain.mine` skips the pending pool of the test provider
+                await asyncio.to_thread(chain.provider.tester.ethereum_tester.mine_blocks, 1)
+            await asyncio.sleep(0.05)
+        await tick
+
+    chain.provider.auto_mine = False
+    try:
+        asyncio.run(tick_while_mining_replacements())
+    finally:
+        chain.provider.auto_mine = True
+
+    # Settlement and the next auction were each stuck once
+    assert vickrey_auction_created.auction()["nft_id"] == 1
+    assert keeper.metrics.replacements == 2
+    assert keeper.metrics.failures == 0
+    assert keeper.metrics.rollovers == 1
+
+
+def test_keeper_stops_on_emergency_pause(chain, vickrey_auction_created, deployer):
+    keeper = Keeper(vickrey_auction_created, deployer, block_time=1)
+    asyncio.run(keeper.sync())
+    vickrey_auction_created.emergency_pause(sender=deployer)
+    mine_at(chain, keeper.end_time)
+    asyncio.run(keeper.tick())
+    assert keeper.stopped
@@ -0,0 +1,164 @@
+import urllib.request
+
+import pytest
+
+from scripts import calldata
+from scripts.metrics import AuctionMetrics, Summary, serve
+
+
+@pytest.fixture(scope="function")
+def multicall(project, deployer):
+    return project.Multicall.deploy(sender=deployer)
+
+
+@pytest.fixture(scope="function")
+def metrics(vickrey_auction_created, multicall):
+    return AuctionMetrics(vickrey_auction_created, multicall)
+
+
+# Helper methods
+
+
+def bid(vickrey_auction, erc20token, bidder, amount):
+    erc20token.approve(vickrey_auction, amount, sender=bidder)
+    return vickrey_auction.create_bid(vickrey_auction.auction()["nft_id"], amount, sender=bidder)
+
+
+def parse(text):
+    """
+    @dev `{"name{labels}": value}` of the samples in a Prometheus text exposition.
+    """
+
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def scripted_auction(chain, auction, erc20token, deployer, alice, bob, charlie):
+    """
+    @dev Three bids, the last two extending the auction, settlement 30s after `end_time` and a
+      withdrawal. Returns the receipts whose gas the exporter reports.
+    """
+
+    receipts = {"create_bid": [bid(auction, erc20token, alice, 100)]}
+    end_time = auction.auction()["end_time"]
+    chain.pending_timestamp = end_time - 50
+    receipts["create_bid"].append(bid(auction, erc20token, bob, 200))
+    erc20token.approve(auction, 300, sender=charlie)
+    receipts["__default__"] = [calldata.send(auction, calldata.create_bid(0, 300), sender=charlie)]
+
+    chain.pending_timestamp = auction.auction()["end_time"] + 30
+    receipts["settle_current_and_create_new_auction"] = [auction.settle_current_and_create_new_auction(sender=deployer)]
+    auction.withdraw(sender=alice)
+    return receipts
+
+
+# Summary
+
+
+def test_summary_window_is_bounded():
+    summary = Summary(window=3)
+    for value in range(10):
+        summary.observe(value)
+    assert list(summary.samples) == [7, 8, 9]
+    assert summary.count == 10
+    assert summary.sum == 45
+    assert summary.quantile(0.5) == 8
+
+
+# Exporter
+
+
+def test_metrics_of_scripted_auction(chain, vickrey_auction_created, metrics, deployer, alice, bob, charlie, minted_erc20token_to_users):
+    receipts = scripted_auction(chain, vickrey_auction_created, minted_erc20token_to_users, deployer, alice, bob, charlie)
+    metrics.update()
+    samples = parse(metrics.render())
+
+    assert samples["vickrey_auction_bids_total"] == 3
+    assert samples["vickrey_auction_auctions_settled_total"] == 1
+    assert samples["vickrey_auction_auctions_created_total"] == 1
+    assert samples["vickrey_auction_extensions_total"] == 2
+    assert samples["vickrey_auction_current_auction_extensions"] == 0
+    assert samples['vickrey_auction_extensions_per_auction{quantile="0.5"}'] == 2
+    assert samples['vickrey_auction_settlement_delay_seconds{quantile="0.5"}'] == 30
+    assert samples["vickrey_auction_settlement_delay_seconds_count"] == 1
+
+    for entry_point, entry_receipts in receipts.items():
+        labels = f'entry_point="{entry_point}"'
+        assert samples[f"vickrey_auction_gas_used_count{{{labels}}}"] == len(entry_receipts)
+        assert samples[f"vickrey_auction_gas_used_sum{{{labels}}}"] == sum(receipt.gas_used for receipt in entry_receipts)
+
+    # alice withdrew, bob was outbid and charlie is refunded the difference between bid and price
+    owed = [vickrey_auction_created.pending_returns(bidder) for bidder in (alice, bob, charlie)]
+    assert owed[0] == 0
+    assert samples["vickrey_auction_pending_returns"] == sum(owed)
+    assert samples["vickrey_auction_live_bid"] == 0
+    assert samples["vickrey_auction_liability_drift"] == 0
+    assert samples["vickrey_auction_owed_bidders"] == 2
+    assert samples[f'vickrey_auction_treasury_tokens{{treasury="{deployer.address}"}}'] == 0
+    assert samples["vickrey_auction_last_block"] == chain.blocks.height
+
+
+def test_bids_per_minute_is_a_rolling_window(chain, vickrey_auction_created, metrics, alice, bob, minted_erc20token_to_users):
+    bid(vickrey_auction_created, minted_erc20token_to_users, alice, 100)
+    bid(vickrey_auction_created, minted_erc20token_to_users, bob, 200)
+    metrics.update()
+    assert metrics.bids_per_minute() == 2
+
+    chain.pending_timestamp += 120
+    chain.mine()
+    metrics.update()
+    assert metrics.bids_per_minute() == 0
+    assert metrics.bids == 2
+
+
+def test_memory_is_bounded(vickrey_auction_created, multicall, alice, bob, minted_erc20token_to_users):
+    metrics = AuctionMetrics(vickrey_auction_created, multicall, window=2)
+    amount = 100
+    for i in range(5):
+        bid(vickrey_auction_created, minted_erc20token_to_users, (alice, bob)[i % 2], amount)
+        amount *= 2
+    metrics.update()
+
+    assert metrics.bids == 5
+    assert len(metrics._bid_timestamps) == 2
+    assert len(metrics._gas_seen) == 2
+    assert len(metrics.gas["create_bid"].samples) == 2
+    assert metrics.gas["create_bid"].count == 5
+
+
+def test_unsold_lot_counts_towards_treasury(chain, vickrey_auction_created, metrics, deployer):
+    chain.pending_timestamp = vickrey_auction_created.auction()["end_time"] + 1
+    vickrey_auction_created.settle_auction(sender=deployer)
+    metrics.update()
+    assert metrics.treasury_tokens == 1
+    assert metrics.settlement_delay.samples[-1] == 1
+
+
+def test_metrics_endpoint(metrics):
+    metrics.update()
+    server = serve(metrics, port=0)
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert parse(response.read().decode())["vickrey_auction_bids_total"] == 0
+    finally:
+        server.shutdown()
+
+
+def test_covered_challenge_counts_once(vickrey_auction_created, metrics, alice, bob, charlie, minted_erc20token_to_users):
+    auction, erc20token = vickrey_auction_created, minted_erc20token_to_users
+    erc20token.approve(auction, 1000, sender=alice)
+    auction.set_max_bid(0, 1000, sender=alice)
+    bid(auction, erc20token, bob, 200)
+    bid(auction, erc20token, charlie, 1100)
+    metrics.update()
+
+    # alice's raised bid is logged by bob's transaction but is not a bid of its own
+    assert metrics.bids == 3
+    assert len(metrics._bid_timestamps) == 3
+    assert metrics.gas["create_bid"].count == 2
@@ -11,6 +11,7 @@ def test_supports_interface_direct_misc(token):
         "ERC721TokenReceiver": "0x150B7A02",
         "ERC721Enumerable": "0x780E9D63",
         "ERC721Metadata": "0x5B5E139F",
+        "ERC4494": "0x5604E225",
     }
     for i, j in interfaces.items():
         assert token.supportsInterface(j)
\ No newline at end of file
@@ -0,0 +1,108 @@
+import ape
+import pytest
+
+from scripts.permit import sign_permit
+from scripts.scenarios import permit_costs
+
+DEADLINE_DELAY = 3600
+
+
+@pytest.fixture(scope="function")
+def deadline(chain):
+    return chain.pending_timestamp + DEADLINE_DELAY
+
+
+@pytest.fixture(scope="function")
+def owned(token, deployer, alice):
+    # alice owns tokens 0 and 1, so moving 0 also re-indexes 1
+    for _ in range(3):
+        token.mint(sender=deployer)
+    token.transferFrom(deployer, alice, 0, sender=deployer)
+    token.transferFrom(deployer, alice, 1, sender=deployer)
+    return token
+
+
+def test_permit_approves_spender(owned, alice, bob, charlie, deadline):
+    nonce = owned.nonces(0)
+    receipt = owned.permit(bob, 0, deadline, sign_permit(alice, owned, bob, 0, deadline), sender=charlie)
+
+    event = ape.project.Frok.Approval.from_receipt(receipt)[0]
+    assert (event._owner, event._approved, event._tokenId) == (alice, bob, 0)
+    assert owned.getApproved(0) == bob
+    assert owned.nonces(0) == nonce + 1
+
+    owned.transferFrom(alice, charlie, 0, sender=bob)
+    assert owned.ownerOf(0) == charlie
+    assert owned.getApproved(0) == ape.utils.ZERO_ADDRESS
+    assert owned.nonces(0) == nonce + 2
+
+
+def test_transfers_bump_nonces_and_keep_indexes(owned, deployer, alice, bob):
+    assert owned.nonces(2) == 0
+    assert owned.nonces(0) == owned.nonces(1) == 1
+
+    owned.transferFrom(alice, bob, 0, sender=alice)
+    assert owned.nonces(0) == 2
+    assert owned.nonces(1) == 1
+    assert owned.tokensForOwner(alice) == [1]
+    assert owned.tokenOfOwnerByIndex(bob, 0) == 0
+
+    owned.transferFrom(bob, alice, 0, sender=bob)
+    owned.transferFrom(alice, deployer, 1, sender=alice)
+    assert owned.tokensForOwner(alice) == [0]
+    assert owned.tokensForOwner(deployer) == [2, 1]
+    assert (owned.nonces(0), owned.nonces(1), owned.nonces(2)) == (3, 2, 0)
+
+    with ape.reverts():
+        owned.nonces(3)
+
+
+def test_permit_rejects_invalid(chain, owned, alice, bob, charlie, deadline):
+    with ape.reverts("Invalid signature"):
+        owned.permit(bob, 0, deadline, sign_permit(charlie, owned, bob, 0, deadline), sender=bob)
+    with ape.reverts("Invalid signature"):
+        owned.permit(charlie, 0, deadline, sign_permit(alice, owned, bob, 0, deadline), sender=bob)
+    with ape.reverts("Invalid signature"):
+        owned.permit(bob, 1, deadline, sign_permit(alice, owned, bob, 0, deadline), sender=bob)
+    with ape.reverts():
+        owned.permit(alice, 0, deadline, sign_permit(alice, owned, alice, 0, deadline), sender=bob)
+
+    expired = chain.pending_timestamp - 1
+    with ape.reverts("Permit expired"):
+        owned.permit(bob, 0, expired, sign_permit(alice, owned, bob, 0, expired), sender=bob)
+
+
+def test_permit_cannot_be_replayed(owned, alice, bob, charlie, deadline):
+    sig = sign_permit(alice, owned, bob, 0, deadline)
+    owned.permit(bob, 0, deadline, sig, sender=bob)
+
+    # Revoking sticks, the same signature is spent
+    owned.approve(ape.utils.ZERO_ADDRESS, 0, sender=alice)
+    with ape.reverts("Invalid signature"):
+        owned.permit(bob, 0, deadline, sig, sender=bob)
+
+    # A transfer invalidates outstanding permits, even once the token is back
+    unused = sign_permit(alice, owned, charlie, 0, deadline)
+    owned.transferFrom(alice, bob, 0, sender=alice)
+    owned.transferFrom(bob, alice, 0, sender=bob)
+    with ape.reverts("Invalid signature"):
+        owned.permit(charlie, 0, deadline, unused, sender=charlie)
+
+
+def test_permit_from_contract_owner(project, owned, deployer, alice, bob, deadline):
+    wallet = deployer.deploy(project.ERC1271Signer, alice)
+    owned.transferFrom(deployer, wallet, 2, sender=deployer)
+
+    with ape.reverts("Invalid signature"):
+        owned.permit(bob, 2, deadline, sign_permit(bob, owned, bob, 2, deadline), sender=bob)
+    owned.permit(bob, 2, deadline, sign_permit(alice, owned, bob, 2, deadline), sender=bob)
+    owned.transferFrom(wallet, bob, 2, sender=bob)
+    assert owned.ownerOf(2) == bob
+
+
+def test_permit_gas(deployer, bob, charlie, accounts):
+    costs = permit_costs(deployer, bob, [charlie, accounts[5]])
+    # The same transfer follows either approval, and checking the signature costs less than the
+    # owner's own transaction it replaces
+    assert costs["transferFrom after permit"] == pytest.approx(costs["transferFrom after approve"], abs=100)
+    assert 0 < costs["permit"] - costs["approve"] < 21_000
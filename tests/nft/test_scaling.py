@@ -0,0 +1,25 @@
+from scripts.frok_scaling import OPERATIONS, format_report, scaling
+
+
+def test_transfers_do_not_scale_with_balance(deployer, bob):
+    report = scaling(deployer, bob, sizes=[50, 10], batch_size=25)
+    assert report["sizes"] == [10, 50]
+    gas = report["gas"]
+    assert set(gas) == set(OPERATIONS)
+
+    # Swap-and-pop keeps every transfer O(1), whichever index moves
+    for operation in ("mint", "transferFrom first", "transferFrom middle", "transferFrom last", "safeTransferFrom"):
+        assert gas[operation][0] == gas[operation][1], operation
+    assert gas["tokenOfOwnerByIndex"][0] == gas["tokenOfOwnerByIndex"][1]
+    # Moving the last id into the freed index costs more than popping the last one
+    assert gas["transferFrom first"][0] > gas["transferFrom last"][0]
+    # `tokensForOwner` reads the whole array
+    assert gas["tokensForOwner"][1] > gas["tokensForOwner"][0]
+
+
+def test_format_report_compares_with_baseline():
+    baseline = {"sizes": [10], "gas": {"mint": [100], "tokensForOwner": [500]}}
+    report = {"sizes": [10], "gas": {"mint": [90], "tokensForOwner": ["failed: out of gas"]}}
+    text = format_report(report, baseline)
+    assert "90 (-10)" in text
+    assert "tokensForOwner @ 10: failed: out of gas" in text
@@ -0,0 +1,93 @@
+import pytest
+
+from scripts.snapshot import Snapshot, build
+
+
+# Helper methods
+
+
+def mint_and_spread(chain, token, deployer, alice, bob):
+    for _ in range(6):
+        token.mint(sender=deployer)
+    token.transferFrom(deployer, alice, 1, sender=deployer)
+    token.transferFrom(deployer, bob, 2, sender=deployer)
+    token.transferFrom(deployer, alice, 4, sender=deployer)
+    token.transferFrom(alice, bob, 1, sender=alice)
+
+
+def assert_matches_chain(snapshot, token, holders):
+    holdings = snapshot.holdings()
+    for holder in holders:
+        assert sorted(token.tokensForOwner(holder)) == holdings.get(holder.address, [])
+    assert sum(len(ids) for ids in holdings.values()) == token.totalSupply()
+
+
+# Snapshot
+
+
+def test_snapshot_matches_tokens_for_owner(chain, token, deployer, alice, bob):
+    mint_and_spread(chain, token, deployer, alice, bob)
+
+    snapshot, replayed = build(token)
+
+    assert replayed == 10
+    assert_matches_chain(snapshot, token, [deployer, alice, bob])
+
+
+def test_snapshot_incremental_replay(chain, token, deployer, alice, bob, tmp_path):
+    mint_and_spread(chain, token, deployer, alice, bob)
+    first, _ = build(token, checkpoint_dir=tmp_path)
+
+    token.transferFrom(bob, alice, 2, sender=bob)
+    token.mint(sender=deployer)
+    second, replayed = build(token, checkpoint_dir=tmp_path)
+
+    assert replayed == 2
+    assert second.block > first.block
+    assert_matches_chain(second, token, [deployer, alice, bob])
+
+
+def test_snapshot_at_historical_block(chain, token, deployer, alice, bob, tmp_path):
+    mint_and_spread(chain, token, deployer, alice, bob)
+    block = chain.blocks.height
+    expected = {holder.address: sorted(token.tokensForOwner(holder)) for holder in (deployer, alice, bob)}
+    token.transferFrom(alice, bob, 4, sender=alice)
+    build(token, checkpoint_dir=tmp_path)
+
+    snapshot, _ = build(token, block=block, checkpoint_dir=tmp_path)
+
+    assert snapshot.block == block
+    assert snapshot.holdings() == expected
+
+
+def test_snapshot_checkpoint_roundtrip(chain, token, deployer, alice, bob, tmp_path):
+    mint_and_spread(chain, token, deployer, alice, bob)
+    snapshot, _ = build(token)
+
+    loaded = Snapshot.load(snapshot.save(tmp_path))
+
+    assert loaded.block == snapshot.block
+    assert loaded.holdings() == snapshot.holdings()
+
+
+def test_snapshot_csv_export(chain, token, deployer, alice, bob, tmp_path):
+    mint_and_spread(chain, token, deployer, alice, bob)
+    snapshot, _ = build(token)
+
+    snapshot.to_csv(tmp_path / "holders.csv")
+
+    lines = (tmp_path / "holders.csv").read_text().splitlines()
+    assert lines[0] == "owner,balance,token_ids"
+    assert f"{bob.address},2,1 2" in lines
+
+
+def test_snapshot_parquet_export(chain, token, deployer, alice, bob, tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    mint_and_spread(chain, token, deployer, alice, bob)
+    snapshot, _ = build(token)
+
+    snapshot.to_parquet(tmp_path / "holders.parquet")
+
+    frame = pd.read_parquet(tmp_path / "holders.parquet")
+    assert dict(zip(frame["owner"], frame["token_ids"].map(list))) == snapshot.holdings()
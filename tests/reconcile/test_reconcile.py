@@ -0,0 +1,157 @@
+import pytest
+
+from scripts.reconcile import Reconciler
+
+
+@pytest.fixture(scope="function")
+def multicall(project, deployer):
+    return project.Multicall.deploy(sender=deployer)
+
+
+# Helper methods
+
+
+def bid(vickrey_auction, erc20token, bidder, amount):
+    erc20token.approve(vickrey_auction, amount, sender=bidder)
+    vickrey_auction.create_bid(0, amount, sender=bidder)
+
+
+def outbid_chain(vickrey_auction, erc20token, alice, bob, charlie):
+    bid(vickrey_auction, erc20token, alice, 100)
+    bid(vickrey_auction, erc20token, bob, 200)
+    bid(vickrey_auction, erc20token, charlie, 300)
+
+
+# Reconciliation
+
+
+def test_reconcile_live_auction(vickrey_auction_created, multicall, alice, bob, charlie, minted_erc20token_to_users):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+
+    report = Reconciler(vickrey_auction_created, multicall).reconcile()
+
+    assert report.balance == 600
+    assert report.pending_returns == 300
+    assert report.live_bid == 300
+    assert report.drift == 0
+    assert report.bidders == 3
+    assert report.owed_bidders == 2
+
+
+def test_reconcile_proxy_bid_escrow(vickrey_auction_created, multicall, alice, bob, minted_erc20token_to_users):
+    minted_erc20token_to_users.approve(vickrey_auction_created, 1000, sender=alice)
+    vickrey_auction_created.set_max_bid(0, 1000, sender=alice)
+    bid(vickrey_auction_created, minted_erc20token_to_users, bob, 200)
+
+    report = Reconciler(vickrey_auction_created, multicall).reconcile()
+
+    # bob's bid is covered by alice's max bid, so it is held for bob next to alice's escrow
+    assert report.balance == 1200
+    assert report.pending_returns == 200
+    assert report.live_bid == 1000
+    assert report.drift == 0
+
+
+def test_reconcile_cached_per_block(vickrey_auction_created, multicall, alice, bob, charlie, minted_erc20token_to_users):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+    reconciler = Reconciler(vickrey_auction_created, multicall)
+    report = reconciler.reconcile()
+    calls = reconciler.rpc_calls
+
+    assert reconciler.reconcile() == report
+    assert reconciler.rpc_calls == calls
+
+
+def test_reconcile_incremental_after_withdraw(
+    vickrey_auction_created, multicall, alice, bob, charlie, minted_erc20token_to_users
+):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+    reconciler = Reconciler(vickrey_auction_created, multicall)
+    reconciler.reconcile()
+
+    vickrey_auction_created.withdraw(sender=alice)
+    report = reconciler.reconcile()
+
+    assert report.balance == 500
+    assert report.pending_returns == 200
+    assert report.drift == 0
+    assert report == Reconciler(vickrey_auction_created, multicall).reconcile()
+
+
+def test_reconcile_after_settlement(
+    chain, vickrey_auction_created, multicall, deployer, alice, bob, charlie, minted_erc20token_to_users
+):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+    reconciler = Reconciler(vickrey_auction_created, multicall)
+    reconciler.reconcile()
+
+    chain.pending_timestamp += vickrey_auction_created.duration()
+    vickrey_auction_created.settle_auction(sender=deployer)
+    price = vickrey_auction_created.auction()["price"]
+    report = reconciler.reconcile()
+
+    assert report.live_bid == 0
+    assert report.pending_returns == 300 + (300 - price)
+    assert report.drift == 0
+
+
+def test_reconcile_after_emergency_pause(
+    vickrey_auction_created, multicall, deployer, alice, bob, charlie, minted_erc20token_to_users
+):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+    reconciler = Reconciler(vickrey_auction_created, multicall)
+    reconciler.reconcile()
+
+    vickrey_auction_created.emergency_pause(sender=deployer)
+    report = reconciler.reconcile()
+
+    assert report.live_bid == 0
+    assert report.pending_returns == 600
+    assert report.drift == 0
+
+
+def test_reconcile_forgets_idle_bidders(
+    chain, vickrey_auction_created, multicall, deployer, alice, bob, charlie, minted_erc20token_to_users
+):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+    reconciler = Reconciler(vickrey_auction_created, multicall)
+    reconciler.reconcile()
+
+    vickrey_auction_created.withdraw(sender=alice)
+    report = reconciler.reconcile()
+    assert reconciler.bidders == {bob.address, charlie.address}
+    assert report.bidders == 2
+
+    # Named again by the log of a new bid
+    bid(vickrey_auction_created, minted_erc20token_to_users, alice, 400)
+    report = reconciler.reconcile()
+    assert alice.address in reconciler.bidders
+    assert report.pending_returns == 200 + 300
+    assert report.drift == 0
+
+
+def test_reconcile_past_cache_size(vickrey_auction_created, multicall, alice, bob, charlie, minted_erc20token_to_users):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+    reconciler = Reconciler(vickrey_auction_created, multicall, cache_size=2)
+    report = reconciler.reconcile()
+
+    assert reconciler._pending == {}
+    vickrey_auction_created.withdraw(sender=alice)
+    assert reconciler.reconcile() == Reconciler(vickrey_auction_created, multicall).reconcile()
+    assert report.pending_returns == 300
+
+
+def test_reconcile_reports_drift(vickrey_auction_created, multicall, deployer, alice, bob, charlie, minted_erc20token_to_users):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+    minted_erc20token_to_users.mint(vickrey_auction_created, 42, sender=deployer)
+
+    assert Reconciler(vickrey_auction_created, multicall).reconcile().drift == 42
+
+
+def test_reconcile_batches(vickrey_auction_created, multicall, alice, bob, charlie, minted_erc20token_to_users):
+    outbid_chain(vickrey_auction_created, minted_erc20token_to_users, alice, bob, charlie)
+    reconciler = Reconciler(vickrey_auction_created, multicall, batch_size=2)
+
+    assert reconciler.reconcile() == Reconciler(vickrey_auction_created, multicall).reconcile()
+    # 3 log queries plus 7 calls (4 state reads and 3 bidders) in batches of 2
+    assert reconciler.rpc_calls == 7
@@ -0,0 +1,258 @@
+import json
+import urllib.error
+import urllib.request
+from dataclasses import replace
+
+import ape
+import pytest
+
+from scripts.relayer import SECP256K1_HALF_N, Relayer, SignedBid, serve, sign_bid
+
+SECP256K1_N = 2 * SECP256K1_HALF_N + 1
+
+
+@pytest.fixture(scope="function")
+def deadline(chain):
+    return chain.pending_timestamp + 3600
+
+
+@pytest.fixture(scope="function")
+def bidders(accounts, vickrey_auction_created, minted_erc20token_to_users, deployer):
+    bidders = list(accounts[2:8])
+    for bidder in bidders:
+        minted_erc20token_to_users.mint(bidder, 10**18, sender=deployer)
+        minted_erc20token_to_users.approve(vickrey_auction_created, 10**18, sender=bidder)
+    return bidders
+
+
+@pytest.fixture(scope="function")
+def relayer(vickrey_auction_created, charlie):
+    return Relayer(vickrey_auction_created, charlie)
+
+
+# Contract
+
+
+def test_submit_bids(vickrey_auction_created, price_provider, alice, bob, charlie, bidders, deadline, minted_erc20token_to_users):
+    second = sign_bid(alice, vickrey_auction_created, 0, 500, deadline)
+    highest = sign_bid(bob, vickrey_auction_created, 0, 1000, deadline)
+    alice_balance = minted_erc20token_to_users.balanceOf(alice)
+
+    tx = vickrey_auction_created.submit_bids([second.as_tuple(), highest.as_tuple()], sender=charlie)
+
+    auction = vickrey_auction_created.auction()
+    assert auction["bidder"] == bob
+    assert auction["bid"] == 1000
+    assert auction["price"] == price_provider.get_price(1000, 500)
+    assert vickrey_auction_created.pending_returns(alice) == 500
+    assert minted_erc20token_to_users.balanceOf(alice) == alice_balance - 500
+    assert [log.sender for log in tx.decode_logs(vickrey_auction_created.AuctionBid)] == [alice, bob]
+
+
+def test_submit_bids_invalid_signature(vickrey_auction_created, alice, bob, charlie, bidders, deadline):
+    signed = sign_bid(alice, vickrey_auction_created, 0, 500, deadline)
+    with ape.reverts("Invalid signature"):
+        vickrey_auction_created.submit_bids([replace(signed, bidder=bob.address).as_tuple()], sender=charlie)
+    with ape.reverts("Invalid signature"):
+        vickrey_auction_created.submit_bids([replace(signed, amount=5000).as_tuple()], sender=charlie)
+    # The high-s twin of the signature recovers the same signer but is rejected
+    twin = replace(signed, s=SECP256K1_N - signed.s, v=55 - signed.v)
+    with ape.reverts("Invalid signature"):
+        vickrey_auction_created.submit_bids([twin.as_tuple()], sender=charlie)
+
+
+def test_submit_bids_expired(chain, vickrey_auction_created, alice, charlie, bidders):
+    signed = sign_bid(alice, vickrey_auction_created, 0, 500, chain.pending_timestamp - 1)
+    with ape.reverts("Signed bid expired"):
+        vickrey_auction_created.submit_bids([signed.as_tuple()], sender=charlie)
+
+
+def test_submit_bids_cannot_replay(vickrey_auction_created, alice, charlie, bidders, deadline):
+    signed = sign_bid(alice, vickrey_auction_created, 0, 500, deadline)
+    higher = sign_bid(alice, vickrey_auction_created, 0, 1000, deadline)
+    vickrey_auction_created.submit_bids([signed.as_tuple()], sender=charlie)
+    assert vickrey_auction_created.bid_nonces(alice) == 1
+    # Every signature made with the used nonce is void, including ones that would still be valid bids
+    with ape.reverts("Invalid signature"):
+        vickrey_auction_created.submit_bids([higher.as_tuple()], sender=charlie)
+
+
+def test_cancel_signed_bids(vickrey_auction_created, alice, charlie, bidders, deadline):
+    signed = sign_bid(alice, vickrey_auction_created, 0, 500, deadline)
+
+    tx = vickrey_auction_created.cancel_signed_bids(sender=alice)
+
+    assert vickrey_auction_created.bid_nonces(alice) == 1
+    assert list(tx.decode_logs(vickrey_auction_created.SignedBidsCancelled)) == [
+        vickrey_auction_created.SignedBidsCancelled(alice, 1)
+    ]
+    with ape.reverts("Invalid signature"):
+        vickrey_auction_created.submit_bids([signed.as_tuple()], sender=charlie)
+    vickrey_auction_created.submit_bids([sign_bid(alice, vickrey_auction_created, 0, 500, deadline).as_tuple()], sender=charlie)
+    assert vickrey_auction_created.auction()["bidder"] == alice
+
+
+def test_submit_top_bid(vickrey_auction_created, price_provider, alice, bob, charlie, bidders, deadline, minted_erc20token_to_users):
+    runner_up = sign_bid(alice, vickrey_auction_created, 0, 990, deadline)
+    highest = sign_bid(bob, vickrey_auction_created, 0, 1000, deadline)
+    alice_balance = minted_erc20token_to_users.balanceOf(alice)
+    with ape.reverts("Must send more than last bid by min_bid_increment_percentage amount"):
+        vickrey_auction_created.submit_bids([runner_up.as_tuple(), highest.as_tuple()], sender=charlie)
+
+    tx = vickrey_auction_created.submit_top_bid(highest.as_tuple(), runner_up.as_tuple(), sender=charlie)
+
+    auction = vickrey_auction_created.auction()
+    assert auction["bidder"] == bob
+    assert auction["bid"] == 1000
+    assert auction["price"] == price_provider.get_price(1000, 990)
+    # The runner-up is not charged but its signature is used up
+    assert minted_erc20token_to_users.balanceOf(alice) == alice_balance
+    assert vickrey_auction_created.pending_returns(alice) == 0
+    assert vickrey_auction_created.bid_nonces(alice) == 1
+    assert [log.sender for log in tx.decode_logs(vickrey_auction_created.AuctionBid)] == [bob]
+
+
+def test_submit_top_bid_runner_up_must_pay(vickrey_auction_created, alice, bob, charlie, bidders, deadline, minted_erc20token_to_users):
+    minted_erc20token_to_users.approve(vickrey_auction_created, 0, sender=alice)
+    runner_up = sign_bid(alice, vickrey_auction_created, 0, 990, deadline)
+    highest = sign_bid(bob, vickrey_auction_created, 0, 1000, deadline)
+    with ape.reverts("Runner-up cannot pay its bid"):
+        vickrey_auction_created.submit_top_bid(highest.as_tuple(), runner_up.as_tuple(), sender=charlie)
+    with ape.reverts("Runner-up cannot be above the bid"):
+        vickrey_auction_created.submit_top_bid(runner_up.as_tuple(), highest.as_tuple(), sender=charlie)
+
+
+def test_submit_top_bid_runner_up_below_reserve(vickrey_auction_created, alice, bob, charlie, bidders, deadline):
+    # A 1 wei runner-up would price a 150 bid well below the reserve price of 100
+    runner_up = sign_bid(alice, vickrey_auction_created, 0, 1, deadline)
+    highest = sign_bid(bob, vickrey_auction_created, 0, 150, deadline)
+    with ape.reverts("Must send at least reservePrice"):
+        vickrey_auction_created.submit_top_bid(highest.as_tuple(), runner_up.as_tuple(), sender=charlie)
+    assert vickrey_auction_created.auction()["bid"] == 0
+
+
+def test_submit_bids_other_auction_house(project, vickrey_auction_created, token, erc20token, price_provider, deployer, alice, charlie, split_recipient, bidders, deadline):
+    other = project.VickreyAuction.deploy(token, erc20token, price_provider, 100, 100, 5, 3600, 95, split_recipient, sender=deployer)
+    signed = sign_bid(alice, other, 0, 500, deadline)
+    with ape.reverts("Invalid signature"):
+        vickrey_auction_created.submit_bids([signed.as_tuple()], sender=charlie)
+
+
+# Relayer
+
+
+def test_relayer_submits_top_two(vickrey_auction_created, price_provider, relayer, bidders, deadline, minted_erc20token_to_users):
+    amounts = [150, 300, 120, 1000, 800, 400]
+    for bidder, amount in zip(bidders, amounts):
+        relayer.add(sign_bid(bidder, vickrey_auction_created, 0, amount, deadline))
+    balances = [minted_erc20token_to_users.balanceOf(bidder) for bidder in bidders]
+
+    assert [signed.amount for signed in relayer.select()[0]] == [800, 1000]
+    assert relayer.select()[1] is None
+    relayer.submit()
+
+    auction = vickrey_auction_created.auction()
+    assert auction["bidder"] == bidders[3]
+    assert auction["price"] == price_provider.get_price(1000, 800)
+    # Losing signatures never touched the chain
+    for i, bidder in enumerate(bidders):
+        if i not in (3, 4):
+            assert minted_erc20token_to_users.balanceOf(bidder) == balances[i]
+            assert vickrey_auction_created.pending_returns(bidder) == 0
+
+
+def test_relayer_prices_against_runner_up(vickrey_auction_created, price_provider, relayer, bidders, deadline, minted_erc20token_to_users):
+    for bidder, amount in zip(bidders, [1000, 990, 900]):
+        relayer.add(sign_bid(bidder, vickrey_auction_created, 0, amount, deadline))
+    balances = [minted_erc20token_to_users.balanceOf(bidder) for bidder in bidders[:3]]
+
+    # 1000 does not beat 990 by 5%, so it goes alone with 990 as its price
+    selected, runner_up = relayer.select()
+    assert [signed.amount for signed in selected] == [1000]
+    assert runner_up.amount == 990
+    relayer.submit()
+
+    auction = vickrey_auction_created.auction()
+    assert auction["bidder"] == bidders[0]
+    assert auction["price"] == price_provider.get_price(1000, 990)
+    assert [minted_erc20token_to_users.balanceOf(bidder) for bidder in bidders[1:3]] == balances[1:]
+    assert relayer.bids == {bidders[2].address: sign_bid(bidders[2], vickrey_auction_created, 0, 900, deadline, nonce=0)}
+
+
+def test_relayer_keeps_highest_bid_per_bidder(vickrey_auction_created, relayer, alice, bidders, deadline):
+    relayer.add(sign_bid(alice, vickrey_auction_created, 0, 500, deadline))
+    relayer.add(sign_bid(alice, vickrey_auction_created, 0, 200, deadline))
+    assert [signed.amount for signed in relayer.select()[0]] == [500]
+
+
+@pytest.mark.parametrize(
+    "nft_id,amount,message",
+    [
+        (1, 500, "NFT not up for auction"),
+        (0, 10, "Must send at least reservePrice"),
+        (0, 10**19, "Insufficient allowance"),
+    ],
+)
+def test_relayer_rejects_invalid_bids(vickrey_auction_created, relayer, alice, bidders, deadline, nft_id, amount, message):
+    with pytest.raises(ValueError, match=message):
+        relayer.add(sign_bid(alice, vickrey_auction_created, nft_id, amount, deadline))
+
+
+def test_relayer_drops_outbid_signatures(vickrey_auction_created, relayer, alice, bob, bidders, deadline):
+    relayer.add(sign_bid(alice, vickrey_auction_created, 0, 500, deadline))
+    vickrey_auction_created.create_bid(0, 1000, sender=bob)
+    assert relayer.select() == ([], None)
+
+
+def test_relayer_drops_cancelled_signatures(vickrey_auction_created, relayer, alice, bob, bidders, deadline):
+    relayer.add(sign_bid(alice, vickrey_auction_created, 0, 500, deadline))
+    relayer.add(sign_bid(bob, vickrey_auction_created, 0, 300, deadline))
+    vickrey_auction_created.cancel_signed_bids(sender=alice)
+    assert [signed.amount for signed in relayer.select()[0]] == [300]
+
+
+def test_relayer_gas(chain, vickrey_auction_created, relayer, deployer, bidders, deadline):
+    amounts = [150, 300, 400, 800, 1000]
+    for bidder, amount in zip(bidders, amounts):
+        relayer.add(sign_bid(bidder, vickrey_auction_created, 0, amount, deadline))
+    selected, _ = relayer.select()
+    relayed = relayer.submit().gas_used
+    relayed_auction = vickrey_auction_created.auction()
+
+    # The same bids placed one by one with `create_bid`, on the next auction
+    chain.pending_timestamp = relayed_auction["end_time"] + 1
+    vickrey_auction_created.settle_current_and_create_new_auction(sender=deployer)
+    by_address = {bidder.address: bidder for bidder in bidders}
+    direct = sum(
+        vickrey_auction_created.create_bid(1, signed.amount, sender=by_address[signed.bidder]).gas_used
+        for signed in selected
+    )
+    direct_auction = vickrey_auction_created.auction()
+
+    assert (direct_auction["bidder"], direct_auction["bid"], direct_auction["price"]) == (
+        relayed_auction["bidder"], relayed_auction["bid"], relayed_auction["price"]
+    )
+    # Relaying saves the base cost of all but one transaction but pays for a signature check and a
+    # first nonce write per bid; the gas saving comes from the losing bids never being placed
+    assert relayed < direct + 30000 * len(selected)
+
+
+def test_relayer_http(vickrey_auction_created, relayer, alice, bidders, deadline):
+    server = serve(relayer, port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/bids"
+    try:
+        signed = sign_bid(alice, vickrey_auction_created, 0, 500, deadline)
+        request = urllib.request.Request(url, data=signed.to_json().encode(), method="POST")
+        with urllib.request.urlopen(request) as response:
+            assert response.status == 202
+
+        invalid = sign_bid(alice, vickrey_auction_created, 1, 500, deadline)
+        request = urllib.request.Request(url, data=invalid.to_json().encode(), method="POST")
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(request)
+        assert err.value.code == 400
+        assert json.loads(err.value.read()) == {"error": "NFT not up for auction"}
+    finally:
+        server.shutdown()
+
+    assert relayer.bids == {alice.address: SignedBid.from_json(signed.to_json())}
@@ -0,0 +1,131 @@
+import pytest
+
+from scripts.relayer import sign_bid
+from scripts.replay import load_snapshot, read_recording, record, replay, save_snapshot, write_recording
+
+
+# Helper methods
+
+
+def bid(auction, erc20token, bidder, amount):
+    erc20token.approve(auction, amount, sender=bidder)
+    return auction.create_bid(auction.auction()["nft_id"], amount, sender=bidder)
+
+
+@pytest.fixture(scope="function")
+def history(chain, vickrey_auction, token, minted_erc20token_to_users, deployer, alice, bob, charlie):
+    """
+    @dev An extension chain, a config change, a withdrawal, a secondary transfer, an unsold lot
+      delivered to the treasury and a live auction where a proxy bid covers a challenge before a
+      plain bid takes the lead. Returns the recorded events.
+    """
+
+    auction, erc20token = vickrey_auction, minted_erc20token_to_users
+    start_block = chain.provider.get_receipt(auction.txn_hash).block_number
+    token.set_minter(auction, sender=deployer)
+    auction.create_auction(sender=deployer)
+
+    bid(auction, erc20token, alice, 100)
+    bid(auction, erc20token, bob, 200)
+    chain.pending_timestamp = auction.auction()["end_time"] - 50
+    bid(auction, erc20token, charlie, 300)
+    bid(auction, erc20token, alice, 400)
+    auction.set_time_buffer(200, sender=deployer)
+    chain.pending_timestamp = auction.auction()["end_time"] + 1
+    auction.settle_auction(sender=deployer)
+    auction.withdraw(sender=bob)
+    token.transferFrom(alice, charlie, 0, sender=alice)
+
+    auction.create_auction(sender=deployer)
+    chain.pending_timestamp = auction.auction()["end_time"] + 1
+    auction.settle_auction(sender=deployer)
+    auction.create_auction(sender=deployer)
+    bid(auction, erc20token, bob, 150)
+    erc20token.approve(auction, 1000, sender=alice)
+    auction.set_max_bid(auction.auction()["nft_id"], 1000, sender=alice)
+    bid(auction, erc20token, charlie, 300)
+    bid(auction, erc20token, bob, 2000)
+
+    return record(auction, start_block)
+
+
+def test_recording_round_trip(history, tmp_path):
+    header, events = history
+    path = tmp_path / "history.jsonl"
+    write_recording(path, header, events)
+    assert read_recording(path) == (header, events)
+
+    names = [event["event"] for event in events]
+    assert names.count("AuctionCreated") == 3
+    assert names.count("AuctionBid") == 9
+    assert [event["max_bid"] for event in events if event["event"] == "AuctionMaxBid"] == [1000, 0]
+    assert names.count("Config") == 1
+    assert [event["extended"] for event in events if event["event"] == "AuctionBid"] == [False, False, True, True] + [False] * 5
+    assert header["config"]["time_buffer"] == 100
+
+
+def test_replay_reproduces_state(history, vickrey_auction, token, deployer, alice, bob, charlie):
+    header, events = history
+    state = replay(deployer, header, events)
+    assert state.mismatches == []
+    assert state.auction.address != vickrey_auction.address
+
+    original, replayed = vickrey_auction.auction(), state.auction.auction()
+    for key in ("nft_id", "bid", "price", "settled"):
+        assert replayed[key] == original[key]
+    assert replayed["bidder"] == state.local(original["bidder"])
+    assert replayed["start_time"] == original["start_time"] + state.offset
+    assert replayed["end_time"] == original["end_time"] + state.offset
+    assert state.auction.time_buffer() == 200
+
+    for account in (alice, bob, charlie):
+        assert state.auction.pending_returns(state.local(account)) == vickrey_auction.pending_returns(account)
+    for token_id in range(token.totalSupply()):
+        assert state.nft.ownerOf(token_id) == state.local(token.ownerOf(token_id))
+    assert state.nft.balanceOf(state.owner) == token.balanceOf(deployer) == 1
+
+
+def test_snapshot_round_trip(chain, history, deployer, bob, tmp_path):
+    header, events = history
+    state = replay(deployer, header, events)
+    path = tmp_path / "history.snapshot"
+    save_snapshot(path, state)
+    height, live = chain.blocks.height, state.auction.auction()
+    pending = state.auction.pending_returns(state.local(bob))
+
+    # Move on from the snapshot, then load it back
+    chain.pending_timestamp = live["end_time"] + 1
+    state.auction.settle_auction(sender=deployer)
+    assert chain.blocks.height > height
+
+    loaded = load_snapshot(path)
+    assert chain.blocks.height == height
+    assert loaded.auction.address == state.auction.address
+    assert loaded.auction.auction() == live
+    assert loaded.offset == state.offset
+
+    # Replayed accounts can keep transacting
+    outbid = live["bid"] * 2
+    loaded.token.mint(loaded.local(bob), outbid, sender=deployer)
+    loaded.auction.create_bid(live["nft_id"], outbid, sender=loaded.account(bob))
+    assert loaded.auction.pending_returns(loaded.local(bob)) == pending + live["bid"]
+
+
+def test_replay_top_bid_priced_against_runner_up(chain, vickrey_auction, token, minted_erc20token_to_users, deployer, alice, bob):
+    auction, erc20token = vickrey_auction, minted_erc20token_to_users
+    start_block = chain.provider.get_receipt(auction.txn_hash).block_number
+    token.set_minter(auction, sender=deployer)
+    auction.create_auction(sender=deployer)
+    for bidder in (alice, bob):
+        erc20token.approve(auction, 1000, sender=bidder)
+    deadline = chain.pending_timestamp + 3600
+    runner_up = sign_bid(alice, auction, 0, 990, deadline)
+    auction.submit_top_bid(sign_bid(bob, auction, 0, 1000, deadline).as_tuple(), runner_up.as_tuple(), sender=deployer)
+
+    header, events = record(auction, start_block)
+    (event,) = [event for event in events if event["event"] == "AuctionBid"]
+    assert (event["runner_up"], event["runner_up_amount"]) == (alice.address, 990)
+
+    state = replay(deployer, header, events)
+    assert state.mismatches == []
+    assert state.auction.auction()["price"] == auction.auction()["price"] < 1000